@@ -146,7 +146,7 @@ with main_tab1:
             st.warning("프롬프트를 입력해 주세요.")
         else:
             counter = TokenCounter(model=model)
-            refiner = PromptRefiner(model=model)
+            refiner = PromptRefiner(model=model, result_cache=True)
             calculator = CostCalculator(model=model)
 
             result = refiner.refine(
@@ -185,12 +185,12 @@ with main_tab1:
             ]
 
             def render_tokens(text, cnt):
-                toks = cnt.tokenize(text)
+                spans = cnt.tokenize_spans(text)
                 parts = []
-                for i, t in enumerate(toks):
+                for i, (tid, piece) in enumerate(zip(spans.token_ids, spans.pieces())):
                     c = TOKEN_COLORS[i % len(TOKEN_COLORS)]
-                    esc = t["text"].replace("<", "&lt;").replace(">", "&gt;").replace(" ", "·").replace("\n", "↵\n")
-                    parts.append(f'<span class="token-chip" style="background-color:{c};" title="ID: {t["token_id"]}">{esc}</span>')
+                    esc = piece.replace("<", "&lt;").replace(">", "&gt;").replace(" ", "·").replace("\n", "↵\n")
+                    parts.append(f'<span class="token-chip" style="background-color:{c};" title="ID: {tid}">{esc}</span>')
                 return "".join(parts)
 
             t1, t2 = st.tabs(["원본 토큰", "최적화 토큰"])
@@ -0,0 +1,300 @@
+"""
+asyncio 최적화 API
+=================
+PromptRefiner·HybridOptimizer를 이벤트 루프를 막지 않고 호출하는 비동기 파사드.
+
+동기 작업은 관리되는 스레드 풀(또는 프로세스 풀)에서 실행하고, 세마포어로 동시에
+실행되는 호출 수를 제한한다. 제한에 걸린 호출은 슬롯이 빌 때까지 await에서 기다리므로
+요청이 몰려도 풀의 대기열이 무한정 늘어나지 않는다 (백프레셔).
+
+스레드 모드에서는 정제기·엔진 하나를 풀의 모든 스레드가 공유한다. 두 객체 모두
+생성(HybridOptimizer는 initialize)을 마친 뒤에는 호출 중에 자기 상태를 바꾸지 않고,
+호출 사이에 공유되는 토큰 수·정제 결과 캐시와 인코딩 레지스트리는 잠금으로 보호된다.
+
+취소·시간 제한은 await 쪽에서 즉시 반영된다. 아직 시작하지 않은 작업은 풀에서 빠지고,
+이미 실행 중인 작업은 중단할 수 없어 끝날 때까지 슬롯을 차지한다.
+
+    async with AsyncPromptRefiner(max_concurrency=16) as refiner:
+        result = await refiner.refine(text, timeout=2.0)
+        results = await refiner.refine_many(texts, return_exceptions=True)
+"""
+
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Iterable
+
+from optimizer.hybrid_engine import HybridOptimizer, HybridResult
+from optimizer.refiner import PromptRefiner, RefinementResult
+from optimizer.result_cache import RefinementCache
+from optimizer.tokenizer import TokenCountCache
+
+
+# 동시에 실행되는 호출 수 기본 상한
+DEFAULT_MAX_CONCURRENCY = 32
+# executor 인자로 지정할 수 있는 풀 종류
+EXECUTOR_KINDS = ("thread", "process")
+
+
+class _AsyncRunner:
+    """풀·동시 실행 제한·시간 제한을 관리하는 공통 기반"""
+
+    def __init__(
+        self,
+        executor: str | Executor,
+        max_workers: int | None,
+        max_concurrency: int,
+        timeout: float | None,
+    ):
+        if isinstance(executor, str) and executor not in EXECUTOR_KINDS:
+            raise ValueError(
+                f"executor는 {', '.join(EXECUTOR_KINDS)} 중 하나이거나 Executor여야 합니다: {executor!r}"
+            )
+        if max_concurrency < 1:
+            raise ValueError(f"max_concurrency는 1 이상이어야 합니다: {max_concurrency}")
+        self.max_workers = max_workers
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self._kind = executor if isinstance(executor, str) else None
+        # 외부에서 받은 풀은 닫지 않는다
+        self._executor: Executor | None = None if isinstance(executor, str) else executor
+        self._owns_executor = isinstance(executor, str)
+        self._slots = asyncio.Semaphore(max_concurrency)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    async def aclose(self):
+        """직접 만든 풀을 닫는다. 대기 중인 작업은 취소하고 실행 중인 작업은 기다린다."""
+        executor, self._executor = self._executor, None
+        if executor is not None and self._owns_executor:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(
+                None, lambda: executor.shutdown(wait=True, cancel_futures=True)
+            )
+
+    def _make_executor(self) -> Executor:
+        raise NotImplementedError
+
+    def _pool(self) -> Executor:
+        if self._executor is None:
+            self._executor = self._make_executor()
+        return self._executor
+
+    async def _call(self, fn: Callable, *args, timeout: float | None = None) -> Any:
+        """
+        풀에서 fn(*args)를 실행하고 결과를 기다린다.
+
+        슬롯은 작업이 실제로 끝나거나 시작 전에 취소될 때 반납한다. 시간 제한으로
+        await가 먼저 끝나도 실행 중인 작업이 풀을 차지하는 동안은 슬롯을 잡고 있다.
+        """
+        loop = asyncio.get_running_loop()
+        await self._slots.acquire()
+        try:
+            future = self._pool().submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: loop.call_soon_threadsafe(self._slots.release))
+
+        limit = self.timeout if timeout is None else timeout
+        wrapped = asyncio.wrap_future(future, loop=loop)
+        if limit is None:
+            return await wrapped
+        return await asyncio.wait_for(wrapped, limit)
+
+    async def _map(
+        self,
+        items: Iterable,
+        make_job: Callable[[Any], tuple[Callable, tuple]],
+        timeout: float | None,
+        return_exceptions: bool,
+    ) -> list:
+        """
+        항목을 입력 순서대로 처리한다. 입력은 필요한 만큼만 읽는다 (동시 실행 상한 이상을
+        미리 꺼내지 않는다). return_exceptions가 False면 첫 예외에서 나머지를 취소한다.
+        """
+        results: dict[int, Any] = {}
+        pending = enumerate(items)
+
+        async def consume():
+            for index, item in pending:
+                fn, args = make_job(item)
+                try:
+                    results[index] = await self._call(fn, *args, timeout=timeout)
+                except Exception as exc:
+                    if not return_exceptions:
+                        raise
+                    results[index] = exc
+
+        consumers = [asyncio.create_task(consume()) for _ in range(self.max_concurrency)]
+        try:
+            await asyncio.gather(*consumers)
+        except BaseException:
+            for task in consumers:
+                task.cancel()
+            await asyncio.gather(*consumers, return_exceptions=True)
+            raise
+        return [results[i] for i in range(len(results))]
+
+
+class AsyncPromptRefiner(_AsyncRunner):
+    """PromptRefiner의 비동기 파사드"""
+
+    def __init__(
+        self,
+        model: str = "gpt-4o-mini",
+        *,
+        refiner: PromptRefiner | None = None,
+        executor: str | Executor = "thread",
+        max_workers: int | None = None,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        timeout: float | None = None,
+        token_cache: TokenCountCache | bool | None = None,
+        result_cache: RefinementCache | bool | None = None,
+    ):
+        """
+        Args:
+            model: 사용할 모델 이름
+            refiner: 스레드 모드에서 쓸 정제기 (None이면 새로 만든다)
+            executor: "thread"(기본), "process" 또는 직접 만든 Executor.
+                process면 워커마다 정제기를 한 번 만들고, 정제기·캐시 인자는 쓰지 않는다.
+                결과를 프로세스 간에 전달하므로 lazy 분석은 워커에서 실행된다.
+            max_workers: 직접 만드는 풀의 워커 수 (None이면 풀 기본값)
+            max_concurrency: 동시에 실행되는 호출 수 상한
+            timeout: 호출별 기본 시간 제한 (초, None이면 제한 없음)
+            token_cache: 새로 만드는 정제기의 토큰 수 캐시 (PromptRefiner와 동일)
+            result_cache: 새로 만드는 정제기의 정제 결과 캐시 (PromptRefiner와 동일)
+        """
+        super().__init__(executor, max_workers, max_concurrency, timeout)
+        self.model = model
+        self.refiner: PromptRefiner | None = None
+        if self._kind != "process":
+            self.refiner = refiner or PromptRefiner(
+                model=model, token_cache=token_cache, result_cache=result_cache,
+            )
+
+    def _make_executor(self) -> Executor:
+        if self._kind == "process":
+            from optimizer.parallel import init_worker
+
+            return ProcessPoolExecutor(max_workers=self.max_workers, initializer=init_worker,
+                                       initargs=(self.model,))
+        return ThreadPoolExecutor(max_workers=self.max_workers,
+                                  thread_name_prefix="promm-refine")
+
+    async def refine(self, text: str, *, timeout: float | None = None, **options) -> RefinementResult:
+        """
+        프롬프트를 정제한다 (PromptRefiner.refine과 같은 키워드 인자).
+
+        Raises:
+            TimeoutError: 시간 제한을 넘었을 때
+        """
+        fn, args = self._job(text, options)
+        return await self._call(fn, *args, timeout=timeout)
+
+    async def refine_many(
+        self,
+        texts: Iterable[str],
+        *,
+        timeout: float | None = None,
+        return_exceptions: bool = False,
+        **options,
+    ) -> list[RefinementResult | BaseException]:
+        """
+        여러 프롬프트를 동시 실행 상한 안에서 정제하고 입력 순서대로 반환한다.
+
+        Args:
+            timeout: 항목별 시간 제한 (초)
+            return_exceptions: True면 실패한 항목 자리에 예외 객체를 넣는다
+        """
+        return await self._map(
+            texts, lambda text: self._job(text, options), timeout, return_exceptions,
+        )
+
+    def _job(self, text: str, options: dict) -> tuple[Callable, tuple]:
+        """풀에 넘길 (함수, 인자)"""
+        if self._kind == "process":
+            from optimizer.parallel import run_in_worker
+
+            return run_in_worker, ("refine", text, options)
+        return self._refine_in_thread, (text, options)
+
+    def _refine_in_thread(self, text: str, options: dict) -> RefinementResult:
+        return self.refiner.refine(text, **options)
+
+
+class AsyncHybridOptimizer(_AsyncRunner):
+    """
+    HybridOptimizer의 비동기 파사드.
+
+    하이브리드 엔진은 학습 결과(프로파일, 지식 베이스)를 메모리에 들고 있으므로
+    프로세스 풀은 지원하지 않는다.
+    """
+
+    def __init__(
+        self,
+        model: str = "gpt-4o-mini",
+        *,
+        engine: HybridOptimizer | None = None,
+        executor: str | Executor = "thread",
+        max_workers: int | None = None,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        timeout: float | None = None,
+        token_cache: TokenCountCache | bool | None = None,
+    ):
+        """
+        Args:
+            model: 사용할 모델 이름
+            engine: 이미 초기화한 엔진 (None이면 새로 만들고 initialize()로 학습한다)
+            executor: "thread"(기본) 또는 직접 만든 스레드 기반 Executor
+            max_workers: 직접 만드는 스레드 풀의 워커 수
+            max_concurrency: 동시에 실행되는 호출 수 상한
+            timeout: 호출별 기본 시간 제한 (초, None이면 제한 없음)
+            token_cache: 새로 만드는 엔진의 토큰 수 캐시
+
+        Raises:
+            ValueError: executor가 "process"일 때
+        """
+        if executor == "process":
+            raise ValueError("AsyncHybridOptimizer는 프로세스 풀을 지원하지 않습니다.")
+        super().__init__(executor, max_workers, max_concurrency, timeout)
+        self.engine = engine or HybridOptimizer(model=model, token_cache=token_cache)
+
+    def _make_executor(self) -> Executor:
+        return ThreadPoolExecutor(max_workers=self.max_workers,
+                                  thread_name_prefix="promm-hybrid")
+
+    async def initialize(self, dataset: dict[str, list[str]], *, timeout: float | None = None):
+        """엔진을 학습한다 (HybridOptimizer.initialize)."""
+        await self._call(self.engine.initialize, dataset, timeout=timeout)
+
+    async def optimize(self, text: str, *, top_k: int = 3, timeout: float | None = None) -> HybridResult:
+        """
+        하이브리드 최적화를 수행한다 (HybridOptimizer.optimize).
+
+        Raises:
+            TimeoutError: 시간 제한을 넘었을 때
+        """
+        return await self._call(self.engine.optimize, text, top_k, timeout=timeout)
+
+    async def optimize_many(
+        self,
+        texts: Iterable[str],
+        *,
+        top_k: int = 3,
+        timeout: float | None = None,
+        return_exceptions: bool = False,
+    ) -> list[HybridResult | BaseException]:
+        """
+        여러 프롬프트를 동시 실행 상한 안에서 최적화하고 입력 순서대로 반환한다.
+
+        Args:
+            timeout: 항목별 시간 제한 (초)
+            return_exceptions: True면 실패한 항목 자리에 예외 객체를 넣는다
+        """
+        return await self._map(
+            texts, lambda text: (self.engine.optimize, (text, top_k)), timeout, return_exceptions,
+        )
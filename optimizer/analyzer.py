@@ -10,10 +10,17 @@
 3. 불필요 접속사/수식어
 4. 반복 강조 표현
 5. 불필요 지시 문구
+
+수 MB 이상의 문서는 표본 분석(analyze(sample=True))으로 일부 청크만 분석해
+카테고리별 건수와 낭비 비율을 신뢰 구간과 함께 추정할 수 있다.
 """
 
-import re
+import math
+import random
+import threading
+import weakref
 from dataclasses import dataclass, field
+from statistics import NormalDist
 
 from optimizer.tokenizer import TokenCounter
 from optimizer.rules.korean import (
@@ -22,6 +29,71 @@ from optimizer.rules.korean import (
     REPETITIVE_INSTRUCTION_PATTERNS,
     UNNECESSARY_INSTRUCTION_PATTERNS,
 )
+from optimizer.rules.scanner import RuleScanner
+
+
+# 분석 카테고리: (카테고리, 설명, 패턴 목록). 리포트에는 이 순서대로 담긴다.
+ANALYSIS_CATEGORIES = [
+    (
+        "중복 공백/줄바꿈",
+        "연속된 공백, 빈 줄, 탭 문자가 감지되었습니다.",
+        [r" {2,}", r"\n{3,}", r"\t+"],   # 연속 공백, 연속 줄바꿈, 탭 문자
+    ),
+    (
+        "과잉 공손 표현",
+        "불필요한 인사, 부탁, 겸양 표현이 감지되었습니다.",
+        [pattern for pattern, _ in POLITE_PATTERNS],
+    ),
+    (
+        "불필요 접속사/수식어",
+        "의미에 기여하지 않는 접속사나 수식어가 감지되었습니다.",
+        [pattern for pattern, _ in FILLER_PATTERNS],
+    ),
+    (
+        "반복 강조 표현",
+        "같은 의미를 중복하여 강조하는 표현이 감지되었습니다.",
+        [pattern for pattern, _ in REPETITIVE_INSTRUCTION_PATTERNS],
+    ),
+    (
+        "불필요 지시 문구",
+        "핵심 지시 없이 토큰만 차지하는 문구가 감지되었습니다.",
+        [pattern for pattern, _ in UNNECESSARY_INSTRUCTION_PATTERNS],
+    ),
+]
+
+# ─── 매칭 조각 토큰 수 표 ───
+# 규칙 매칭 조각은 종류가 적고 반복이 많으므로 인코딩별로 조각 → 토큰 수를 기록해 둔다.
+# 공백 반복 조각(로그처럼 공백 구간이 수천 개인 프롬프트)은 처음 쓸 때 한 번에 채운다.
+FRAGMENT_TABLE_MAX_ENTRIES = 8192
+FRAGMENT_TABLE_MAX_CHARS = 64      # 이보다 긴 조각은 표에 넣지 않는다
+_FRAGMENT_COSTS: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+_FRAGMENT_LOCK = threading.Lock()
+
+
+def _whitespace_runs() -> list[str]:
+    """분석 규칙(연속 공백 2+, 줄바꿈 3+, 탭 1+)이 만드는 짧은 공백 조각"""
+    return [
+        char * n
+        for char, low in ((" ", 2), ("\n", 3), ("\t", 1))
+        for n in range(low, FRAGMENT_TABLE_MAX_CHARS + 1)
+    ]
+
+
+# ─── 표본 분석 기본값 ───
+SAMPLE_CHUNK_CHARS = 8192          # 표본 단위(청크) 길이. 가능하면 줄바꿈에서 자른다
+SAMPLE_STRATA = 16                 # 층 수 (문서를 앞에서부터 같은 크기의 연속 구간으로 나눈다)
+SAMPLE_INITIAL_FRACTION = 0.02     # 처음 분석할 청크 비율
+SAMPLE_MIN_PER_STRATUM = 4         # 층마다 처음 분석할 최소 청크 수 (분산 추정 안정화)
+SAMPLE_MIN_CHUNKS = 64             # 청크가 이보다 적으면 표본 없이 전체를 분석한다
+SAMPLE_CONTEXT_CHARS = 256         # 청크 앞뒤로 함께 스캔하는 문맥 길이
+
+
+# 모든 카테고리의 패턴을 평가하는 스캐너 (모듈 로드 시 한 번만 컴파일)
+_SCANNER = RuleScanner([
+    (pattern, "", category)
+    for category, _, patterns in ANALYSIS_CATEGORIES
+    for pattern in patterns
+])
 
 
 @dataclass
@@ -41,6 +113,8 @@ class AnalysisReport:
     total_tokens: int
     patterns_found: list[PatternMatch] = field(default_factory=list)
     total_waste_estimate: int = 0
+    # 패턴 → 원문에서의 매칭 구간 (분석한 모든 패턴, 매칭이 없으면 빈 목록)
+    spans: dict[str, list[tuple[int, int]]] = field(default_factory=dict)
 
     @property
     def waste_rate(self) -> float:
@@ -50,135 +124,338 @@ class AnalysisReport:
         return self.total_waste_estimate / self.total_tokens
 
 
+@dataclass
+class CategoryEstimate:
+    """표본에서 외삽한 카테고리별 추정치와 신뢰 구간"""
+    category: str
+    count: float
+    count_low: float
+    count_high: float
+    waste: float
+    waste_low: float
+    waste_high: float
+
+
+@dataclass
+class SampledAnalysisReport(AnalysisReport):
+    """
+    표본 분석 리포트.
+    total_tokens, patterns_found의 count·estimated_waste, total_waste_estimate는
+    표본에서 외삽한 값이며 spans는 비어 있다.
+    """
+    sample_fraction: float = 1.0     # 분석한 청크 비율
+    chunks_total: int = 0
+    chunks_sampled: int = 0
+    confidence: float = 0.95
+    waste_rate_low: float = 0.0      # 낭비 비율 신뢰 구간
+    waste_rate_high: float = 0.0
+    estimates: list[CategoryEstimate] = field(default_factory=list)
+
+
 class PatternAnalyzer:
     """프롬프트 낭비 패턴 분석기"""
 
-    def __init__(self, model: str = "gpt-4o-mini"):
-        self.counter = TokenCounter(model=model)
+    def __init__(self, model: str = "gpt-4o-mini", counter: TokenCounter | None = None):
+        """
+        Args:
+            model: 사용할 모델 이름
+            counter: 공유할 TokenCounter. None이면 새로 생성한다.
+        """
+        self.counter = counter or TokenCounter(model=model)
 
-    def analyze(self, text: str) -> AnalysisReport:
+    def analyze(
+        self,
+        text: str,
+        *,
+        sample: bool = False,
+        precision: float = 0.01,
+        confidence: float = 0.95,
+        seed: int = 0,
+        chunk_chars: int = SAMPLE_CHUNK_CHARS,
+    ) -> AnalysisReport:
         """
         프롬프트를 분석하여 낭비 패턴 리포트를 생성한다.
+
+        Args:
+            text: 분석할 텍스트
+            sample: True면 층화 표본 분석으로 추정한다 (SampledAnalysisReport 반환)
+            precision: 표본 분석의 목표 정밀도. 낭비 비율 신뢰 구간의 반폭이
+                이 값 이하가 될 때까지 표본을 두 배씩 늘린다.
+            confidence: 신뢰 구간의 신뢰 수준 (0~1)
+            seed: 표본 추출 시드 (같은 시드면 같은 결과)
+            chunk_chars: 표본 단위 청크 길이
+        """
+        if sample:
+            return self._analyze_sampled(text, precision, confidence, seed, chunk_chars)
+
+        return self._build_report(text, text, _SCANNER.scan(text))
+
+    def _build_report(
+        self,
+        text: str,
+        scanned: str,
+        rule_spans: list[list[tuple[int, int]]],
+    ) -> AnalysisReport:
+        """
+        스캐너 결과로 리포트를 만든다.
+
+        Args:
+            text: 리포트 대상 텍스트 (토큰 수를 세는 텍스트)
+            scanned: 스캔한 텍스트 (rule_spans의 좌표 기준)
+            rule_spans: 스캐너 규칙 순서의 매칭 구간 목록
         """
-        total_tokens = self.counter.count(text)
         report = AnalysisReport(
             original_text=text,
-            total_tokens=total_tokens,
+            total_tokens=self.counter.count(text),
         )
 
-        # 각 패턴 분석 실행
-        checkers = [
-            self._check_whitespace,
-            self._check_polite,
-            self._check_fillers,
-            self._check_repetitive,
-            self._check_unnecessary,
-        ]
+        # 카테고리별로 모은다 (패턴 순서대로 이어 붙임)
+        found: dict[str, list[str]] = {}
+        for rule, spans in zip(_SCANNER.rules, rule_spans):
+            report.spans[rule.pattern] = spans
+            found.setdefault(rule.category, []).extend(scanned[s:e] for s, e in spans)
 
-        for checker in checkers:
-            match = checker(text)
-            if match and match.count > 0:
-                report.patterns_found.append(match)
-                report.total_waste_estimate += match.estimated_waste
+        # 모든 카테고리의 조각 토큰 수를 한 번에 구한다
+        costs = self._fragment_costs([m for matches in found.values() for m in matches])
+
+        for category, description, _ in ANALYSIS_CATEGORIES:
+            all_matches = found[category]
+            if not all_matches:
+                continue
+            match = PatternMatch(
+                category=category,
+                description=description,
+                matches=all_matches[:5],  # 최대 5개만 표시
+                count=len(all_matches),
+                estimated_waste=sum(costs[m] for m in all_matches),
+            )
+            report.patterns_found.append(match)
+            report.total_waste_estimate += match.estimated_waste
 
         return report
 
-    def _estimate_tokens(self, texts: list[str]) -> int:
-        """텍스트 목록의 총 토큰 수를 추정한다."""
-        total = 0
-        for t in texts:
-            total += self.counter.count(t)
-        return total
-
-    def _check_whitespace(self, text: str) -> PatternMatch | None:
-        """패턴 1: 중복 공백/줄바꿈 검사"""
-        # 연속 공백
-        multi_spaces = re.findall(r" {2,}", text)
-        # 연속 줄바꿈
-        multi_newlines = re.findall(r"\n{3,}", text)
-        # 탭 문자
-        tabs = re.findall(r"\t+", text)
-
-        all_matches = multi_spaces + multi_newlines + tabs
-        if not all_matches:
-            return None
-
-        return PatternMatch(
-            category="중복 공백/줄바꿈",
-            description="연속된 공백, 빈 줄, 탭 문자가 감지되었습니다.",
-            matches=all_matches[:5],  # 최대 5개만 표시
-            count=len(all_matches),
-            estimated_waste=self._estimate_tokens(all_matches),
-        )
+    def _analyze_sampled(
+        self,
+        text: str,
+        precision: float,
+        confidence: float,
+        seed: int,
+        chunk_chars: int,
+    ) -> SampledAnalysisReport:
+        """
+        층화 표본 분석.
 
-    def _check_polite(self, text: str) -> PatternMatch | None:
-        """패턴 2: 과잉 공손 표현 검사"""
-        all_matches = []
-        for pattern, _ in POLITE_PATTERNS:
-            found = re.findall(pattern, text)
-            all_matches.extend(found)
-
-        if not all_matches:
-            return None
-
-        return PatternMatch(
-            category="과잉 공손 표현",
-            description="불필요한 인사, 부탁, 겸양 표현이 감지되었습니다.",
-            matches=all_matches[:5],
-            count=len(all_matches),
-            estimated_waste=self._estimate_tokens(all_matches),
-        )
+        문서를 청크로 나누고, 청크를 문서 위치 순서대로 SAMPLE_STRATA개 층으로 묶어
+        층마다 같은 비율로 비복원 추출한다. 카테고리별 건수·낭비 토큰과 전체 토큰 수는
+        층화 총계 추정량으로, 낭비 비율은 비율 추정량으로 외삽한다.
+        """
+        bounds = _chunk_bounds(text, chunk_chars)
+        z = NormalDist().inv_cdf(0.5 + confidence / 2)
+        if len(bounds) < SAMPLE_MIN_CHUNKS:
+            return _as_sampled(self.analyze(text), len(bounds), confidence)
 
-    def _check_fillers(self, text: str) -> PatternMatch | None:
-        """패턴 3: 불필요 접속사/수식어 검사"""
-        all_matches = []
-        for pattern, _ in FILLER_PATTERNS:
-            found = re.findall(pattern, text)
-            all_matches.extend(found)
-
-        if not all_matches:
-            return None
-
-        return PatternMatch(
-            category="불필요 접속사/수식어",
-            description="의미에 기여하지 않는 접속사나 수식어가 감지되었습니다.",
-            matches=all_matches[:5],
-            count=len(all_matches),
-            estimated_waste=self._estimate_tokens(all_matches),
-        )
+        rng = random.Random(seed)
+        strata_count = min(SAMPLE_STRATA, len(bounds) // SAMPLE_MIN_PER_STRATUM)
+        strata = []
+        for h in range(strata_count):
+            members = list(range(h * len(bounds) // strata_count, (h + 1) * len(bounds) // strata_count))
+            rng.shuffle(members)
+            strata.append(members)
+        sizes = [
+            min(len(s), max(SAMPLE_MIN_PER_STRATUM, math.ceil(len(s) * SAMPLE_INITIAL_FRACTION)))
+            for s in strata
+        ]
 
-    def _check_repetitive(self, text: str) -> PatternMatch | None:
-        """패턴 4: 반복 강조 표현 검사"""
-        all_matches = []
-        for pattern, _ in REPETITIVE_INSTRUCTION_PATTERNS:
-            found = re.findall(pattern, text)
-            all_matches.extend(found)
-
-        if not all_matches:
-            return None
-
-        return PatternMatch(
-            category="반복 강조 표현",
-            description="같은 의미를 중복하여 강조하는 표현이 감지되었습니다.",
-            matches=all_matches[:5],
-            count=len(all_matches),
-            estimated_waste=self._estimate_tokens(all_matches),
-        )
+        reports: dict[int, AnalysisReport] = {}
+        while True:
+            for stratum, size in zip(strata, sizes):
+                for i in stratum[:size]:
+                    if i not in reports:
+                        reports[i] = self._analyze_chunk(text, *bounds[i])
+            samples = [[reports[i] for i in stratum[:size]] for stratum, size in zip(strata, sizes)]
+            populations = [len(s) for s in strata]
+            rate, rate_half = _ratio_estimate(
+                samples, populations, lambda r: r.total_waste_estimate, lambda r: r.total_tokens, z,
+            )
+            if rate_half <= precision or sizes == populations:
+                break
+            sizes = [min(len(s), size * 2) for s, size in zip(strata, sizes)]
 
-    def _check_unnecessary(self, text: str) -> PatternMatch | None:
-        """패턴 5: 불필요 지시 문구 검사"""
-        all_matches = []
-        for pattern, _ in UNNECESSARY_INSTRUCTION_PATTERNS:
-            found = re.findall(pattern, text)
-            all_matches.extend(found)
-
-        if not all_matches:
-            return None
-
-        return PatternMatch(
-            category="불필요 지시 문구",
-            description="핵심 지시 없이 토큰만 차지하는 문구가 감지되었습니다.",
-            matches=all_matches[:5],
-            count=len(all_matches),
-            estimated_waste=self._estimate_tokens(all_matches),
+        tokens, _ = _total_estimate(samples, populations, lambda r: r.total_tokens, z)
+        report = SampledAnalysisReport(
+            original_text=text,
+            total_tokens=round(tokens),
+            sample_fraction=round(sum(sizes) / len(bounds), 4),
+            chunks_total=len(bounds),
+            chunks_sampled=sum(sizes),
+            confidence=confidence,
+            waste_rate_low=max(0.0, rate - rate_half),
+            waste_rate_high=rate + rate_half,
         )
+
+        # 표본 청크를 문서 순서대로 모아 카테고리별 예시를 만든다
+        sampled = [reports[i] for i in sorted(reports)]
+        for category, description, _ in ANALYSIS_CATEGORIES:
+            def count(r, category=category):
+                return next((p.count for p in r.patterns_found if p.category == category), 0)
+
+            def waste(r, category=category):
+                return next((p.estimated_waste for p in r.patterns_found if p.category == category), 0)
+
+            count_total, count_half = _total_estimate(samples, populations, count, z)
+            waste_total, waste_half = _total_estimate(samples, populations, waste, z)
+            if count_total <= 0:
+                continue
+            report.estimates.append(CategoryEstimate(
+                category=category,
+                count=count_total,
+                count_low=max(0.0, count_total - count_half),
+                count_high=count_total + count_half,
+                waste=waste_total,
+                waste_low=max(0.0, waste_total - waste_half),
+                waste_high=waste_total + waste_half,
+            ))
+            examples = [m for r in sampled for p in r.patterns_found if p.category == category for m in p.matches]
+            report.patterns_found.append(PatternMatch(
+                category=category,
+                description=description,
+                matches=examples[:5],
+                count=round(count_total),
+                estimated_waste=round(waste_total),
+            ))
+            report.total_waste_estimate += round(waste_total)
+        return report
+
+    def _analyze_chunk(self, text: str, start: int, end: int) -> AnalysisReport:
+        """
+        text[start:end] 청크를 문맥과 함께 분석한다.
+
+        청크만 잘라 스캔하면 청크 끝마다 `$` 규칙이 매칭되고 경계에 걸친 매칭이
+        두 번 세어지므로, 앞뒤로 SAMPLE_CONTEXT_CHARS만큼 넓힌 창을 스캔해
+        청크 안에서 시작하는 매칭만 남긴다. 청크 안에서 시작한 매칭이 잘린 창 끝에
+        닿으면(`$`는 끝의 줄바꿈 앞에서도 매칭된다) 다음 청크도 세지 않으므로,
+        매칭이 창 안에서 끝날 때까지 창을 두 배씩 넓혀 다시 스캔한다.
+        """
+        lo = max(0, start - SAMPLE_CONTEXT_CHARS)
+        hi = min(len(text), end + SAMPLE_CONTEXT_CHARS)
+        first, limit = start - lo, end - lo
+        while True:
+            window = text[lo:hi]
+            scanned = _SCANNER.scan(window)
+            if hi == len(text):
+                break
+            edge = len(window) - 2
+            if not any(first <= s < limit and e > edge for spans in scanned for s, e in spans):
+                break
+            hi = min(len(text), hi + (hi - lo))
+        rule_spans = [
+            [(s - first, e - first) for s, e in spans if first <= s < limit]
+            for spans in scanned
+        ]
+        return self._build_report(text[start:end], window[first:], rule_spans)
+
+    def _fragment_costs(self, fragments: list[str]) -> dict[str, int]:
+        """
+        매칭 조각별 토큰 수. 같은 조각은 한 번만 세고, 토큰 수 표에 없는 조각만
+        모아서 한 번에 인코딩한다.
+        """
+        if not fragments:
+            return {}
+        table = self._cost_table()
+        costs = {}
+        missing = []
+        for fragment in set(fragments):
+            count = table.get(fragment)
+            if count is None:
+                missing.append(fragment)
+            else:
+                costs[fragment] = count
+        if missing:
+            fresh = dict(zip(missing, self.counter.count_fragments(missing)))
+            costs.update(fresh)
+            if len(table) < FRAGMENT_TABLE_MAX_ENTRIES:
+                with _FRAGMENT_LOCK:
+                    table.update(
+                        (f, c) for f, c in fresh.items() if len(f) <= FRAGMENT_TABLE_MAX_CHARS
+                    )
+        return costs
+
+    def _cost_table(self) -> dict[str, int]:
+        """현재 인코딩의 조각 토큰 수 표 (처음 쓸 때 공백 조각으로 채운다)"""
+        encoding = self.counter.encoding
+        table = _FRAGMENT_COSTS.get(encoding)
+        if table is None:
+            runs = _whitespace_runs()
+            seeded = dict(zip(runs, self.counter.count_fragments(runs)))
+            with _FRAGMENT_LOCK:
+                table = _FRAGMENT_COSTS.setdefault(encoding, seeded)
+        return table
+
+
+def _chunk_bounds(text: str, chunk_chars: int) -> list[tuple[int, int]]:
+    """텍스트를 약 chunk_chars 길이의 청크 (start, end) 목록으로 나눈다 (가능하면 줄 끝에서)."""
+    bounds = []
+    start = 0
+    while start < len(text):
+        end = min(len(text), start + chunk_chars)
+        if end < len(text):
+            cut = text.rfind("\n", start + chunk_chars // 2, end)
+            if cut != -1:
+                end = cut + 1
+        bounds.append((start, end))
+        start = end
+    return bounds
+
+
+def _total_estimate(samples, populations, value, z: float) -> tuple[float, float]:
+    """
+    층화 총계 추정량 Σ N_h·ȳ_h 와 신뢰 구간 반폭.
+    분산: Σ N_h²·(1 - n_h/N_h)·s_h²/n_h
+    """
+    total = 0.0
+    variance = 0.0
+    for sample, population in zip(samples, populations):
+        values = [value(r) for r in sample]
+        n = len(values)
+        mean = sum(values) / n
+        total += population * mean
+        if 1 < n < population:
+            s2 = sum((v - mean) ** 2 for v in values) / (n - 1)
+            variance += population ** 2 * (1 - n / population) * s2 / n
+    return total, z * math.sqrt(variance)
+
+
+def _ratio_estimate(samples, populations, numerator, denominator, z: float) -> tuple[float, float]:
+    """
+    층화 비율 추정량 Ŷ/X̂ 와 신뢰 구간 반폭 (선형화 분산: d = y - R̂·x의 총계 분산 / X̂²).
+    """
+    y_total, _ = _total_estimate(samples, populations, numerator, z)
+    x_total, _ = _total_estimate(samples, populations, denominator, z)
+    if x_total <= 0:
+        return 0.0, 0.0
+    ratio = y_total / x_total
+    _, d_half = _total_estimate(
+        samples, populations, lambda r: numerator(r) - ratio * denominator(r), z,
+    )
+    return ratio, d_half / x_total
+
+
+def _as_sampled(report: AnalysisReport, chunks: int, confidence: float) -> SampledAnalysisReport:
+    """전체 분석 결과를 표본 비율 1인 표본 리포트로 바꾼다 (신뢰 구간 폭 0)."""
+    return SampledAnalysisReport(
+        original_text=report.original_text,
+        total_tokens=report.total_tokens,
+        patterns_found=report.patterns_found,
+        total_waste_estimate=report.total_waste_estimate,
+        spans=report.spans,
+        chunks_total=chunks,
+        chunks_sampled=chunks,
+        confidence=confidence,
+        waste_rate_low=report.waste_rate,
+        waste_rate_high=report.waste_rate,
+        estimates=[
+            CategoryEstimate(p.category, p.count, p.count, p.count,
+                             p.estimated_waste, p.estimated_waste, p.estimated_waste)
+            for p in report.patterns_found
+        ],
+    )
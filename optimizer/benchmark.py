@@ -432,7 +432,7 @@ class HybridBenchmarkRunner:
                 prompt_id += 1
 
                 # 규칙 기반
-                rb_result = self.refiner.refine(prompt)
+                rb_result = self.refiner.refine(prompt, analysis="off")
                 original_tokens = rb_result.original_tokens
 
                 # 하이브리드
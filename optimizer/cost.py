@@ -7,7 +7,7 @@ API 비용 계산기
 
 from dataclasses import dataclass
 
-from optimizer.tokenizer import TokenCounter
+from optimizer.tokenizer import TokenCounter, TokenCountCache
 
 
 # 모델별 토큰 단가 (USD per 1M tokens)
@@ -56,9 +56,13 @@ class CostReport:
 class CostCalculator:
     """LLM API 비용 계산기"""
 
-    def __init__(self, model: str = "gpt-4o-mini"):
+    def __init__(
+        self,
+        model: str = "gpt-4o-mini",
+        token_cache: TokenCountCache | bool | None = None,
+    ):
         self.model = model
-        self.counter = TokenCounter(model=model)
+        self.counter = TokenCounter(model=model, cache=token_cache)
         self.pricing = MODEL_PRICING.get(model, MODEL_PRICING["gpt-4o-mini"])
 
     @staticmethod
@@ -79,7 +83,11 @@ class CostCalculator:
             tokens: 토큰 수
             direction: "input" 또는 "output"
         """
-        price_per_1m = self.pricing.get(direction, self.pricing["input"])
+        return self._cost(tokens, self.pricing, direction)
+
+    @staticmethod
+    def _cost(tokens: int, pricing: dict, direction: str = "input") -> float:
+        price_per_1m = pricing.get(direction, pricing["input"])
         return (tokens / 1_000_000) * price_per_1m
 
     def compare(
@@ -98,10 +106,57 @@ class CostCalculator:
         """
         orig_tokens = self.counter.count(original)
         opt_tokens = self.counter.count(optimized)
+        return self._build_report(self.model, self.pricing, orig_tokens, opt_tokens, daily_calls)
+
+    def compare_models(
+        self,
+        original: str,
+        optimized: str,
+        daily_calls: int = 100,
+        models: list[str] | None = None,
+    ) -> list[CostReport]:
+        """
+        여러 모델 기준으로 최적화 전후 비용을 한 번에 비교한다.
+
+        토큰 수는 TokenCounter.count_models로 인코딩별 한 번씩만 계산한다.
+
+        Args:
+            original: 원본 프롬프트
+            optimized: 최적화된 프롬프트
+            daily_calls: 하루 평균 호출 횟수
+            models: 비교할 모델 목록. None이면 MODEL_PRICING의 전체 모델.
+
+        Returns:
+            list[CostReport]: 모델별 비용 리포트 (models 순서)
+        """
+        if models is None:
+            models = list(MODEL_PRICING)
+        orig_counts = self.counter.count_models(original, models)
+        opt_counts = self.counter.count_models(optimized, models)
+        return [
+            self._build_report(
+                model,
+                MODEL_PRICING.get(model, MODEL_PRICING["gpt-4o-mini"]),
+                orig_counts[model],
+                opt_counts[model],
+                daily_calls,
+            )
+            for model in models
+        ]
+
+    def _build_report(
+        self,
+        model: str,
+        pricing: dict,
+        orig_tokens: int,
+        opt_tokens: int,
+        daily_calls: int,
+    ) -> CostReport:
+        """토큰 수와 단가로 비용 리포트를 만든다."""
         saved_tokens = orig_tokens - opt_tokens
 
-        orig_cost = self.calculate_cost(orig_tokens)
-        opt_cost = self.calculate_cost(opt_tokens)
+        orig_cost = self._cost(orig_tokens, pricing)
+        opt_cost = self._cost(opt_tokens, pricing)
         saved_cost = orig_cost - opt_cost
 
         # 월간/연간 추정
@@ -109,7 +164,7 @@ class CostCalculator:
         yearly_savings = saved_cost * daily_calls * 365
 
         return CostReport(
-            model=self.model,
+            model=model,
             original_tokens=orig_tokens,
             optimized_tokens=opt_tokens,
             saved_tokens=saved_tokens,
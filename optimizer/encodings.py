@@ -0,0 +1,203 @@
+"""
+오프라인 인코딩 로더
+===================
+네트워크 없이 로컬 디렉터리의 BPE 랭크 파일로 tiktoken 인코딩을 생성한다.
+
+디렉터리는 `PROMM_TIKTOKEN_DIR` 환경 변수나 인자로 지정하며, 다음 파일을 찾는다.
+  - `<인코딩 이름>.tiktoken` (배포용으로 함께 묶은 파일)
+  - tiktoken 캐시 파일명(원본 URL의 SHA-1) — TIKTOKEN_CACHE_DIR를 그대로 복사한 경우
+
+텍스트 형식(base64 + 랭크)은 처음 한 번만 파싱하고, 결과를 marshal 바이너리로
+같은 디렉터리에 저장해 이후에는 파일 크기·수정 시각만 확인하고 바로 읽는다.
+"""
+
+import base64
+import hashlib
+import marshal
+import os
+import time
+from dataclasses import dataclass
+
+import tiktoken
+
+
+# 로컬 랭크 파일 디렉터리를 지정하는 환경 변수
+ENCODING_DIR_ENV = "PROMM_TIKTOKEN_DIR"
+
+# 바이너리 캐시 형식 버전 (형식이 바뀌면 올린다)
+_BINARY_VERSION = 1
+
+_ENDOFTEXT = "<|endoftext|>"
+_FIM_PREFIX = "<|fim_prefix|>"
+_FIM_MIDDLE = "<|fim_middle|>"
+_FIM_SUFFIX = "<|fim_suffix|>"
+_ENDOFPROMPT = "<|endofprompt|>"
+
+# tiktoken_ext.openai_public과 동일한 인코딩 정의
+ENCODING_SPECS = {
+    "o200k_base": {
+        "url": "https://openaipublic.blob.core.windows.net/encodings/o200k_base.tiktoken",
+        "sha256": "446a9538cb6c348e3516120d7c08b09f57c36495e2acfffe59a5bf8b0cfb1a2d",
+        "pat_str": "|".join([
+            r"""[^\r\n\p{L}\p{N}]?[\p{Lu}\p{Lt}\p{Lm}\p{Lo}\p{M}]*[\p{Ll}\p{Lm}\p{Lo}\p{M}]+(?i:'s|'t|'re|'ve|'m|'ll|'d)?""",
+            r"""[^\r\n\p{L}\p{N}]?[\p{Lu}\p{Lt}\p{Lm}\p{Lo}\p{M}]+[\p{Ll}\p{Lm}\p{Lo}\p{M}]*(?i:'s|'t|'re|'ve|'m|'ll|'d)?""",
+            r"""\p{N}{1,3}""",
+            r""" ?[^\s\p{L}\p{N}]+[\r\n/]*""",
+            r"""\s*[\r\n]+""",
+            r"""\s+(?!\S)""",
+            r"""\s+""",
+        ]),
+        "special_tokens": {_ENDOFTEXT: 199999, _ENDOFPROMPT: 200018},
+    },
+    "cl100k_base": {
+        "url": "https://openaipublic.blob.core.windows.net/encodings/cl100k_base.tiktoken",
+        "sha256": "223921b76ee99bde995b7ff738513eef100fb51d18c93597a113bcffe865b2a7",
+        "pat_str": r"""'(?i:[sdmt]|ll|ve|re)|[^\r\n\p{L}\p{N}]?+\p{L}++|\p{N}{1,3}+| ?[^\s\p{L}\p{N}]++[\r\n]*+|\s++$|\s*[\r\n]|\s+(?!\S)|\s""",
+        "special_tokens": {
+            _ENDOFTEXT: 100257,
+            _FIM_PREFIX: 100258,
+            _FIM_MIDDLE: 100259,
+            _FIM_SUFFIX: 100260,
+            _ENDOFPROMPT: 100276,
+        },
+    },
+}
+
+
+@dataclass
+class EncodingLoad:
+    """오프라인 로드 결과"""
+    encoding: tiktoken.Encoding
+    source: str            # 랭크 파일 경로
+    binary_cache: bool     # 바이너리 캐시에서 읽었는지 여부
+    seconds: float         # 파일 읽기부터 인코딩 생성까지 걸린 시간
+
+
+def encoding_dir(directory: str | None = None) -> str | None:
+    """인자로 받은 디렉터리, 없으면 PROMM_TIKTOKEN_DIR 환경 변수 값을 반환한다."""
+    return directory or os.environ.get(ENCODING_DIR_ENV) or None
+
+
+def find_rank_file(encoding_name: str, directory: str) -> str | None:
+    """디렉터리에서 인코딩의 랭크 파일을 찾는다. 없으면 None."""
+    spec = ENCODING_SPECS[encoding_name]
+    candidates = [
+        f"{encoding_name}.tiktoken",
+        hashlib.sha1(spec["url"].encode()).hexdigest(),  # tiktoken 캐시 파일명
+    ]
+    for name in candidates:
+        path = os.path.join(directory, name)
+        if os.path.isfile(path):
+            return path
+    return None
+
+
+def load_encoding(
+    encoding_name: str,
+    directory: str,
+    verify_hash: bool = True,
+) -> EncodingLoad:
+    """
+    로컬 랭크 파일로 인코딩을 생성한다. 네트워크에 접근하지 않는다.
+
+    Args:
+        encoding_name: ENCODING_SPECS에 정의된 인코딩 이름
+        directory: 랭크 파일 디렉터리
+        verify_hash: 랭크 파일의 SHA-256을 공개 배포본과 대조할지 여부
+            (바이너리 캐시에는 원본 해시가 기록되어 있어 다시 계산하지 않는다)
+
+    Raises:
+        KeyError: 정의되지 않은 인코딩 이름
+        FileNotFoundError: 디렉터리에 랭크 파일이 없을 때
+        ValueError: 해시가 일치하지 않을 때
+    """
+    spec = ENCODING_SPECS[encoding_name]
+    path = find_rank_file(encoding_name, directory)
+    if path is None:
+        raise FileNotFoundError(
+            f"{directory}에서 {encoding_name} 랭크 파일을 찾을 수 없습니다 "
+            f"({encoding_name}.tiktoken)."
+        )
+
+    start = time.perf_counter()
+    ranks, digest, from_binary = _load_ranks(path)
+    if verify_hash and digest != spec["sha256"]:
+        raise ValueError(
+            f"{path}의 해시가 {encoding_name} 배포본과 다릅니다 "
+            f"(예상 {spec['sha256']}, 실제 {digest})."
+        )
+
+    encoding = tiktoken.Encoding(
+        name=encoding_name,
+        pat_str=spec["pat_str"],
+        mergeable_ranks=ranks,
+        special_tokens=spec["special_tokens"],
+    )
+    return EncodingLoad(
+        encoding=encoding,
+        source=path,
+        binary_cache=from_binary,
+        seconds=time.perf_counter() - start,
+    )
+
+
+def prepare_encodings(directory: str) -> dict[str, str]:
+    """
+    디렉터리의 랭크 파일을 모두 바이너리로 미리 변환한다 (이미지 빌드 단계용).
+
+    Returns:
+        dict: {인코딩 이름: 바이너리 캐시 경로}
+    """
+    prepared = {}
+    for name in ENCODING_SPECS:
+        path = find_rank_file(name, directory)
+        if path is not None:
+            _load_ranks(path)
+            prepared[name] = _binary_path(path)
+    return prepared
+
+
+def _binary_path(path: str) -> str:
+    return path + ".marshal"
+
+
+def _load_ranks(path: str) -> tuple[dict[bytes, int], str, bool]:
+    """
+    랭크 파일을 읽는다. 원본 크기·수정 시각이 같은 바이너리 캐시가 있으면 그것을 쓴다.
+
+    Returns:
+        (랭크 딕셔너리, 원본 SHA-256, 바이너리 캐시 사용 여부)
+    """
+    stat = os.stat(path)
+    binary = _binary_path(path)
+    try:
+        # marshal.load(파일)은 작은 읽기를 반복하므로 한 번에 읽은 뒤 loads를 쓴다
+        with open(binary, "rb") as f:
+            version, size, mtime_ns, digest, ranks = marshal.loads(f.read())
+        if (version, size, mtime_ns) == (_BINARY_VERSION, stat.st_size, stat.st_mtime_ns):
+            return ranks, digest, True
+    except (OSError, EOFError, ValueError, TypeError):
+        pass
+
+    with open(path, "rb") as f:
+        data = f.read()
+    digest = hashlib.sha256(data).hexdigest()
+    ranks = {}
+    for line in data.splitlines():
+        if not line:
+            continue
+        token, rank = line.split()
+        ranks[base64.b64decode(token)] = int(rank)
+
+    # 읽기 전용 디렉터리면 캐시 없이 진행한다
+    tmp = f"{binary}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, "wb") as f:
+            f.write(marshal.dumps((_BINARY_VERSION, stat.st_size, stat.st_mtime_ns, digest, ranks)))
+        os.replace(tmp, binary)
+    except OSError:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+    return ranks, digest, False
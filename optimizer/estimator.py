@@ -0,0 +1,218 @@
+"""
+토큰 수 추정 모듈
+================
+정확한 BPE 인코딩 없이 문자 종류별 통계로 토큰 수를 빠르게 추정한다.
+
+인코딩별로 코퍼스(기본값: BENCHMARK_DATASET)에서 선형 모델을 보정(calibration)하고,
+보정 시 관측한 오차로 신뢰 구간을 함께 제공한다.
+입장 제어(admission control)나 예산 점검처럼 정확한 값이 필요 없는 곳에 사용한다.
+"""
+
+import string
+import threading
+from dataclasses import dataclass
+
+
+# ─── 특징(feature) 정의 ───
+# UTF-8 바이트를 bytes.translate 한 번으로 문자 종류 코드로 바꾼 뒤
+# bytes.count만으로 특징을 계산한다 (정규식·파이썬 루프 없음).
+#   h: 한글 영역 선두 바이트(U+A000~U+DFFF, 한글 음절 포함), a: 영문자, d: 숫자,
+#   s: 공백, p: ASCII 기호, o: 그 외 다중 바이트 문자의 선두 바이트, c: 연속 바이트
+def _build_class_table() -> bytes:
+    table = bytearray(b"c" * 256)
+    for b in range(0x80):
+        ch = chr(b)
+        if ch in string.ascii_letters:
+            table[b] = ord("a")
+        elif ch in string.digits:
+            table[b] = ord("d")
+        elif ch in string.whitespace:
+            table[b] = ord("s")
+        else:
+            table[b] = ord("p")
+    for b in range(0xC0, 0x100):
+        table[b] = ord("o")
+    for b in range(0xEA, 0xEE):
+        table[b] = ord("h")
+    return bytes(table)
+
+
+_CLASS_TABLE = _build_class_table()
+
+# (이름, 사전 가중치). 사전 가중치는 보정 데이터에 해당 문자 종류가 없을 때
+# 추정값이 0으로 무너지지 않도록 하는 릿지(ridge) 회귀의 기준점이다.
+FEATURES = [
+    ("hangul", 1.0),          # 한글 음절 수
+    ("ascii_letters", 0.05),  # 영문자 수
+    ("ascii_words", 1.0),     # 공백·기호 뒤에서 시작하는 영문 단어 수
+    ("digits", 0.34),         # 숫자 수 (최대 3자리씩 토큰화)
+    ("whitespace", 0.3),      # 공백 문자 수
+    ("symbols", 1.0),         # ASCII 기호 수
+    ("other", 1.5),           # 그 외 문자 수 (한자·이모지 등)
+]
+
+# 릿지 정규화 강도
+_RIDGE = 1.0
+
+
+@dataclass
+class TokenEstimate:
+    """토큰 수 추정 결과"""
+    estimate: int
+    low: int               # 신뢰 구간 하한
+    high: int              # 신뢰 구간 상한
+    exact: bool = False    # 정확한 값으로 대체되었는지 여부
+
+
+@dataclass
+class CalibrationReport:
+    """인코딩별 추정 모델 보정 결과"""
+    encoding_name: str
+    weights: dict[str, float]
+    samples: int
+    coverage: float              # 목표 신뢰 수준
+    rel_error: float             # 목표 신뢰 수준에서의 상대 오차 한계
+    abs_error: float             # 짧은 텍스트용 절대 오차 한계 (토큰)
+    mean_abs_error: float
+    mean_rel_error: float
+    max_rel_error: float
+    observed_coverage: float     # 보정 데이터에서 구간이 실제 값을 포함한 비율
+
+
+# 인코딩 이름 → 보정 결과
+_CALIBRATIONS: dict[str, CalibrationReport] = {}
+_LOCK = threading.Lock()
+
+
+def extract_features(text: str) -> list[float]:
+    """텍스트에서 문자 종류별 출현 수를 추출한다 (FEATURES 순서)."""
+    classes = text.encode("utf-8", "surrogatepass").translate(_CLASS_TABLE)
+    hangul = classes.count(b"h")
+    letters = classes.count(b"a")
+    words = classes.count(b"sa") + classes.count(b"pa") + classes.startswith(b"a")
+    other = classes.count(b"o")
+    digits = classes.count(b"d")
+    spaces = classes.count(b"s")
+    symbols = classes.count(b"p")
+    return [float(hangul), float(letters), float(words), float(digits),
+            float(spaces), float(symbols), float(other)]
+
+
+def get_calibration(encoding_name: str) -> CalibrationReport | None:
+    """저장된 보정 결과를 반환한다."""
+    return _CALIBRATIONS.get(encoding_name)
+
+
+def set_calibration(report: CalibrationReport):
+    """보정 결과를 저장한다. 같은 인코딩의 이전 보정은 대체된다."""
+    with _LOCK:
+        _CALIBRATIONS[report.encoding_name] = report
+
+
+def calibrate(counter, corpus: list[str], coverage: float = 0.95) -> CalibrationReport:
+    """
+    코퍼스의 정확한 토큰 수로 추정 모델을 보정하고 오차를 보고한다.
+
+    Args:
+        counter: 정확한 토큰 수를 계산할 TokenCounter
+        corpus: 보정용 텍스트 목록
+        coverage: 신뢰 구간의 목표 포함 비율 (0~1)
+    """
+    texts = [t for t in corpus if t]
+    if not texts:
+        raise ValueError("보정에 사용할 텍스트가 없습니다.")
+
+    exact = counter.count_many(texts)
+    rows = [extract_features(t) for t in texts]
+    weights = _fit_ridge(rows, exact, [prior for _, prior in FEATURES])
+
+    estimates = [_predict(weights, row) for row in rows]
+    residuals = [round(e) - y for e, y in zip(estimates, exact)]
+    abs_errors = sorted(abs(r) for r in residuals)
+    rel_errors = sorted(abs(r) / max(y, 1) for r, y in zip(residuals, exact))
+
+    rel_bound = _quantile(rel_errors, coverage)
+    abs_bound = max(1.0, _quantile(abs_errors, coverage))
+    covered = 0
+    for value, y in zip(estimates, exact):
+        low, high = _interval(value, rel_bound, abs_bound)
+        covered += low <= y <= high
+
+    report = CalibrationReport(
+        encoding_name=counter.encoding_name,
+        weights={name: round(w, 6) for (name, _), w in zip(FEATURES, weights)},
+        samples=len(texts),
+        coverage=coverage,
+        rel_error=round(rel_bound, 4),
+        abs_error=round(abs_bound, 2),
+        mean_abs_error=round(sum(abs_errors) / len(abs_errors), 4),
+        mean_rel_error=round(sum(rel_errors) / len(rel_errors), 4),
+        max_rel_error=round(rel_errors[-1], 4),
+        observed_coverage=round(covered / len(texts), 4),
+    )
+    set_calibration(report)
+    return report
+
+
+def estimate(text: str, report: CalibrationReport) -> TokenEstimate:
+    """보정 결과로 토큰 수와 신뢰 구간을 추정한다."""
+    if not text:
+        return TokenEstimate(estimate=0, low=0, high=0)
+    weights = [report.weights[name] for name, _ in FEATURES]
+    value = max(_predict(weights, extract_features(text)), 1.0)
+    low, high = _interval(value, report.rel_error, report.abs_error)
+    return TokenEstimate(estimate=round(value), low=low, high=high)
+
+
+def _interval(value: float, rel_error: float, abs_error: float) -> tuple[int, int]:
+    """추정값 주변의 신뢰 구간 (정수)"""
+    margin = max(abs_error, rel_error * value)
+    return max(0, int(value - margin)), int(value + margin + 0.999999)
+
+
+def _predict(weights: list[float], row: list[float]) -> float:
+    return sum(w * x for w, x in zip(weights, row))
+
+
+def _quantile(sorted_values: list[float], q: float) -> float:
+    """정렬된 값 목록의 q 분위수 (보수적으로 올림 인덱스 사용)"""
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, int(q * len(sorted_values) + 0.999999) - 1)
+    return sorted_values[max(idx, 0)]
+
+
+def _fit_ridge(rows: list[list[float]], targets: list[int], prior: list[float]) -> list[float]:
+    """
+    (XᵀX + λI) w = Xᵀy + λ·prior 를 풀어 가중치를 구한다.
+    특징 수가 작으므로 가우스 소거법으로 직접 계산한다.
+    """
+    n = len(prior)
+    matrix = [[_RIDGE if i == j else 0.0 for j in range(n)] for i in range(n)]
+    vector = [_RIDGE * p for p in prior]
+    for row, y in zip(rows, targets):
+        for i in range(n):
+            if row[i] == 0.0:
+                continue
+            vector[i] += row[i] * y
+            for j in range(n):
+                matrix[i][j] += row[i] * row[j]
+    return _solve(matrix, vector)
+
+
+def _solve(matrix: list[list[float]], vector: list[float]) -> list[float]:
+    """부분 피벗 가우스 소거법으로 선형 방정식을 푼다."""
+    n = len(vector)
+    a = [row[:] + [vector[i]] for i, row in enumerate(matrix)]
+    for col in range(n):
+        pivot = max(range(col, n), key=lambda r: abs(a[r][col]))
+        a[col], a[pivot] = a[pivot], a[col]
+        for r in range(col + 1, n):
+            factor = a[r][col] / a[col][col]
+            for c in range(col, n + 1):
+                a[r][c] -= factor * a[col][c]
+    solution = [0.0] * n
+    for i in range(n - 1, -1, -1):
+        acc = a[i][n] - sum(a[i][j] * solution[j] for j in range(i + 1, n))
+        solution[i] = acc / a[i][i]
+    return solution
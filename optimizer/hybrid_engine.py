@@ -11,9 +11,12 @@ Fine-tuning 개념과 RAG 개념을 통합한 최적화 엔진.
 """
 
 from dataclasses import dataclass, field
+from typing import Iterable
 
-from optimizer.tokenizer import TokenCounter
+from optimizer.tokenizer import TokenCounter, TokenCountCache
 from optimizer.refiner import PromptRefiner, RefinementResult
+from optimizer.result_cache import RefinementCache
+from optimizer.rules.packs import RulePack
 from optimizer.cost import CostCalculator
 from optimizer.learned_optimizer import (
     AdaptiveRefiner,
@@ -82,17 +85,38 @@ class HybridOptimizer:
     도메인 전문지식 + 유사 사례 참조를 결합한다.
     """
 
-    def __init__(self, model: str = "gpt-4o-mini"):
+    def __init__(
+        self,
+        model: str = "gpt-4o-mini",
+        token_cache: TokenCountCache | bool | None = None,
+        result_cache: RefinementCache | bool | None = None,
+        rule_packs: Iterable[RulePack] = (),
+    ):
+        """
+        Args:
+            model: 사용할 모델 이름
+            token_cache: 하위 모듈이 공유할 토큰 수 캐시.
+                같은 프롬프트를 여러 단계에서 반복 계산하는 비용을 줄인다.
+            result_cache: 규칙 기반 정제기와 적응형 정제기가 공유할 정제 결과 캐시.
+                PromptRefiner와 같이 True면 공유 캐시, RefinementCache 객체면 해당 캐시를
+                쓰고, 기본값은 캐시 없음.
+            rule_packs: 학습 패턴 단계에서 함께 적용할 규칙 팩 (rules.packs.load_rule_pack)
+        """
         self.model = model
-        self.counter = TokenCounter(model=model)
-        self.refiner = PromptRefiner(model=model)
-        self.calculator = CostCalculator(model=model)
+        self.rule_packs = tuple(rule_packs)
+        self.counter = TokenCounter(model=model, cache=token_cache)
+        self.refiner = PromptRefiner(
+            model=model, token_cache=token_cache, result_cache=result_cache,
+        )
+        self.calculator = CostCalculator(model=model, token_cache=token_cache)
 
         # Fine-tuning 모듈
-        self.adaptive_refiner = AdaptiveRefiner(model=model)
+        self.adaptive_refiner = AdaptiveRefiner(
+            model=model, token_cache=token_cache, result_cache=result_cache,
+        )
 
         # RAG 모듈
-        self.knowledge_base = PromptKnowledgeBase(model=model)
+        self.knowledge_base = PromptKnowledgeBase(model=model, token_cache=token_cache)
         self.searcher: SimilaritySearcher | None = None
         self.advisor: OptimizationAdvisor | None = None
 
@@ -137,7 +161,7 @@ class HybridOptimizer:
         original_tokens = self.counter.count(text)
 
         # ── Step 1: 기존 규칙 기반 실행 (Baseline) ──
-        rule_based = self.refiner.refine(text)
+        rule_based = self.refiner.refine(text, analysis="lazy")
 
         # ── Step 2: RAG — 유사 사례 기반 분석 ──
         rag_advice = None
@@ -190,7 +214,7 @@ class HybridOptimizer:
         learned_applied = []
         if self._initialized:
             hybrid_text, learned_applied = apply_learned_patterns(
-                hybrid_text, domain
+                hybrid_text, domain, self.rule_packs
             )
 
         # ── Step 5.5: 기본 규칙 최적화 실행 ──
@@ -201,6 +225,7 @@ class HybridOptimizer:
             fix_fillers=fix_settings["fix_fillers"],
             fix_repetitive=fix_settings["fix_repetitive"],
             fix_unnecessary=fix_settings["fix_unnecessary"],
+            analysis="off",
         )
         hybrid_text = hybrid_result.refined
 
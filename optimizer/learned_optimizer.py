@@ -10,11 +10,15 @@ Fine-tuning 개념: 데이터에서 "깊이 있는 지식"을 추출하여
 
 import re
 from dataclasses import dataclass, field
+from functools import lru_cache
 from statistics import mean, stdev
 
-from optimizer.tokenizer import TokenCounter
+from optimizer.tokenizer import TokenCounter, TokenCountCache
 from optimizer.analyzer import PatternAnalyzer
 from optimizer.refiner import PromptRefiner, RefinementResult
+from optimizer.result_cache import RefinementCache
+from optimizer.rules.engine import RewriteRule, apply_rules, compile_rules
+from optimizer.rules.packs import RulePack
 from optimizer.rules.korean import (
     POLITE_PATTERNS,
     FILLER_PATTERNS,
@@ -99,29 +103,33 @@ LEARNED_DOMAIN_PATTERNS = {
 
 
 
-def apply_learned_patterns(text: str, domain: str) -> tuple[str, list[dict]]:
+def apply_learned_patterns(
+    text: str,
+    domain: str,
+    rule_packs: tuple[RulePack, ...] = (),
+) -> tuple[str, list[dict]]:
     """
     도메인 특화 학습 패턴을 적용한다.
 
     Args:
         text: 정제할 텍스트 (기존 규칙 적용 후)
         domain: 감지된 도메인
+        rule_packs: 함께 적용할 규칙 팩 (rules.packs.load_rule_pack).
+            팩 규칙은 우선순위 순으로 내장 패턴(우선순위 0) 사이에 끼워 적용한다.
 
     Returns:
         (정제된 텍스트, 적용된 패턴 목록)
     """
-    patterns = LEARNED_DOMAIN_PATTERNS.get(domain, [])
-    applied = []
-
-    for pattern, replacement in patterns:
-        matches = re.findall(pattern, text)
-        if matches:
-            applied.append({
-                "rule": f"'{matches[0]}' → '{replacement}'" if replacement else f"'{matches[0]}' 제거",
-                "category": f"학습 패턴 ({domain})",
-                "count": len(matches),
-            })
-            text = re.sub(pattern, replacement, text)
+    text, hits = apply_rules(text, _domain_rules(domain, tuple(rule_packs)))
+    applied = [
+        {
+            "rule": f"'{hit.first}' → '{hit.rule.replacement}'" if hit.rule.replacement
+                    else f"'{hit.first}' 제거",
+            "category": hit.rule.category,
+            "count": hit.count,
+        }
+        for hit in hits
+    ]
 
     # 후처리: 이중 공백 정리
     text = re.sub(r" {2,}", " ", text).strip()
@@ -129,6 +137,21 @@ def apply_learned_patterns(text: str, domain: str) -> tuple[str, list[dict]]:
     return text, applied
 
 
+@lru_cache(maxsize=64)
+def _domain_rules(domain: str, rule_packs: tuple[RulePack, ...]) -> tuple[RewriteRule, ...]:
+    """도메인에 적용할 규칙 (우선순위가 높은 것 먼저, 같으면 내장 패턴 → 팩 순서)"""
+    category = f"학습 패턴 ({domain})"
+    patterns = LEARNED_DOMAIN_PATTERNS.get(domain, [])
+    builtin = compile_rules(tuple((pattern, replacement, category) for pattern, replacement in patterns))
+    if not rule_packs:
+        return builtin
+    ranked = [(0, rule) for rule in builtin]
+    for pack in rule_packs:
+        ranked.extend((entry.priority, entry.rule) for entry in pack.rules_for(domain))
+    ranked.sort(key=lambda item: -item[0])
+    return tuple(rule for _, rule in ranked)
+
+
 # ─── 도메인 감지용 키워드 ───
 
 DOMAIN_KEYWORDS = {
@@ -192,9 +215,13 @@ class AdaptiveResult:
 class RuleEffectivenessAnalyzer:
     """규칙별 효과 분석기 — Fine-tuning의 '학습' 단계"""
 
-    def __init__(self, model: str = "gpt-4o-mini"):
-        self.counter = TokenCounter(model=model)
-        self.refiner = PromptRefiner(model=model)
+    def __init__(
+        self,
+        model: str = "gpt-4o-mini",
+        token_cache: TokenCountCache | bool | None = None,
+    ):
+        self.counter = TokenCounter(model=model, cache=token_cache)
+        self.refiner = PromptRefiner(model=model, token_cache=token_cache)
 
     def analyze_rule_effectiveness(
         self, dataset: dict[str, list[str]]
@@ -278,7 +305,7 @@ class RuleEffectivenessAnalyzer:
             # 도메인별 평균 절감률 계산
             rates = []
             for prompt in prompts:
-                result = self.refiner.refine(prompt)
+                result = self.refiner.refine(prompt, analysis="off")
                 rates.append(result.reduction_rate)
 
             avg_rate = mean(rates) if rates else 0.0
@@ -343,9 +370,17 @@ class AdaptiveRefiner:
     최적화를 수행한다.
     """
 
-    def __init__(self, model: str = "gpt-4o-mini"):
+    def __init__(
+        self,
+        model: str = "gpt-4o-mini",
+        token_cache: TokenCountCache | bool | None = None,
+        result_cache: RefinementCache | bool | None = None,
+    ):
         self.model = model
-        self.refiner = PromptRefiner(model=model)
+        self.token_cache = token_cache
+        self.refiner = PromptRefiner(
+            model=model, token_cache=token_cache, result_cache=result_cache,
+        )
         self.profiles: dict[str, DomainProfile] = {}
         self._trained = False
 
@@ -353,7 +388,9 @@ class AdaptiveRefiner:
         """
         데이터셋으로 도메인 프로파일을 학습한다. (Fine-tuning 수행)
         """
-        analyzer = RuleEffectivenessAnalyzer(model=self.model)
+        analyzer = RuleEffectivenessAnalyzer(
+            model=self.model, token_cache=self.token_cache
+        )
         self.profiles = analyzer.build_domain_profiles(dataset)
         self._trained = True
 
@@ -403,7 +440,7 @@ class AdaptiveRefiner:
         domain, confidence = self.detect_domain(text)
 
         # 2. 기존 방식 실행 (기준선)
-        base_result = self.refiner.refine(text)
+        base_result = self.refiner.refine(text, analysis="lazy")
 
         # 3. 프로파일 기반 최적화
         profile = self.profiles.get(domain)
@@ -426,6 +463,7 @@ class AdaptiveRefiner:
                 fix_unnecessary=rule_settings.get(
                     "불필요 지시 문구", {}
                 ).get("enabled", True),
+                analysis="lazy",
             )
         else:
             # 학습되지 않은 경우 기존 방식 그대로
@@ -0,0 +1,285 @@
+"""
+병렬 일괄 처리
+=============
+여러 프롬프트의 분석·정제를 프로세스 풀로 나눠 처리한다.
+
+정규식 매칭은 GIL을 잡고 실행되므로 스레드로는 코어를 나눠 쓸 수 없다.
+각 워커 프로세스는 시작할 때 PromptRefiner(규칙 컴파일, 인코딩 로드)를 한 번만
+만들고, 입력은 chunk_size개씩 묶어 보내 프로세스 간 통신 횟수를 줄인다.
+
+결과는 입력 순서대로 반환하며, 한 항목에서 예외가 나면 그 자리에 BatchError를
+넣고 나머지 항목은 그대로 처리한다. 워커가 비정상 종료되어 청크가 실패하면 풀을
+다시 만들고 그 청크의 항목을 하나씩 워커에서 다시 처리해, 종료를 일으킨 항목만
+BatchError로 표시한다 (현재 프로세스에서 다시 실행하지 않는다).
+
+긴 프롬프트 하나를 구간으로 나눠 정제하는 PromptRefiner.refine_parallel은 지연 시간이
+중요하므로, 호출마다 풀을 만들지 않고 (모델, 워커 수)별로 만들어 둔 풀을 재사용한다.
+"""
+
+import os
+import threading
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from itertools import islice
+from typing import Iterable
+
+from optimizer.analyzer import AnalysisReport
+from optimizer.refiner import RefinementResult
+
+
+# 한 번에 워커로 보내는 항목 수
+DEFAULT_CHUNK_SIZE = 64
+# 워커당 동시에 제출해 두는 청크 수 (입력 전체를 한꺼번에 제출하지 않는다)
+_IN_FLIGHT_PER_WORKER = 2
+# 이보다 항목이 적으면 프로세스 풀 없이 현재 프로세스에서 처리한다
+_MIN_PARALLEL_ITEMS = 2
+
+
+@dataclass
+class BatchError:
+    """일괄 처리 중 한 항목에서 발생한 오류"""
+    index: int             # 입력에서의 위치
+    error_type: str        # 예외 클래스 이름
+    message: str
+
+
+# 워커 프로세스 상태: {"refiner": PromptRefiner}
+_WORKER: dict = {}
+# 현재 프로세스에서 처리할 때 재사용하는 모델별 정제기
+_LOCAL: dict = {}
+# 문서 내 병렬 정제용 풀: (모델, 워커 수) → ProcessPoolExecutor
+_POOLS: dict = {}
+_POOLS_LOCK = threading.Lock()
+
+
+def analyze_many(
+    texts: Iterable[str],
+    model: str = "gpt-4o-mini",
+    *,
+    max_workers: int | None = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    **options,
+) -> list[AnalysisReport | BatchError]:
+    """
+    여러 프롬프트를 프로세스 풀에서 분석한다.
+
+    Args:
+        texts: 분석할 프롬프트 목록
+        model: 사용할 모델 이름
+        max_workers: 워커 프로세스 수 (None이면 CPU 수, 1이면 현재 프로세스에서 처리)
+        chunk_size: 한 번에 워커로 보내는 항목 수
+        **options: PatternAnalyzer.analyze 키워드 인자 (sample, precision 등)
+
+    Returns:
+        입력 순서대로 AnalysisReport, 실패한 항목은 BatchError
+    """
+    return list(_imap("analyze", texts, model, max_workers, chunk_size, options))
+
+
+def refine_many(
+    texts: Iterable[str],
+    model: str = "gpt-4o-mini",
+    *,
+    max_workers: int | None = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    **options,
+) -> list[RefinementResult | BatchError]:
+    """
+    여러 프롬프트를 프로세스 풀에서 정제한다.
+
+    Args:
+        texts: 정제할 프롬프트 목록
+        model: 사용할 모델 이름
+        max_workers: 워커 프로세스 수 (None이면 CPU 수, 1이면 현재 프로세스에서 처리)
+        chunk_size: 한 번에 워커로 보내는 항목 수
+        **options: PromptRefiner.refine 키워드 인자 (fix_whitespace 등)
+
+    Returns:
+        입력 순서대로 RefinementResult, 실패한 항목은 BatchError
+    """
+    return list(_imap("refine", texts, model, max_workers, chunk_size, options))
+
+
+def _imap(kind: str, texts: Iterable[str], model: str, max_workers: int | None,
+          chunk_size: int, options: dict):
+    """입력 순서대로 결과를 내보낸다. 제출해 둔 청크 수를 제한해 메모리를 일정하게 유지한다."""
+    workers = max_workers or os.cpu_count() or 1
+    chunk_size = max(1, chunk_size)
+    items = iter(texts)
+    first = list(islice(items, chunk_size))
+    if workers <= 1 or len(first) < _MIN_PARALLEL_ITEMS:
+        start = 0
+        while first:
+            yield from _run_local(kind, model, start, first, options)
+            start += len(first)
+            first = list(islice(items, chunk_size))
+        return
+
+    pool = _WorkerPool(model, workers)
+    try:
+        pending = deque()
+        start = 0
+        chunk = first
+        while chunk or pending:
+            while chunk and len(pending) < workers * _IN_FLIGHT_PER_WORKER:
+                future = pool.submit(_run_chunk, kind, start, chunk, options)
+                pending.append((start, chunk, future))
+                start += len(chunk)
+                chunk = list(islice(items, chunk_size))
+            chunk_start, chunk_texts, future = pending.popleft()
+            try:
+                results = future.result()
+            except Exception:
+                # 워커 종료·직렬화 실패 등 청크 단위 오류: 항목별로 워커에서 다시 처리
+                results = _run_isolated(pool, kind, chunk_start, chunk_texts, options)
+            yield from results
+    finally:
+        pool.shutdown()
+
+
+class _WorkerPool:
+    """워커가 비정상 종료되면 다시 만드는 일괄 처리용 프로세스 풀"""
+
+    def __init__(self, model: str, workers: int):
+        self.model = model
+        self.workers = workers
+        self._executor: ProcessPoolExecutor | None = None
+
+    def submit(self, fn, *args) -> Future:
+        if self._executor is None or getattr(self._executor, "_broken", False):
+            self._replace()
+        try:
+            return self._executor.submit(fn, *args)
+        except BrokenProcessPool:
+            # 직전 작업이 워커를 종료시켰지만 아직 _broken에 반영되지 않은 경우
+            self._replace()
+            return self._executor.submit(fn, *args)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def _replace(self):
+        self.shutdown()
+        self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=init_worker,
+                                             initargs=(self.model,))
+
+
+def _run_isolated(pool: _WorkerPool, kind: str, start: int, texts: list[str], options: dict) -> list:
+    """
+    실패한 청크의 항목을 하나씩 워커에서 처리한다.
+    워커를 종료시키거나 직렬화할 수 없는 항목은 BatchError가 된다.
+    """
+    results = []
+    for offset, text in enumerate(texts):
+        try:
+            results.extend(pool.submit(_run_chunk, kind, start + offset, [text], options).result())
+        except Exception as exc:
+            results.append(BatchError(start + offset, type(exc).__name__, str(exc)))
+    return results
+
+
+def submit_segments(
+    segments: list[str],
+    model: str,
+    flags: tuple[bool, ...],
+    max_workers: int,
+) -> list[Future]:
+    """
+    구간별 정제 작업을 공유 풀에 제출한다 (PromptRefiner.refine_parallel용).
+
+    Returns:
+        구간 순서대로의 Future. 결과는 (정제된 구간, AppliedRules.index 형식의 적용 기록)
+    """
+    pool = _shared_pool(model, max_workers)
+    return [pool.submit(_refine_segment, flags, segment) for segment in segments]
+
+
+def shutdown_pools():
+    """submit_segments가 만든 공유 풀을 모두 종료한다."""
+    with _POOLS_LOCK:
+        pools = list(_POOLS.values())
+        _POOLS.clear()
+    for pool in pools:
+        pool.shutdown(wait=True)
+
+
+def init_worker(model: str):
+    """
+    워커 프로세스 초기화 함수. 정제기(규칙·인코딩)를 한 번 만들고 미리 한 번 실행해 둔다.
+
+    이 모듈의 풀과 같은 방식으로 워커를 쓰는 다른 프로세스 풀(aio.AsyncPromptRefiner)은
+    ProcessPoolExecutor(initializer=init_worker, initargs=(model,))로 만들고
+    run_in_worker를 제출한다.
+    """
+    from optimizer.refiner import PromptRefiner
+
+    _WORKER["refiner"] = PromptRefiner(model=model)
+    _WORKER["refiner"].refine("안녕하세요,  워커 준비\t완료")
+
+
+def run_in_worker(kind: str, text: str, options: dict):
+    """
+    init_worker로 초기화한 워커에서 항목 하나를 처리한다.
+
+    Args:
+        kind: "analyze"(PatternAnalyzer.analyze) 또는 "refine"(PromptRefiner.refine)
+        text: 처리할 프롬프트
+        options: 해당 메서드의 키워드 인자
+
+    Raises:
+        처리 중 발생한 예외를 그대로 전달한다 (BatchError로 바꾸지 않는다).
+    """
+    refiner = _WORKER["refiner"]
+    run = refiner.analyzer.analyze if kind == "analyze" else refiner.refine
+    return run(text, **options)
+
+
+def _shared_pool(model: str, max_workers: int) -> ProcessPoolExecutor:
+    with _POOLS_LOCK:
+        pool = _POOLS.get((model, max_workers))
+        # 워커가 비정상 종료된 풀은 다시 만든다
+        if pool is None or getattr(pool, "_broken", False):
+            pool = ProcessPoolExecutor(max_workers=max_workers, initializer=init_worker,
+                                       initargs=(model,))
+            _POOLS[(model, max_workers)] = pool
+        return pool
+
+
+def _refine_segment(flags: tuple[bool, ...], segment: str) -> tuple[str, list]:
+    """워커에서 구간 하나를 정제한다."""
+    from optimizer.refiner import AppliedRules
+    from optimizer.rules.program import compile_program
+
+    program = compile_program(*flags)
+    refined, hits = _WORKER["refiner"]._refine_segment(program, segment)
+    return refined, AppliedRules(program).index(hits)
+
+
+def _run_chunk(kind: str, start: int, texts: list[str], options: dict) -> list:
+    """워커에서 청크 하나를 처리한다."""
+    return _process(_WORKER["refiner"], kind, start, texts, options)
+
+
+def _run_local(kind: str, model: str, start: int, texts: list[str], options: dict) -> list:
+    """현재 프로세스에서 청크 하나를 처리한다 (정제기는 모델별로 재사용)."""
+    from optimizer.refiner import PromptRefiner
+
+    refiner = _LOCAL.get(model)
+    if refiner is None:
+        refiner = _LOCAL[model] = PromptRefiner(model=model)
+    return _process(refiner, kind, start, texts, options)
+
+
+def _process(refiner, kind: str, start: int, texts: list[str], options: dict) -> list:
+    run = refiner.analyzer.analyze if kind == "analyze" else refiner.refine
+    results = []
+    for offset, text in enumerate(texts):
+        try:
+            results.append(run(text, **options))
+        except Exception as exc:
+            results.append(BatchError(start + offset, type(exc).__name__, str(exc)))
+    return results
@@ -13,7 +13,7 @@ import math
 from dataclasses import dataclass, field
 from collections import Counter
 
-from optimizer.tokenizer import TokenCounter
+from optimizer.tokenizer import TokenCounter, TokenCountCache
 from optimizer.refiner import PromptRefiner
 
 
@@ -59,9 +59,13 @@ class PromptKnowledgeBase:
     RAG의 'R' (Retrieval) 기반이 되는 인덱스.
     """
 
-    def __init__(self, model: str = "gpt-4o-mini"):
-        self.counter = TokenCounter(model=model)
-        self.refiner = PromptRefiner(model=model)
+    def __init__(
+        self,
+        model: str = "gpt-4o-mini",
+        token_cache: TokenCountCache | bool | None = None,
+    ):
+        self.counter = TokenCounter(model=model, cache=token_cache)
+        self.refiner = PromptRefiner(model=model, token_cache=token_cache)
         self.entries: list[KnowledgeEntry] = []
         self._idf: dict[str, float] = {}
         self._built = False
@@ -5,12 +5,19 @@
 최적화된 프롬프트를 생성한다.
 """
 
+import copy
+import os
 import re
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, replace
+from typing import Iterable, Iterator
 
-from optimizer.tokenizer import TokenCounter
+from optimizer.tokenizer import TokenCounter, TokenCountCache, TokenStream
 from optimizer.analyzer import PatternAnalyzer, AnalysisReport
 from optimizer.rules.korean import apply_korean_rules
+from optimizer.rules.engine import RewriteRule, RuleHit, apply_rules
+from optimizer.rules.program import RewriteProgram, compile_program
+from optimizer.rules.scheduler import FixpointReport, apply_rules_fixpoint
+from optimizer.result_cache import RefinementCache, SHARED_REFINEMENT_CACHE
 
 
 @dataclass
@@ -23,15 +30,100 @@ class RefinementResult:
     saved_tokens: int
     reduction_rate: float  # 0~1
     applied_rules: list[dict] = field(default_factory=list)
-    analysis: AnalysisReport | None = None
+    analysis: "AnalysisReport | LazyAnalysis | None" = None
+    fixpoint: FixpointReport | None = None     # refine(fixpoint=True)일 때의 고정점 적용 기록
+
+
+@dataclass
+class StreamRefinement:
+    """스트리밍 정제 결과 요약 (refine_stream을 끝까지 읽은 뒤 채워진다)"""
+    original_tokens: int
+    refined_tokens: int
+    saved_tokens: int
+    reduction_rate: float  # 0~1
+    original_chars: int
+    refined_chars: int
+    segments: int          # 따로 정제한 구간 수
+    applied_rules: list[dict] = field(default_factory=list)
+
+
+# 스트리밍 정제에서 한 번에 정제할 구간의 최소 문자 수
+STREAM_SEGMENT_CHARS = 64 * 1024
+# 문서 내 병렬 정제에서 워커 하나에 보낼 구간의 최소 문자 수 (이보다 짧은 입력은 순차 처리)
+PARALLEL_MIN_SEGMENT_CHARS = 8 * 1024
+# 문서 내 병렬 정제에서 워커당 나눌 구간 수
+PARALLEL_SEGMENTS_PER_WORKER = 2
+
+# refine의 분석 실행 방식
+#   eager: 정제 전에 분석하고, 분석에서 찾은 매칭 구간을 정제에 재사용한다
+#   lazy:  결과의 analysis 속성에 처음 접근할 때 원본 텍스트를 분석한다
+#   off:   분석하지 않는다 (analysis는 None)
+ANALYSIS_MODES = ("eager", "lazy", "off")
+
+
+class LazyAnalysis:
+    """
+    처음 속성에 접근할 때 분석을 실행하는 AnalysisReport 대리 객체.
+    속성 접근은 모두 분석 리포트로 넘기며, 직렬화하면 분석 리포트로 저장된다.
+    """
+
+    __slots__ = ("_analyzer", "_text", "_report")
+
+    def __init__(self, analyzer: PatternAnalyzer, text: str):
+        self._analyzer = analyzer
+        self._text = text
+        self._report: AnalysisReport | None = None
+
+    @property
+    def report(self) -> AnalysisReport:
+        """분석 리포트 (처음 호출할 때 분석한다)"""
+        if self._report is None:
+            self._report = self._analyzer.analyze(self._text)
+            self._analyzer = None
+        return self._report
+
+    @property
+    def computed(self) -> bool:
+        """분석이 이미 실행되었는지"""
+        return self._report is not None
+
+    def __getattr__(self, name: str):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return getattr(self.report, name)
+
+    def __reduce__(self):
+        return _identity, (self.report,)
+
+    def __repr__(self) -> str:
+        return repr(self._report) if self._report is not None else "LazyAnalysis(<미실행>)"
+
+
+def _identity(report: AnalysisReport) -> AnalysisReport:
+    return report
 
 
 class PromptRefiner:
     """규칙 기반 프롬프트 정제 엔진"""
 
-    def __init__(self, model: str = "gpt-4o-mini"):
-        self.counter = TokenCounter(model=model)
-        self.analyzer = PatternAnalyzer(model=model)
+    def __init__(
+        self,
+        model: str = "gpt-4o-mini",
+        token_cache: TokenCountCache | bool | None = None,
+        result_cache: RefinementCache | bool | None = None,
+    ):
+        """
+        Args:
+            model: 사용할 모델 이름
+            token_cache: 토큰 수 캐시 (TokenCounter의 cache 인자와 동일)
+            result_cache: 정제 결과 캐시. True면 공유 캐시(SHARED_REFINEMENT_CACHE)를,
+                RefinementCache 객체면 해당 캐시를 사용한다. 기본값은 캐시 없음.
+        """
+        self.counter = TokenCounter(model=model, cache=token_cache)
+        self.analyzer = PatternAnalyzer(model=model, counter=self.counter)
+        if result_cache is True:
+            result_cache = SHARED_REFINEMENT_CACHE
+        self.result_cache: RefinementCache | None = result_cache or None
 
     def refine(
         self,
@@ -42,6 +134,8 @@ class PromptRefiner:
         fix_fillers: bool = True,
         fix_repetitive: bool = True,
         fix_unnecessary: bool = True,
+        analysis: str = "eager",
+        fixpoint: bool = False,
     ) -> RefinementResult:
         """
         프롬프트를 정제한다. 각 규칙을 개별적으로 켜고 끌 수 있다.
@@ -53,35 +147,84 @@ class PromptRefiner:
             fix_fillers: 불필요 접속사/수식어 제거
             fix_repetitive: 반복 강조 표현 통합
             fix_unnecessary: 불필요 지시 문구 제거
+            analysis: 분석 실행 방식 ("eager", "lazy", "off" — ANALYSIS_MODES 참고).
+                정제 결과와 토큰 수만 필요하면 "off"로 분석 비용을 없앨 수 있다.
+            fixpoint: True면 뒤쪽 규칙의 치환이 만든 새 매칭까지 더 바꿀 것이 없을 때까지
+                정제한다 (rules.scheduler). 새 매칭이 생겼을 수 있는 규칙만 다시 실행하며,
+                기록은 결과의 fixpoint에 담긴다. refine_stream·refine_parallel은 지원하지 않는다.
 
         Returns:
             RefinementResult: 정제 결과
+
+        Raises:
+            ValueError: 지원하지 않는 analysis 값
         """
-        # 1. 먼저 분석을 실행
-        analysis = self.analyzer.analyze(text)
+        if analysis not in ANALYSIS_MODES:
+            raise ValueError(
+                f"analysis는 {', '.join(ANALYSIS_MODES)} 중 하나여야 합니다: {analysis!r}"
+            )
+
+        # 옵션 조합별로 미리 컴파일된 규칙 실행 순서
+        program = compile_program(
+            fix_whitespace, fix_polite, fix_fillers, fix_repetitive, fix_unnecessary,
+        )
+
+        cache_key = None
+        if self.result_cache is not None:
+            cache_key = self.result_cache.key(
+                text,
+                model=self.counter.model,
+                encoding_name=self.counter.encoding_name,
+                ruleset=program.digest,
+                with_analysis=analysis == "eager",
+                fixpoint=fixpoint,
+            )
+            cached = self.result_cache.get(cache_key)
+            if cached is not None:
+                return self._from_cache(cached, analysis)
+
+        # 1. 먼저 분석을 실행 (eager일 때만)
+        report = None
+        known_spans = None
+        if analysis == "eager":
+            report = self.analyzer.analyze(text)
+            known_spans = report.spans
+        elif analysis == "lazy":
+            report = LazyAnalysis(self.analyzer, text)
 
-        # 2. 정제 적용
+        # 2. 정제 적용. 분석에서 찾은 매칭 구간은 텍스트가 처음 바뀌기 전까지 그대로
+        #    쓰고, 그 뒤의 규칙만 현재 텍스트를 다시 스캔한다.
         refined = text
         all_applied = []
+        fixpoint_report = None
 
-        if fix_whitespace:
-            refined, applied = self._fix_whitespace(refined)
-            all_applied.extend(applied)
-
-        if fix_polite or fix_fillers or fix_repetitive or fix_unnecessary:
-            # 한국어 규칙 적용 (원하는 카테고리만)
-            refined, applied = self._apply_selective_korean_rules(
-                refined,
-                polite=fix_polite,
-                fillers=fix_fillers,
-                repetitive=fix_repetitive,
-                unnecessary=fix_unnecessary,
+        if fixpoint:
+            # 공백 규칙과 한국어 규칙을 한 실행 순서로 보고 고정점까지 적용
+            refined, hits, fixpoint_report = apply_rules_fixpoint(
+                refined, program.rules, known_spans, graph=program.graph,
             )
-            all_applied.extend(applied)
+            merged = AppliedRules(program)
+            merged.add(hits)
+            all_applied = merged.entries()
+
+        else:
+            if program.whitespace:
+                refined, applied = self._fix_whitespace(
+                    refined, known_spans=known_spans, rules=program.whitespace,
+                )
+                all_applied.extend(applied)
+
+            if program.korean:
+                # 한국어 규칙 적용 (원하는 카테고리만)
+                refined, applied = self._apply_selective_korean_rules(
+                    refined,
+                    rules=program.korean,
+                    known_spans=known_spans if refined == text else None,
+                )
+                all_applied.extend(applied)
 
         # 3. 후처리: 정제 규칙이 하나라도 적용된 경우에만 실행
-        any_rule_on = fix_whitespace or fix_polite or fix_fillers or fix_repetitive or fix_unnecessary
-        if any_rule_on:
+        if program.enabled:
             refined = self._post_clean(refined)
 
         # 4. 토큰 비교
@@ -90,7 +233,7 @@ class PromptRefiner:
         saved = orig_tokens - ref_tokens
         rate = saved / orig_tokens if orig_tokens > 0 else 0.0
 
-        return RefinementResult(
+        result = RefinementResult(
             original=text,
             refined=refined,
             original_tokens=orig_tokens,
@@ -98,86 +241,426 @@ class PromptRefiner:
             saved_tokens=saved,
             reduction_rate=round(rate, 4),
             applied_rules=all_applied,
-            analysis=analysis,
+            analysis=report,
+            fixpoint=fixpoint_report,
+        )
+        if cache_key is not None:
+            # 지연 분석은 저장하지 않고 꺼낼 때 다시 붙인다. 호출자가 반환값을 고쳐도
+            # 캐시 항목이 바뀌지 않도록 적용 기록·분석 리포트까지 복사해 저장한다
+            self.result_cache.put(cache_key, _copy_result(replace(
+                result,
+                analysis=report if analysis == "eager" else None,
+            )))
+        return result
+
+    def refine_stream(
+        self,
+        chunks: Iterable[str],
+        *,
+        fix_whitespace: bool = True,
+        fix_polite: bool = True,
+        fix_fillers: bool = True,
+        fix_repetitive: bool = True,
+        fix_unnecessary: bool = True,
+        segment_chars: int = STREAM_SEGMENT_CHARS,
+    ) -> "RefinementStream":
+        """
+        텍스트 조각의 반복자를 받아 정제된 조각을 차례로 내보낸다.
+
+        이어 붙인 출력은 전체 텍스트에 대한 refine(...).refined와 같다. 전체 텍스트나
+        그 사본을 메모리에 올리지 않고, 어떤 규칙의 매칭에도 나올 수 없는 문자
+        (RewriteProgram.barrier) 뒤에서 잘라 구간별로 정제한다. 조각 경계에 걸친
+        매칭도 전체 텍스트에서와 똑같이 처리된다. 토큰 수와 적용 규칙은 반복이 끝난 뒤
+        반환 객체의 result(StreamRefinement)에 있다.
+
+        Args:
+            chunks: 문자열 조각의 반복자 (조각 경계는 임의여도 된다)
+            segment_chars: 구간을 자르기 전에 모을 최소 문자 수
+            나머지 인자는 refine과 같다.
+
+        Example:
+            stream = refiner.refine_stream(chunks)
+            for piece in stream:
+                out.write(piece)
+            print(stream.result.saved_tokens)
+        """
+        program = compile_program(
+            fix_whitespace, fix_polite, fix_fillers, fix_repetitive, fix_unnecessary,
+        )
+        return RefinementStream(self, program, chunks, segment_chars)
+
+    def refine_parallel(
+        self,
+        text: str,
+        *,
+        fix_whitespace: bool = True,
+        fix_polite: bool = True,
+        fix_fillers: bool = True,
+        fix_repetitive: bool = True,
+        fix_unnecessary: bool = True,
+        analysis: str = "lazy",
+        max_workers: int | None = None,
+        segment_chars: int | None = None,
+    ) -> RefinementResult:
+        """
+        긴 프롬프트 하나를 구간으로 나눠 워커 프로세스에서 병렬로 정제한다.
+
+        구간은 어떤 규칙의 매칭에도 나올 수 없는 문자(RewriteProgram.barrier) 바로
+        뒤에서 자른다. 그 문자는 지워지지 않고 매칭이 그 문자를 넘지 못하므로, 구간별
+        정제 결과를 이어 붙이고 앞뒤 공백을 지우면 refine(...).refined와 바이트 단위로
+        같다. applied_rules도 구간별 기록을 합쳐 refine과 같게 만든다.
+        분할 문자를 정할 수 없거나 입력이 짧으면 refine으로 순차 처리한다.
+
+        Args:
+            analysis: 분석 실행 방식 (refine과 같다). eager면 워커가 정제하는 동안
+                현재 프로세스에서 분석한다.
+            max_workers: 워커 프로세스 수 (None이면 CPU 수)
+            segment_chars: 구간의 목표 문자 수 (None이면 워커 수에 맞춰 정한다)
+            나머지 인자는 refine과 같다.
+        """
+        from optimizer.parallel import submit_segments
+
+        flags = dict(
+            fix_whitespace=fix_whitespace, fix_polite=fix_polite, fix_fillers=fix_fillers,
+            fix_repetitive=fix_repetitive, fix_unnecessary=fix_unnecessary,
         )
+        if analysis not in ANALYSIS_MODES:
+            raise ValueError(
+                f"analysis는 {', '.join(ANALYSIS_MODES)} 중 하나여야 합니다: {analysis!r}"
+            )
+        program = compile_program(*flags.values())
+        workers = max_workers or os.cpu_count() or 1
+        if segment_chars is None:
+            segment_chars = max(
+                PARALLEL_MIN_SEGMENT_CHARS,
+                -(-len(text) // (workers * PARALLEL_SEGMENTS_PER_WORKER)),
+            )
+        segments = split_at_barriers(text, program.barrier, segment_chars) \
+            if program.enabled else [text]
+        if workers <= 1 or len(segments) < 2:
+            return self.refine(text, analysis=analysis, **flags)
+
+        futures = submit_segments(segments, self.counter.model, program.flags, workers)
 
-    def _fix_whitespace(self, text: str) -> tuple[str, list[dict]]:
+        # 워커가 정제하는 동안 원본 토큰 수와 분석을 계산한다
+        orig_tokens = self.counter.count(text)
+        report = None
+        if analysis == "eager":
+            report = self.analyzer.analyze(text)
+        elif analysis == "lazy":
+            report = LazyAnalysis(self.analyzer, text)
+
+        applied = AppliedRules(program)
+        parts = []
+        for segment, future in zip(segments, futures):
+            try:
+                refined, hits = future.result()
+            except Exception:
+                # 워커 종료 등: 이 구간은 현재 프로세스에서 정제한다
+                refined, local_hits = self._refine_segment(program, segment)
+                hits = applied.index(local_hits)
+            parts.append(refined)
+            applied.add_indexed(hits)
+        refined = "".join(parts).strip()
+
+        ref_tokens = self.counter.count(refined)
+        saved = orig_tokens - ref_tokens
+        rate = saved / orig_tokens if orig_tokens > 0 else 0.0
+        return RefinementResult(
+            original=text,
+            refined=refined,
+            original_tokens=orig_tokens,
+            refined_tokens=ref_tokens,
+            saved_tokens=saved,
+            reduction_rate=round(rate, 4),
+            applied_rules=applied.entries(),
+            analysis=report,
+        )
+
+    def _refine_segment(self, program: RewriteProgram, text: str) -> tuple[str, list[RuleHit]]:
+        """구간 하나에 규칙과 연속 공백 정리를 적용한다 (앞뒤 공백 제거는 하지 않는다)."""
+        text, hits = apply_rules(text, program.whitespace)
+        text, korean_hits = apply_rules(text, program.korean)
+        return _POST_CLEAN_SPACES.sub(" ", text), hits + korean_hits
+
+    def _from_cache(self, cached: RefinementResult, analysis: str) -> RefinementResult:
+        """캐시된 결과의 깊은 사본 (호출자가 적용 기록·분석 리포트를 고쳐도 캐시 항목은 바뀌지 않는다)"""
+        result = _copy_result(cached)
+        if analysis == "lazy":
+            result.analysis = LazyAnalysis(self.analyzer, cached.original)
+        return result
+
+    def _fix_whitespace(
+        self,
+        text: str,
+        known_spans: dict[str, list[tuple[int, int]]] | None = None,
+        rules: tuple[RewriteRule, ...] | None = None,
+    ) -> tuple[str, list[dict]]:
         """중복 공백/줄바꿈 정리"""
-        applied = []
-        original = text
-
-        # 연속 공백 → 단일 공백
-        new_text = re.sub(r" {2,}", " ", text)
-        if new_text != text:
-            applied.append({"rule": "연속 공백 제거", "category": "중복 공백/줄바꿈"})
-            text = new_text
-
-        # 연속 줄바꿈 → 최대 2개
-        new_text = re.sub(r"\n{3,}", "\n\n", text)
-        if new_text != text:
-            applied.append({"rule": "연속 줄바꿈 정리", "category": "중복 공백/줄바꿈"})
-            text = new_text
-
-        # 탭 → 공백
-        new_text = text.replace("\t", " ")
-        if new_text != text:
-            applied.append({"rule": "탭 → 공백 변환", "category": "중복 공백/줄바꿈"})
-            text = new_text
-
-        # 줄 끝 공백 제거
-        new_text = re.sub(r" +\n", "\n", text)
-        if new_text != text:
-            applied.append({"rule": "줄 끝 공백 제거", "category": "중복 공백/줄바꿈"})
-            text = new_text
-
-        return text, applied
+        text, hits = apply_rules(
+            text, compile_program().whitespace if rules is None else rules, known_spans,
+        )
+        return text, [_whitespace_entry(hit) for hit in hits if hit.changed]
 
     def _apply_selective_korean_rules(
         self,
         text: str,
         *,
-        polite: bool,
-        fillers: bool,
-        repetitive: bool,
-        unnecessary: bool,
+        rules: tuple[RewriteRule, ...],
+        known_spans: dict[str, list[tuple[int, int]]] | None = None,
     ) -> tuple[str, list[dict]]:
-        """선택된 한국어 규칙만 적용"""
-        from optimizer.rules.korean import (
-            POLITE_PATTERNS,
-            FILLER_PATTERNS,
-            REPETITIVE_INSTRUCTION_PATTERNS,
-            UNNECESSARY_INSTRUCTION_PATTERNS,
-        )
+        """
+        선택된 한국어 규칙만 적용
 
-        applied = []
-        rule_groups = []
-
-        if polite:
-            rule_groups.append(("과잉 공손 표현", POLITE_PATTERNS))
-        if fillers:
-            rule_groups.append(("불필요 접속사/수식어", FILLER_PATTERNS))
-        if repetitive:
-            rule_groups.append(("반복 강조 표현", REPETITIVE_INSTRUCTION_PATTERNS))
-        if unnecessary:
-            rule_groups.append(("불필요 지시 문구", UNNECESSARY_INSTRUCTION_PATTERNS))
-
-        for category, patterns in rule_groups:
-            for pattern, replacement in patterns:
-                matches = re.findall(pattern, text)
-                if matches:
-                    applied.append({
-                        "rule": f"'{matches[0]}' → '{replacement}'" if replacement else f"'{matches[0]}' 제거",
-                        "category": category,
-                        "count": len(matches),
-                    })
-                    text = re.sub(pattern, replacement, text)
-
-        return text, applied
+        Args:
+            rules: 적용할 규칙 (RewriteProgram.korean)
+            known_spans: text에 대해 이미 찾아 둔 패턴별 매칭 구간 (분석 리포트의 spans).
+                텍스트가 바뀌기 전까지만 사용하고, 이후 규칙은 현재 텍스트를 스캔한다.
+        """
+        text, hits = apply_rules(text, rules, known_spans)
+        return text, [_rule_entry(hit) for hit in hits]
 
     def _post_clean(self, text: str) -> str:
         """정제 후 후처리"""
         # 다시 연속 공백 정리 (규칙 적용 후 발생 가능)
-        text = re.sub(r" {2,}", " ", text)
+        text = _POST_CLEAN_SPACES.sub(" ", text)
         # 앞뒤 공백 제거
         text = text.strip()
         return text
+
+
+_POST_CLEAN_SPACES = re.compile(r" {2,}")
+
+
+def _copy_result(result: RefinementResult) -> RefinementResult:
+    """
+    결과 캐시에 넣고 꺼낼 때 쓰는 사본. 호출자가 고칠 수 있는 적용 기록, 분석 리포트,
+    고정점 기록은 모두 새로 만든다 (문자열·튜플 등 불변 값만 공유한다).
+    """
+    report = result.analysis
+    if type(report) is AnalysisReport:
+        report = replace(
+            report,
+            patterns_found=[replace(p, matches=list(p.matches)) for p in report.patterns_found],
+            spans={pattern: list(spans) for pattern, spans in report.spans.items()},
+        )
+    elif report is not None:
+        report = copy.deepcopy(report)
+    fixpoint = result.fixpoint
+    if fixpoint is not None:
+        fixpoint = replace(fixpoint, reruns=dict(fixpoint.reruns))
+    return replace(
+        result,
+        applied_rules=[dict(entry) for entry in result.applied_rules],
+        analysis=report,
+        fixpoint=fixpoint,
+    )
+
+
+def _whitespace_entry(hit: RuleHit) -> dict:
+    """공백 규칙의 applied_rules 항목"""
+    return {"rule": hit.rule.name, "category": hit.rule.category}
+
+
+def _rule_entry(hit: RuleHit) -> dict:
+    """한국어 규칙의 applied_rules 항목"""
+    replacement = hit.rule.replacement
+    return {
+        "rule": f"'{hit.first}' → '{replacement}'" if replacement else f"'{hit.first}' 제거",
+        "category": hit.rule.category,
+        "count": hit.count,
+    }
+
+
+class AppliedRules:
+    """
+    구간별 규칙 적용 기록을 합친다.
+
+    구간을 분할 문자(RewriteProgram.barrier) 뒤에서 잘랐다면, 규칙마다 첫 매칭은
+    처음 매칭된 구간의 것, 매칭 수는 구간별 합, 변경 여부는 구간별 OR이 전체 텍스트의
+    기록과 같다. entries()는 refine의 applied_rules와 같은 형식·순서로 돌려준다.
+    """
+
+    def __init__(self, program: RewriteProgram):
+        self.program = program
+        # 규칙 순서 → [첫 매칭, 매칭 수, 변경 여부]
+        self._merged: dict[int, list] = {}
+
+    def add(self, hits: list[RuleHit]):
+        """현재 프로세스에서 얻은 적용 기록을 합친다."""
+        self.add_indexed(self.index(hits))
+
+    def index(self, hits: list[RuleHit]) -> list[tuple[int, str | tuple, int, bool]]:
+        """적용 기록을 (규칙 순서, 첫 매칭, 매칭 수, 변경 여부) 목록으로 바꾼다 (직렬화용)."""
+        order = self.program.rule_index
+        return [(order[id(hit.rule)], hit.first, hit.count, hit.changed) for hit in hits]
+
+    def add_indexed(self, hits: list[tuple[int, str | tuple, int, bool]]):
+        """index()로 바꾼 적용 기록을 합친다 (입력 순서대로 호출한다)."""
+        for index, first, count, changed in hits:
+            merged = self._merged.get(index)
+            if merged is None:
+                self._merged[index] = [first, count, changed]
+            else:
+                merged[1] += count
+                merged[2] = merged[2] or changed
+
+    def entries(self) -> list[dict]:
+        """합친 기록을 applied_rules 항목 목록으로 만든다."""
+        rules = self.program.rules
+        applied = []
+        for index in sorted(self._merged):
+            first, count, changed = self._merged[index]
+            hit = RuleHit(rules[index], first, count, changed=changed)
+            if hit.rule.name is not None:
+                if changed:
+                    applied.append(_whitespace_entry(hit))
+            else:
+                applied.append(_rule_entry(hit))
+        return applied
+
+
+class RefinementStream:
+    """
+    PromptRefiner.refine_stream이 반환하는 반복자.
+
+    입력 조각을 모으다가 segment_chars를 넘으면 마지막 분할 문자 바로 뒤에서 잘라
+    앞부분을 정제해 내보내고, 나머지는 다음 조각과 이어 붙인다. 분할 문자가 없는
+    구간은 분할 문자가 나오거나 입력이 끝날 때까지 모은다.
+    원본·정제 토큰 수는 TokenStream으로 조각 단위로 센다.
+    """
+
+    def __init__(
+        self,
+        refiner: PromptRefiner,
+        program: RewriteProgram,
+        chunks: Iterable[str],
+        segment_chars: int = STREAM_SEGMENT_CHARS,
+    ):
+        self.refiner = refiner
+        self.program = program
+        self.segment_chars = segment_chars
+        self.result: StreamRefinement | None = None
+        self._chunks = chunks
+        self._pending: list[str] = []
+        self._pending_chars = 0
+        self._searched = 0                 # 분할 문자를 이미 찾아본 _pending 조각 수
+        # 토큰 수는 구간 크기 단위로 바로 세어 입력 전체가 대기열에 쌓이지 않게 한다
+        self._original = TokenStream(refiner.counter, batch_chars=segment_chars)
+        self._refined = TokenStream(refiner.counter, batch_chars=segment_chars)
+        self._original_chars = 0
+        self._refined_chars = 0
+        self._segments = 0
+        self._started = False              # 앞쪽 공백을 제거한 뒤 내용이 나왔는지
+        self._applied = AppliedRules(program)
+
+    def __iter__(self) -> Iterator[str]:
+        for chunk in self._chunks:
+            if not chunk:
+                continue
+            self._original.feed(chunk)
+            self._original_chars += len(chunk)
+            if not self.program.enabled:
+                yield self._emit(chunk)
+                continue
+            self._pending.append(chunk)
+            self._pending_chars += len(chunk)
+            if self._pending_chars >= self.segment_chars:
+                segment = self._take_segment()
+                if segment:
+                    piece = self._refine(segment, last=False)
+                    if piece:
+                        yield piece
+        if self._pending:
+            piece = self._refine("".join(self._pending), last=True)
+            self._pending = []
+            if piece:
+                yield piece
+        self._finish()
+
+    def _take_segment(self) -> str:
+        """마지막 분할 문자까지를 떼어 낸다. 분할 문자가 없으면 빈 문자열."""
+        barrier = self.program.barrier
+        if barrier is None:
+            return ""
+        for i in range(len(self._pending) - 1, self._searched - 1, -1):
+            cut = _last_match_end(barrier, self._pending[i])
+            if cut:
+                head = self._pending[:i] + [self._pending[i][:cut]]
+                rest = [self._pending[i][cut:]] + self._pending[i + 1:]
+                self._pending = [piece for piece in rest if piece]
+                self._pending_chars = sum(len(piece) for piece in self._pending)
+                # 남은 부분에는 분할 문자가 없다
+                self._searched = len(self._pending)
+                return "".join(head)
+        self._searched = len(self._pending)
+        return ""
+
+    def _refine(self, segment: str, last: bool) -> str:
+        self._segments += 1
+        refined, hits = self.refiner._refine_segment(self.program, segment)
+        self._applied.add(hits)
+        # 전체 텍스트의 strip(): 분할 문자는 공백이 아니고 지워지지 않으므로
+        # 첫 내용 앞과 마지막 구간 끝의 공백만 지우면 된다
+        if not self._started:
+            refined = refined.lstrip()
+            self._started = bool(refined)
+        if last:
+            refined = refined.rstrip()
+        return self._emit(refined)
+
+    def _emit(self, piece: str) -> str:
+        self._refined.feed(piece)
+        self._refined_chars += len(piece)
+        return piece
+
+    def _finish(self):
+        original_tokens = self._original.finish().total
+        refined_tokens = self._refined.finish().total
+        saved = original_tokens - refined_tokens
+        self.result = StreamRefinement(
+            original_tokens=original_tokens,
+            refined_tokens=refined_tokens,
+            saved_tokens=saved,
+            reduction_rate=round(saved / original_tokens, 4) if original_tokens > 0 else 0.0,
+            original_chars=self._original_chars,
+            refined_chars=self._refined_chars,
+            segments=self._segments,
+            applied_rules=self._applied.entries(),
+        )
+
+
+def _last_match_end(pattern: re.Pattern, text: str) -> int:
+    """text에서 pattern의 마지막 매칭 끝 위치 (없으면 0). 끝에서부터 창을 넓혀 가며 찾는다."""
+    end = len(text)
+    window = 256
+    while end > 0:
+        start = max(0, end - window)
+        last = None
+        for last in pattern.finditer(text, start, end):
+            pass
+        if last is not None:
+            return last.end()
+        end = start
+        window *= 2
+    return 0
+
+
+def split_at_barriers(text: str, barrier: re.Pattern | None, segment_chars: int) -> list[str]:
+    """
+    텍스트를 segment_chars 이상 지난 첫 분할 문자 바로 뒤에서 잘라 구간 목록을 만든다.
+    분할 문자 정규식이 없으면 전체를 한 구간으로 돌려준다.
+    """
+    if barrier is None:
+        return [text]
+    segments = []
+    pos = 0
+    while len(text) - pos > segment_chars:
+        match = barrier.search(text, pos + segment_chars)
+        if match is None:
+            break
+        segments.append(text[pos:match.end()])
+        pos = match.end()
+    if pos < len(text) or not segments:
+        segments.append(text[pos:])
+    return segments
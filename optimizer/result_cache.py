@@ -0,0 +1,151 @@
+"""
+정제 결과 캐시
+=============
+PromptRefiner.refine의 결과를 메모이제이션한다.
+
+키는 (텍스트 다이제스트, 모델, 인코딩, 재작성 프로그램 해시, 분석 포함 여부, 고정점 적용
+여부)로 만든다.
+재작성 프로그램 해시(RewriteProgram.digest)에는 fix_* 옵션과 켜진 규칙의 내용이
+모두 들어가므로, 규칙이 바뀌면 이전 항목은 키가 달라져 자동으로 무효가 된다.
+
+메모리 LRU 계층 위에 선택적으로 SQLite 파일 계층을 둘 수 있다. 파일 계층은 프로세스를
+다시 시작해도 유지되며, 값은 pickle로 저장하므로 신뢰할 수 있는 로컬 경로에만 둔다.
+"""
+
+import hashlib
+import pickle
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from optimizer.refiner import RefinementResult
+
+
+# 캐시 키 형식 버전 (RefinementResult 구조가 바뀌면 올린다)
+_KEY_VERSION = 2
+
+
+class RefinementCache:
+    """
+    정제 결과 캐시 (LRU, 스레드 안전, 선택적 SQLite 파일 계층).
+
+    메모리에서 찾지 못하면 파일 계층을 확인하고, 찾으면 메모리로 올린다.
+    저장은 두 계층에 모두 한다. 파일 계층에는 항목 수 상한을 두지 않는다.
+    """
+
+    def __init__(self, max_entries: int = 1024, path: str | None = None):
+        """
+        Args:
+            max_entries: 메모리 계층의 최대 항목 수
+            path: SQLite 파일 경로 (None이면 메모리 계층만 사용)
+        """
+        self.max_entries = max_entries
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[bytes, "RefinementResult"] = OrderedDict()
+        self._db: sqlite3.Connection | None = None
+        if path is not None:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS refinements (key BLOB PRIMARY KEY, value BLOB NOT NULL)"
+            )
+            self._db.commit()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(
+        text: str,
+        *,
+        model: str,
+        encoding_name: str,
+        ruleset: str,
+        with_analysis: bool,
+        fixpoint: bool = False,
+    ) -> bytes:
+        """캐시 키를 만든다. 텍스트 원문 대신 다이제스트를 보관한다."""
+        h = hashlib.blake2b(digest_size=20)
+        h.update(repr((_KEY_VERSION, model, encoding_name, ruleset, with_analysis, fixpoint)).encode())
+        h.update(text.encode("utf-8", "surrogatepass"))
+        return h.digest()
+
+    def get(self, key: bytes) -> "RefinementResult | None":
+        """캐시된 정제 결과를 반환한다. 없으면 None."""
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return result
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value FROM refinements WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    try:
+                        result = pickle.loads(row[0])
+                    except Exception:
+                        # 구조가 바뀐 옛 항목: 지우고 없는 것으로 본다
+                        self._db.execute("DELETE FROM refinements WHERE key = ?", (key,))
+                        self._db.commit()
+                    else:
+                        self._remember(key, result)
+                        self.disk_hits += 1
+                        return result
+            self.misses += 1
+            return None
+
+    def put(self, key: bytes, result: "RefinementResult"):
+        """정제 결과를 저장하고 메모리 상한을 넘으면 LRU 항목을 제거한다."""
+        with self._lock:
+            self._remember(key, result)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO refinements (key, value) VALUES (?, ?)",
+                    (key, pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)),
+                )
+                self._db.commit()
+
+    def _remember(self, key: bytes, result: "RefinementResult"):
+        self._entries[key] = result
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        """모든 항목(파일 계층 포함)과 통계를 초기화한다."""
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM refinements")
+                self._db.commit()
+            self.hits = self.disk_hits = self.misses = self.evictions = 0
+
+    def close(self):
+        """파일 계층 연결을 닫는다 (메모리 계층은 계속 사용할 수 있다)."""
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def stats(self) -> dict:
+        """캐시 현황을 반환한다."""
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round((self.hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+            }
+
+
+# PromptRefiner(result_cache=True)가 사용하는 공유 캐시
+SHARED_REFINEMENT_CACHE = RefinementCache()
@@ -0,0 +1,198 @@
+"""
+규칙 실행 엔진
+=============
+정제 규칙을 텍스트에 차례로 적용하는 공용 실행기.
+PromptRefiner, apply_korean_rules, apply_learned_patterns가 모두 이 실행기를 쓴다.
+
+규칙마다 치환 콜백을 넘긴 `subn`을 한 번만 실행하고, 콜백이 치환하면서 첫 매칭,
+매칭 수, 매칭 구간을 기록한다. 매칭을 세기 위한 `findall`과 치환을 위한 `sub`로
+같은 텍스트를 두 번 훑지 않는다.
+"""
+
+import re
+from dataclasses import dataclass, field
+from functools import cached_property, lru_cache
+from typing import Callable
+
+from optimizer.rules.literals import required_literals
+
+
+@dataclass(frozen=True)
+class RewriteRule:
+    """
+    컴파일된 치환 규칙 하나.
+    정규식은 compiled에 처음 접근할 때 컴파일한다 (규칙 팩의 웜 스타트는 컴파일하지 않는다).
+    """
+    pattern: str
+    replacement: str | Callable[[str], str]
+    category: str
+    literals: frozenset[str] | None     # 매칭에 반드시 필요한 리터럴 (None이면 항상 실행)
+    name: str | None = None             # 고정된 적용 규칙 이름 (공백 규칙)
+    template: bool = False              # 대체 문자열에 역참조 등 이스케이프가 있는지
+
+    @cached_property
+    def compiled(self) -> re.Pattern:
+        return re.compile(self.pattern)
+
+    def may_fire(self, text: str) -> bool:
+        """텍스트에서 매칭될 가능성이 있는지 (필수 리터럴 검사)"""
+        return self.literals is None or any(literal in text for literal in self.literals)
+
+
+@dataclass
+class RuleHit:
+    """규칙 하나를 적용한 기록"""
+    rule: RewriteRule
+    first: str | tuple          # 첫 매칭 (re.findall 결과의 첫 원소와 같은 값)
+    count: int                  # 매칭 수
+    spans: list[tuple[int, int]] = field(default_factory=list)   # 치환 전 텍스트 기준 구간
+    changed: bool = False       # 텍스트가 실제로 바뀌었는지
+    regions: list[tuple[int, int]] = field(default_factory=list) # 치환 후 텍스트에서 대체 문자열 구간
+
+
+def compile_rule(
+    pattern: str,
+    replacement: str | Callable[[str], str],
+    category: str,
+    name: str | None = None,
+) -> RewriteRule:
+    """(패턴, 대체 문자열 또는 함수, 카테고리)를 RewriteRule로 컴파일한다."""
+    rule = RewriteRule(
+        pattern=pattern,
+        replacement=replacement,
+        category=category,
+        literals=required_literals(pattern),
+        name=name,
+        template=isinstance(replacement, str) and "\\" in replacement,
+    )
+    rule.compiled       # 잘못된 패턴은 여기서 re.error
+    return rule
+
+
+@lru_cache(maxsize=64)
+def compile_rules(rules: tuple[tuple[str, str, str], ...]) -> tuple[RewriteRule, ...]:
+    """(패턴, 대체 문자열, 카테고리) 목록을 컴파일한다 (같은 목록이면 공유)."""
+    return tuple(compile_rule(pattern, replacement, category) for pattern, replacement, category in rules)
+
+
+def apply_rule(
+    text: str,
+    rule: RewriteRule,
+    spans: list[tuple[int, int]] | None = None,
+) -> tuple[str, RuleHit | None]:
+    """
+    규칙 하나를 적용한다.
+
+    Args:
+        spans: text에서 이미 찾아 둔 매칭 구간 (있으면 정규식을 실행하지 않는다)
+
+    Returns:
+        (치환된 텍스트, 적용 기록 — 매칭이 없으면 None)
+    """
+    if spans is not None and not rule.template:
+        if not spans:
+            return text, None
+        new_text, regions = _rewrite(text, spans, rule)
+        start, end = spans[0]
+        first = text[start:end] if not rule.compiled.groups \
+            else _findall_value(rule.compiled.match(text, start))
+        return new_text, RuleHit(rule, first, len(spans), spans, new_text != text, regions)
+
+    hit = RuleHit(rule, "", 0)
+    replacement = rule.replacement
+    shift = 0       # 지금까지의 치환으로 늘어난 길이
+
+    def substitute(match: re.Match) -> str:
+        nonlocal shift
+        if not hit.count:
+            hit.first = _findall_value(match)
+        hit.count += 1
+        start, end = match.span()
+        hit.spans.append((start, end))
+        if rule.template:
+            output = match.expand(replacement)
+        elif isinstance(replacement, str):
+            output = replacement
+        else:
+            output = replacement(match.group())
+        hit.regions.append((start + shift, start + shift + len(output)))
+        shift += len(output) - (end - start)
+        return output
+
+    new_text, count = rule.compiled.subn(substitute, text)
+    if not count:
+        return text, None
+    hit.changed = new_text != text
+    return new_text, hit
+
+
+def apply_rules(
+    text: str,
+    rules: tuple[RewriteRule, ...] | list[RewriteRule],
+    known_spans: dict[str, list[tuple[int, int]]] | None = None,
+) -> tuple[str, list[RuleHit]]:
+    """
+    규칙을 순서대로 적용한다.
+
+    필수 리터럴이 현재 텍스트에 없는 규칙은 실행하지 않는다. 앞선 치환으로 텍스트가
+    바뀌므로 촉발 여부는 규칙마다 현재 텍스트로 확인한다.
+
+    Args:
+        known_spans: text에 대해 이미 찾아 둔 패턴별 매칭 구간 (분석 리포트의 spans).
+            텍스트가 처음 바뀌기 전까지만 사용하고, 이후 규칙은 현재 텍스트를 스캔한다.
+
+    Returns:
+        (치환된 텍스트, 매칭이 있었던 규칙의 적용 기록 목록)
+    """
+    hits = []
+    for rule in rules:
+        spans = None
+        if known_spans is not None and rule.pattern in known_spans:
+            spans = known_spans[rule.pattern]
+        elif not rule.may_fire(text):
+            continue
+        text, hit = apply_rule(text, rule, spans)
+        if hit is not None:
+            hits.append(hit)
+            if hit.changed:
+                known_spans = None
+    return text, hits
+
+
+def _findall_value(match: re.Match) -> str | tuple:
+    """매칭 하나에 대한 re.findall의 원소 (그룹 수에 따라 전체 문자열, 그룹 값, 그룹 튜플)"""
+    groups = match.re.groups
+    if groups == 0:
+        return match.group()
+    if groups == 1:
+        return match.group(1) or ""
+    return tuple(value or "" for value in match.groups())
+
+
+def _rewrite(
+    text: str,
+    spans: list[tuple[int, int]],
+    rule: RewriteRule,
+) -> tuple[str, list[tuple[int, int]]]:
+    """
+    매칭 구간을 왼쪽부터 한 번에 치환한다 (re.sub와 같은 결과).
+    역참조 등 이스케이프가 있는 대체 문자열은 쓰지 않는다 (apply_rule이 subn으로 처리).
+
+    Returns:
+        (치환된 텍스트, 치환 후 텍스트에서 대체 문자열 구간 목록)
+    """
+    replacement = rule.replacement
+    parts = []
+    regions = []
+    size = 0        # parts에 쌓인 문자 수
+    last = 0
+    for start, end in spans:
+        parts.append(text[last:start])
+        size += start - last
+        output = replacement if isinstance(replacement, str) else replacement(text[start:end])
+        parts.append(output)
+        regions.append((size, size + len(output)))
+        size += len(output)
+        last = end
+    parts.append(text[last:])
+    return "".join(parts), regions
@@ -4,7 +4,7 @@
 한국어 프롬프트에서 자주 발생하는 토큰 낭비 패턴을 정의한다.
 """
 
-import re
+from optimizer.rules.engine import apply_rules, compile_rules
 
 # ──────────────────────────────────────
 # 패턴 1: 과잉 공손 표현
@@ -103,15 +103,15 @@ def apply_korean_rules(text: str) -> tuple[str, list[dict]]:
     Returns:
         tuple: (정제된 텍스트, [{"category": str, "pattern": str, "count": int}, ...])
     """
-    applied = []
-    for pattern, replacement, category in get_all_korean_rules():
-        matches = re.findall(pattern, text)
-        if matches:
-            applied.append({
-                "category": category,
-                "pattern": pattern,
-                "matched": matches[0] if matches else "",
-                "count": len(matches),
-            })
-            text = re.sub(pattern, replacement, text)
+    # 필수 리터럴이 현재 텍스트에 없는 규칙은 정규식을 실행하지 않는다
+    text, hits = apply_rules(text, compile_rules(tuple(get_all_korean_rules())))
+    applied = [
+        {
+            "category": hit.rule.category,
+            "pattern": hit.rule.pattern,
+            "matched": hit.first,
+            "count": hit.count,
+        }
+        for hit in hits
+    ]
     return text, applied
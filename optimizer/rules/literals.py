@@ -0,0 +1,330 @@
+"""
+필수 리터럴 프리필터
+===================
+정규식 규칙마다 "매칭이 있으려면 텍스트에 반드시 들어 있어야 하는 문자열" 집합을
+추출해, 텍스트에 그 문자열이 하나도 없는 규칙은 정규식을 실행하지 않고 건너뛴다.
+
+예) `(?:제가|내가)\\s+(?:지금부터|이제)\\s+` → {"제가", "내가"} 중 하나는 반드시 포함
+    `안녕하세요[,.]?\\s*`                  → {"안녕하세요"}
+
+추출할 수 없는 규칙(문자 범주로만 이루어진 패턴, 대소문자 무시 등)은 항상 실행한다.
+"""
+
+import re
+from itertools import product
+
+try:
+    from re import _parser as sre_parse        # Python 3.11+
+except ImportError:  # pragma: no cover
+    import sre_parse
+
+
+# 리터럴 후보 집합의 최대 크기 (alternation 조합이 이보다 커지면 나눠서 본다)
+_MAX_ALTERNATIVES = 32
+# 반복을 펼쳐 리터럴로 볼 최대 횟수 (예: " {2,}" → "  ")
+_MAX_REPEAT_UNROLL = 8
+
+
+class LiteralTrigger:
+    """
+    규칙별 필수 리터럴로 실행할 규칙을 고르는 다중 패턴 리터럴 매처.
+
+    서로 다른 리터럴마다 부분 문자열 검색(str의 C 구현)을 한 번씩 하고,
+    등장한 리터럴에 연결된 규칙만 모은다. 여러 규칙이 공유하는 리터럴은 한 번만 찾는다.
+    """
+
+    def __init__(self, patterns: list[str]):
+        """
+        Args:
+            patterns: 정규식 패턴 목록 (규칙 번호는 목록의 순서)
+        """
+        self.literals: list[frozenset[str] | None] = [required_literals(p) for p in patterns]
+        # 리터럴 → 그 리터럴로 촉발되는 규칙 번호
+        self._rules_by_literal: dict[str, list[int]] = {}
+        self._always: list[int] = []
+        for index, literals in enumerate(self.literals):
+            if literals is None:
+                self._always.append(index)
+                continue
+            for literal in literals:
+                self._rules_by_literal.setdefault(literal, []).append(index)
+
+    def triggered(self, text: str) -> list[int]:
+        """텍스트에서 매칭될 가능성이 있는 규칙 번호 목록 (오름차순)"""
+        hits = set(self._always)
+        for literal, rules in self._rules_by_literal.items():
+            if literal in text:
+                hits.update(rules)
+        return sorted(hits)
+
+    def may_fire(self, index: int, text: str) -> bool:
+        """규칙 index가 텍스트에서 매칭될 가능성이 있는지"""
+        literals = self.literals[index]
+        return literals is None or any(literal in text for literal in literals)
+
+
+def required_literals(pattern: str) -> frozenset[str] | None:
+    """
+    패턴의 모든 매칭이 적어도 하나를 포함하는 문자열 집합.
+    정할 수 없으면 None (항상 실행해야 하는 규칙).
+    """
+    try:
+        parsed = sre_parse.parse(pattern)
+    except re.error:
+        return None
+    if parsed.state.flags & re.IGNORECASE:
+        return None
+    _, required = _sequence(list(parsed))
+    return required
+
+
+def _score(literals: frozenset[str]) -> tuple[int, int]:
+    """선택도 점수: 가장 짧은 리터럴이 길수록, 후보가 적을수록 좋다."""
+    return min(len(s) for s in literals), -len(literals)
+
+
+def _better(a: frozenset[str] | None, b: frozenset[str] | None) -> frozenset[str] | None:
+    if a is None or (b is not None and _score(b) > _score(a)):
+        return b
+    return a
+
+
+def _useful(literals: set[str] | frozenset[str] | None) -> frozenset[str] | None:
+    """빈 문자열이 섞인 후보는 아무 텍스트나 통과시키므로 버린다."""
+    if not literals or "" in literals:
+        return None
+    # 다른 후보를 포함하는 후보는 중복이다 ("안녕하세요." ⊃ "안녕하세요")
+    return frozenset(
+        s for s in literals
+        if not any(t != s and t in s for t in literals)
+    )
+
+
+def _sequence(items: list) -> tuple[set[str] | None, frozenset[str] | None]:
+    """
+    항목 나열의 (정확한 매칭 문자열 집합, 필수 리터럴 집합).
+    정확한 집합은 나열 전체가 유한한 문자열 몇 개로만 매칭될 때만 구한다.
+    """
+    best = None
+    run: set[str] | None = {""}    # 지금까지 이어진 연속 리터럴 조합
+    exact = True
+    for op, av in items:
+        item_exact, item_required, item_prefix = _item(op, av)
+        best = _better(best, item_required)
+        if item_exact is not None and run is not None:
+            if len(run) * len(item_exact) <= _MAX_ALTERNATIVES:
+                run = {a + b for a, b in product(run, item_exact)}
+                continue
+            best = _better(best, _useful(run))
+            run = set(item_exact)
+            exact = False
+            continue
+        exact = False
+        # 반복처럼 앞부분만 확정된 항목은 현재 조합에 이어 붙인 뒤 끊는다
+        if item_prefix is not None and run is not None \
+                and len(run) * len(item_prefix) <= _MAX_ALTERNATIVES:
+            run = {a + b for a, b in product(run, item_prefix)}
+        best = _better(best, _useful(run))
+        run = {""} if item_exact is None else set(item_exact)
+    best = _better(best, _useful(run))
+    return (run if exact else None), best
+
+
+def _item(op, av) -> tuple[set[str] | None, frozenset[str] | None, set[str] | None]:
+    """
+    항목 하나의 (정확한 매칭 문자열 집합, 필수 리터럴 집합, 확정된 접두 문자열 집합).
+    """
+    name = str(op)
+    if name == "LITERAL":
+        return {chr(av)}, None, None
+    if name == "IN":
+        chars = set()
+        for in_op, in_av in av:
+            if str(in_op) != "LITERAL":
+                return None, None, None
+            chars.add(chr(in_av))
+        if len(chars) > _MAX_ALTERNATIVES:
+            return None, None, None
+        return chars, None, None
+    if name == "AT":
+        return {""}, None, None        # 폭이 없는 위치 조건
+    if name == "SUBPATTERN":
+        _, add_flags, del_flags, sub = av
+        if add_flags & re.IGNORECASE:
+            return None, None, None
+        exact, required = _sequence(list(sub))
+        return exact, required, None
+    if name == "BRANCH":
+        exact: set[str] | None = set()
+        required: set[str] | None = set()
+        for alternative in av[1]:
+            alt_exact, alt_required = _sequence(list(alternative))
+            if exact is not None and alt_exact is not None:
+                exact |= alt_exact
+            else:
+                exact = None
+            alt_best = _better(alt_required, _useful(alt_exact))
+            if required is not None and alt_best is not None:
+                required |= alt_best
+            else:
+                required = None
+        if exact is not None and len(exact) > _MAX_ALTERNATIVES:
+            exact = None
+        if required is not None and len(required) > _MAX_ALTERNATIVES:
+            required = None
+        return exact, _useful(required), None
+    if name in ("MAX_REPEAT", "MIN_REPEAT", "POSSESSIVE_REPEAT"):
+        low, high, sub = av
+        sub_exact, sub_required = _sequence(list(sub))
+        if sub_exact is None:
+            return None, (sub_required if low > 0 else None), None
+        if low == 0 and high == 1:
+            return {""} | sub_exact, None, None
+        if low == 0 or low > _MAX_REPEAT_UNROLL or len(sub_exact) ** low > _MAX_ALTERNATIVES:
+            return None, (_useful(sub_exact) if low > 0 else None), None
+        unrolled = {"".join(parts) for parts in product(sub_exact, repeat=low)}
+        if high == low:
+            return unrolled, None, None
+        return None, _useful(unrolled), unrolled
+    return None, None, None
+
+
+# 알파벳으로 펼칠 문자 범위의 최대 크기 (예: [가-힣]은 너무 커서 알 수 없음으로 본다)
+_MAX_RANGE_CHARS = 256
+
+
+def match_alphabet(pattern: str) -> tuple[frozenset[str], bool] | None:
+    """
+    패턴의 매칭에 나타날 수 있는 문자 집합.
+
+    Returns:
+        (문자 집합, 공백 문자 포함 여부). 다음 경우에는 None:
+        빈 문자열과 매칭될 수 있음, `.`·부정 문자 집합·공백 외 문자 범주,
+        대소문자 무시, 텍스트 끝(`$`) 외의 위치 조건, 전후방 탐색, 역참조.
+    """
+    try:
+        parsed = sre_parse.parse(pattern)
+    except re.error:
+        return None
+    if parsed.state.flags & re.IGNORECASE or parsed.getwidth()[0] == 0:
+        return None
+    chars: set[str] = set()
+    spaces = _alphabet(list(parsed), chars)
+    if spaces is None:
+        return None
+    return frozenset(chars), spaces
+
+
+def _alphabet(items: list, chars: set[str]) -> bool | None:
+    """항목들의 문자를 chars에 모은다. 공백 범주 포함 여부, 알 수 없으면 None."""
+    spaces = False
+    for op, av in items:
+        name = str(op)
+        if name == "LITERAL":
+            chars.add(chr(av))
+            continue
+        if name == "IN":
+            for in_op, in_av in av:
+                in_name = str(in_op)
+                if in_name == "LITERAL":
+                    chars.add(chr(in_av))
+                elif in_name == "RANGE" and in_av[1] - in_av[0] < _MAX_RANGE_CHARS:
+                    chars.update(chr(c) for c in range(in_av[0], in_av[1] + 1))
+                elif in_name == "CATEGORY" and str(in_av) == "CATEGORY_SPACE":
+                    spaces = True
+                else:
+                    return None
+            continue
+        if name == "AT":
+            if str(av) not in ("AT_END", "AT_END_STRING"):
+                return None
+            continue
+        if name == "SUBPATTERN":
+            _, add_flags, _, sub = av
+            if add_flags & re.IGNORECASE:
+                return None
+            sub_items = list(sub)
+        elif name == "BRANCH":
+            sub_items = [item for alternative in av[1] for item in alternative]
+        elif name in ("MAX_REPEAT", "MIN_REPEAT", "POSSESSIVE_REPEAT"):
+            sub_items = list(av[2])
+        elif name == "ATOMIC_GROUP":
+            sub_items = list(av)
+        else:
+            return None
+        sub_spaces = _alphabet(sub_items, chars)
+        if sub_spaces is None:
+            return None
+        spaces = spaces or sub_spaces
+    return spaces
+
+
+# match_pairs에서 모든 공백 문자를 대신하는 문자
+SPACE = " "
+
+
+def match_pairs(pattern: str) -> frozenset[tuple[str, str]] | None:
+    """
+    매칭 안에서 연달아 나올 수 있는 두 문자의 집합 (공백 문자는 모두 SPACE로 나타낸다).
+    match_alphabet이 None인 패턴은 None.
+
+    예) `혹시\\s*` → {("혹", "시"), ("시", " "), (" ", " ")}
+    """
+    if match_alphabet(pattern) is None:
+        return None
+    return frozenset(_edges(list(sre_parse.parse(pattern)))[3])
+
+
+def _edges(items: list) -> tuple[bool, set[str], set[str], set[tuple[str, str]]]:
+    """
+    항목 나열의 (빈 매칭 가능 여부, 첫 문자, 마지막 문자, 연속 문자 쌍).
+    match_alphabet이 받아들인 패턴에만 쓴다.
+    """
+    nullable, first, last, pairs = True, set(), set(), set()
+    for op, av in items:
+        name = str(op)
+        if name in ("LITERAL", "IN"):
+            chars = _class_chars(op, av)
+            sub = (False, chars, chars, set())
+        elif name == "AT":
+            sub = (True, set(), set(), set())
+        elif name == "SUBPATTERN":
+            sub = _edges(list(av[3]))
+        elif name == "ATOMIC_GROUP":
+            sub = _edges(list(av))
+        elif name == "BRANCH":
+            sub = (False, set(), set(), set())
+            for alternative in av[1]:
+                alt = _edges(list(alternative))
+                sub = (sub[0] or alt[0], sub[1] | alt[1], sub[2] | alt[2], sub[3] | alt[3])
+        else:   # MAX_REPEAT, MIN_REPEAT, POSSESSIVE_REPEAT
+            low, high, item = av
+            sub_nullable, sub_first, sub_last, sub_pairs = _edges(list(item))
+            if high > 1:
+                sub_pairs = sub_pairs | set(product(sub_last, sub_first))
+            sub = (low == 0 or sub_nullable, sub_first, sub_last, sub_pairs)
+        sub_nullable, sub_first, sub_last, sub_pairs = sub
+        pairs |= sub_pairs | set(product(last, sub_first))
+        if nullable:
+            first |= sub_first
+        last = sub_last | last if sub_nullable else set(sub_last)
+        nullable = nullable and sub_nullable
+    return nullable, first, last, pairs
+
+
+def _class_chars(op, av) -> set[str]:
+    """LITERAL·IN 항목의 문자 (공백은 SPACE로)"""
+    if str(op) == "LITERAL":
+        members = [(op, av)]
+    else:
+        members = av
+    chars = set()
+    for in_op, in_av in members:
+        in_name = str(in_op)
+        if in_name == "LITERAL":
+            chars.add(chr(in_av))
+        elif in_name == "RANGE":
+            chars.update(chr(c) for c in range(in_av[0], in_av[1] + 1))
+        else:   # CATEGORY_SPACE
+            chars.add(SPACE)
+    return {SPACE if c.isspace() else c for c in chars}
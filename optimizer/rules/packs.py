@@ -0,0 +1,234 @@
+"""
+규칙 팩
+=======
+JSON/YAML 파일로 배포하는 정제 규칙 묶음. 코드 배포 없이 도메인·고객사별 규칙을 추가한다.
+
+    {
+      "name": "tenant-acme",
+      "rules": [
+        {"category": "고객사 용어", "pattern": "저희\\\\s+회사의\\\\s+", "replacement": "당사 ",
+         "domain": "코드생성", "priority": 10}
+      ]
+    }
+
+규칙 항목:
+  - category:    카테고리 (필수)
+  - pattern:     정규식 (필수, 빈 문자열과 매칭되면 안 된다)
+  - replacement: 대체 문자열 (기본 "", 역참조 사용 가능)
+  - domain:      적용 도메인 (DOMAIN_KEYWORDS의 키, 생략하면 모든 도메인)
+  - priority:    높을수록 먼저 적용 (기본 0 — 내장 학습 패턴과 같고, 같으면 내장 패턴 다음에
+                 파일 순서대로 적용)
+
+처음 읽을 때 스키마와 정규식을 검증하고 필수 리터럴을 추출한 결과를, 파일 내용
+해시를 이름으로 cache_dir에 marshal로 저장한다. 같은 내용을 다시 읽으면(웜 스타트)
+파일 파싱·검증·정규식 분석을 모두 건너뛰고, 정규식은 규칙이 처음 실행될 때 컴파일한다.
+"""
+
+import hashlib
+import json
+import marshal
+import os
+import re
+from dataclasses import dataclass
+
+from optimizer.rules.engine import RewriteRule
+from optimizer.rules.literals import required_literals
+
+try:
+    import yaml
+except ImportError:  # pragma: no cover
+    yaml = None
+
+
+# YAML로 읽는 파일 확장자 (나머지는 JSON)
+YAML_SUFFIXES = (".yaml", ".yml")
+# 디스크 캐시 형식 버전 (저장하는 레코드 구조가 바뀌면 올린다)
+_CACHE_FORMAT = 1
+# 허용하는 키
+_PACK_KEYS = frozenset({"name", "rules"})
+_RULE_KEYS = frozenset({"category", "pattern", "replacement", "domain", "priority"})
+
+
+class RulePackError(ValueError):
+    """규칙 팩 파일이 스키마에 맞지 않을 때"""
+
+
+@dataclass(frozen=True)
+class PackRule:
+    """규칙 팩의 규칙 하나"""
+    rule: RewriteRule
+    domain: str | None          # None이면 모든 도메인
+    priority: int
+
+
+@dataclass(frozen=True, eq=False)
+class RulePack:
+    """검증·컴파일된 규칙 팩"""
+    name: str
+    digest: str                 # 파일 내용 해시 (디스크 캐시 키)
+    rules: tuple[PackRule, ...] # 파일 순서
+
+    def rules_for(self, domain: str) -> tuple[PackRule, ...]:
+        """도메인에 적용할 규칙 (도메인을 지정하지 않은 규칙 포함, 파일 순서)"""
+        return tuple(entry for entry in self.rules if entry.domain in (None, domain))
+
+
+def load_rule_pack(path: str, cache_dir: str | None = None) -> RulePack:
+    """
+    규칙 팩 파일을 읽는다.
+
+    Args:
+        path: JSON 또는 YAML(.yaml, .yml) 파일 경로
+        cache_dir: 검증·분석 결과를 저장할 디렉터리 (None이면 디스크 캐시를 쓰지 않는다)
+
+    Raises:
+        RulePackError: 파일 형식이나 규칙이 스키마에 맞지 않을 때
+        OSError: 파일을 읽을 수 없을 때
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    is_yaml = path.lower().endswith(YAML_SUFFIXES)
+    h = hashlib.blake2b(repr((_CACHE_FORMAT, is_yaml)).encode(), digest_size=16)
+    h.update(data)
+    digest = h.hexdigest()
+
+    cache_path = os.path.join(cache_dir, f"{digest}.rulepack") if cache_dir else None
+    if cache_path is not None:
+        cached = _read_cache(cache_path)
+        if cached is not None:
+            name, records = cached
+            return _build(name, digest, records)
+
+    name, records = _validate(_parse(data, path, is_yaml), path)
+    if cache_path is not None:
+        _write_cache(cache_path, name, records)
+    return _build(name, digest, records)
+
+
+def _parse(data: bytes, path: str, is_yaml: bool):
+    try:
+        text = data.decode("utf-8-sig")
+    except UnicodeDecodeError as exc:
+        raise RulePackError(f"{path}: UTF-8 파일이 아닙니다: {exc}") from None
+    if is_yaml:
+        if yaml is None:
+            raise RulePackError(f"{path}: YAML 규칙 팩을 읽으려면 PyYAML이 필요합니다.")
+        try:
+            return yaml.safe_load(text)
+        except yaml.YAMLError as exc:
+            raise RulePackError(f"{path}: YAML 형식 오류: {exc}") from None
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError as exc:
+        raise RulePackError(f"{path}: JSON 형식 오류: {exc}") from None
+
+
+def _validate(document, path: str) -> tuple[str, list[tuple]]:
+    """
+    문서를 검증하고 (팩 이름, 규칙 레코드 목록)을 돌려준다.
+    레코드: (패턴, 대체 문자열, 카테고리, 도메인, 우선순위, 필수 리터럴, 역참조 사용 여부)
+    """
+    from optimizer.learned_optimizer import DOMAIN_KEYWORDS
+
+    if not isinstance(document, dict):
+        raise RulePackError(f"{path}: 최상위는 객체여야 합니다.")
+    unknown = set(document) - _PACK_KEYS
+    if unknown:
+        raise RulePackError(f"{path}: 알 수 없는 키: {', '.join(sorted(map(str, unknown)))}")
+    name = document.get("name", os.path.splitext(os.path.basename(path))[0])
+    if not isinstance(name, str) or not name:
+        raise RulePackError(f"{path}: name은 비어 있지 않은 문자열이어야 합니다.")
+    rules = document.get("rules")
+    if not isinstance(rules, list):
+        raise RulePackError(f"{path}: rules는 목록이어야 합니다.")
+
+    records = []
+    for i, entry in enumerate(rules):
+        where = f"{path}: rules[{i}]"
+        if not isinstance(entry, dict):
+            raise RulePackError(f"{where}: 규칙은 객체여야 합니다.")
+        unknown = set(entry) - _RULE_KEYS
+        if unknown:
+            raise RulePackError(f"{where}: 알 수 없는 키: {', '.join(sorted(map(str, unknown)))}")
+        category = entry.get("category")
+        pattern = entry.get("pattern")
+        replacement = entry.get("replacement", "")
+        domain = entry.get("domain")
+        priority = entry.get("priority", 0)
+        if not isinstance(category, str) or not category:
+            raise RulePackError(f"{where}: category는 비어 있지 않은 문자열이어야 합니다.")
+        if not isinstance(pattern, str) or not pattern:
+            raise RulePackError(f"{where}: pattern은 비어 있지 않은 문자열이어야 합니다.")
+        if not isinstance(replacement, str):
+            raise RulePackError(f"{where}: replacement는 문자열이어야 합니다.")
+        if domain is not None and domain not in DOMAIN_KEYWORDS:
+            raise RulePackError(
+                f"{where}: domain은 {', '.join(DOMAIN_KEYWORDS)} 중 하나여야 합니다: {domain!r}"
+            )
+        if not isinstance(priority, int) or isinstance(priority, bool):
+            raise RulePackError(f"{where}: priority는 정수여야 합니다.")
+        try:
+            compiled = re.compile(pattern)
+        except re.error as exc:
+            raise RulePackError(f"{where}: 정규식 오류: {exc}") from None
+        if compiled.fullmatch(""):
+            raise RulePackError(f"{where}: 빈 문자열과 매칭되는 패턴은 쓸 수 없습니다: {pattern!r}")
+        template = "\\" in replacement
+        if template:
+            try:
+                compiled.sub(replacement, "")
+            except (re.error, IndexError) as exc:
+                raise RulePackError(f"{where}: 대체 문자열 오류: {exc}") from None
+        records.append((
+            pattern, replacement, category, domain, priority, required_literals(pattern), template,
+        ))
+    return name, records
+
+
+def _build(name: str, digest: str, records: list[tuple]) -> RulePack:
+    """검증된 레코드로 RulePack을 만든다 (정규식은 컴파일하지 않는다)."""
+    return RulePack(
+        name=name,
+        digest=digest,
+        rules=tuple(
+            PackRule(
+                rule=RewriteRule(
+                    pattern=pattern,
+                    replacement=replacement,
+                    category=category,
+                    literals=literals,
+                    template=template,
+                ),
+                domain=domain,
+                priority=priority,
+            )
+            for pattern, replacement, category, domain, priority, literals, template in records
+        ),
+    )
+
+
+def _read_cache(cache_path: str) -> tuple[str, list[tuple]] | None:
+    """디스크 캐시를 읽는다. 없거나 깨졌거나 형식이 다르면 None."""
+    try:
+        with open(cache_path, "rb") as f:
+            stored = marshal.loads(f.read())
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    if not isinstance(stored, tuple) or len(stored) != 3 or stored[0] != _CACHE_FORMAT:
+        return None
+    return stored[1], stored[2]
+
+
+def _write_cache(cache_path: str, name: str, records: list[tuple]):
+    """디스크 캐시를 저장한다 (실패해도 규칙 팩 읽기는 계속한다)."""
+    temp_path = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        with open(temp_path, "wb") as f:
+            f.write(marshal.dumps((_CACHE_FORMAT, name, records)))
+        os.replace(temp_path, cache_path)
+    except OSError:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
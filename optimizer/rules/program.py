@@ -0,0 +1,155 @@
+"""
+재작성 프로그램
+==============
+PromptRefiner가 적용할 규칙 목록을 미리 컴파일해 둔 불변 객체.
+
+정제 옵션(공백·공손·접속사·반복 강조·불필요 지시) 다섯 개의 조합마다 실행할 규칙,
+컴파일된 정규식, 대체 문자열, 카테고리, 필수 리터럴을 한 번만 준비한다.
+조합은 처음 요청될 때 만들어 캐시하므로 refine 호출은 준비된 프로그램을 고르기만 한다.
+"""
+
+import hashlib
+import re
+from dataclasses import dataclass
+from functools import cached_property, lru_cache
+
+from optimizer.rules.engine import RewriteRule, compile_rule, compile_rules
+from optimizer.rules.literals import match_alphabet
+from optimizer.rules.scheduler import RuleGraph
+from optimizer.rules.korean import (
+    POLITE_PATTERNS,
+    FILLER_PATTERNS,
+    REPETITIVE_INSTRUCTION_PATTERNS,
+    UNNECESSARY_INSTRUCTION_PATTERNS,
+)
+
+
+WHITESPACE_CATEGORY = "중복 공백/줄바꿈"
+
+
+def _tabs_to_spaces(run: str) -> str:
+    return " " * len(run)
+
+
+# 공백 정리 단계: (패턴, 대체 문자열 또는 함수, 적용 규칙 이름)
+WHITESPACE_STEPS = [
+    (r" {2,}", " ", "연속 공백 제거"),            # 연속 공백 → 단일 공백
+    (r"\n{3,}", "\n\n", "연속 줄바꿈 정리"),     # 연속 줄바꿈 → 최대 2개
+    (r"\t+", _tabs_to_spaces, "탭 → 공백 변환"),  # 탭 → 공백
+    (r" +\n", "\n", "줄 끝 공백 제거"),          # 줄 끝 공백 제거
+]
+
+# 한국어 규칙 그룹: (refine 옵션 이름, 카테고리, 규칙 목록) — 적용 순서
+KOREAN_RULE_GROUPS = [
+    ("fix_polite", "과잉 공손 표현", POLITE_PATTERNS),
+    ("fix_fillers", "불필요 접속사/수식어", FILLER_PATTERNS),
+    ("fix_repetitive", "반복 강조 표현", REPETITIVE_INSTRUCTION_PATTERNS),
+    ("fix_unnecessary", "불필요 지시 문구", UNNECESSARY_INSTRUCTION_PATTERNS),
+]
+
+# refine 옵션 이름 (RewriteProgram.flags의 순서)
+FLAG_NAMES = ("fix_whitespace",) + tuple(flag for flag, _, _ in KOREAN_RULE_GROUPS)
+
+
+@dataclass(frozen=True)
+class RewriteProgram:
+    """정제 옵션 조합 하나에 대해 준비된 규칙 실행 순서"""
+    flags: tuple[bool, ...]             # FLAG_NAMES 순서의 옵션 값
+    whitespace: tuple[RewriteRule, ...]
+    korean: tuple[RewriteRule, ...]
+    digest: str                         # 옵션과 규칙 내용의 해시 (규칙이 바뀌면 달라진다)
+    barrier: re.Pattern | None          # 어떤 규칙의 매칭에도 나올 수 없는 문자 (스트리밍 분할 지점)
+
+    @property
+    def enabled(self) -> bool:
+        """규칙이 하나라도 켜져 있는지 (후처리 실행 여부)"""
+        return any(self.flags)
+
+    @property
+    def rules(self) -> tuple[RewriteRule, ...]:
+        """실행 순서대로의 전체 규칙"""
+        return self.whitespace + self.korean
+
+    @cached_property
+    def rule_index(self) -> dict[int, int]:
+        """id(규칙) → rules에서의 순서 (프로세스 간에는 순서 번호로 규칙을 가리킨다)"""
+        return {id(rule): i for i, rule in enumerate(self.rules)}
+
+    @cached_property
+    def graph(self) -> RuleGraph:
+        """고정점 적용에 쓰는 규칙 의존 그래프 (처음 쓸 때 만든다)"""
+        return RuleGraph(self.rules)
+
+
+def compile_program(
+    fix_whitespace: bool = True,
+    fix_polite: bool = True,
+    fix_fillers: bool = True,
+    fix_repetitive: bool = True,
+    fix_unnecessary: bool = True,
+) -> RewriteProgram:
+    """옵션 조합의 재작성 프로그램 (조합마다 한 번만 만든다)"""
+    return _program((
+        bool(fix_whitespace), bool(fix_polite), bool(fix_fillers),
+        bool(fix_repetitive), bool(fix_unnecessary),
+    ))
+
+
+@lru_cache(maxsize=2 ** len(FLAG_NAMES))
+def _program(flags: tuple[bool, ...]) -> RewriteProgram:
+    whitespace_rules, korean_rules = _all_rules()
+    korean = []
+    for enabled, rules in zip(flags[1:], korean_rules):
+        if enabled:
+            korean.extend(rules)
+    whitespace = whitespace_rules if flags[0] else ()
+    return RewriteProgram(
+        flags=flags,
+        whitespace=whitespace,
+        korean=tuple(korean),
+        digest=ruleset_digest(flags, whitespace + tuple(korean)),
+        barrier=barrier_pattern(whitespace + tuple(korean)),
+    )
+
+
+def barrier_pattern(rules: tuple[RewriteRule, ...]) -> re.Pattern | None:
+    """
+    어떤 규칙의 매칭에도 나타날 수 없는 공백 아닌 문자와 매칭되는 정규식.
+
+    이런 문자는 치환으로 지워지지 않고 매칭이 그 문자를 넘어가지도 않으므로,
+    그 문자 바로 뒤에서 자른 앞뒤 구간을 따로 정제해 이어 붙이면 전체를 한 번에
+    정제한 것과 같다. 매칭 문자를 정할 수 없는 규칙이 있으면 None.
+    """
+    chars: set[str] = set()
+    for rule in rules:
+        alphabet = match_alphabet(rule.pattern)
+        if alphabet is None:
+            return None
+        chars |= alphabet[0]
+    excluded = "".join(re.escape(c) for c in sorted(chars))
+    return re.compile(f"[^{excluded}\\s]")
+
+
+def ruleset_digest(flags: tuple[bool, ...], rules: tuple[RewriteRule, ...]) -> str:
+    """옵션 조합과 규칙(패턴, 대체, 카테고리, 이름)의 내용 해시"""
+    h = hashlib.blake2b(repr(flags).encode(), digest_size=16)
+    for rule in rules:
+        replacement = rule.replacement
+        if not isinstance(replacement, str):
+            replacement = f"{replacement.__module__}.{replacement.__qualname__}"
+        h.update(repr((rule.pattern, replacement, rule.category, rule.name)).encode("utf-8"))
+    return h.hexdigest()
+
+
+@lru_cache(maxsize=1)
+def _all_rules() -> tuple[tuple[RewriteRule, ...], tuple[tuple[RewriteRule, ...], ...]]:
+    """모든 규칙을 한 번 컴파일한다: (공백 규칙, 한국어 규칙 그룹별 목록)"""
+    whitespace = tuple(
+        compile_rule(pattern, replacement, WHITESPACE_CATEGORY, name)
+        for pattern, replacement, name in WHITESPACE_STEPS
+    )
+    korean = tuple(
+        compile_rules(tuple((pattern, replacement, category) for pattern, replacement in patterns))
+        for _, category, patterns in KOREAN_RULE_GROUPS
+    )
+    return whitespace, korean
@@ -0,0 +1,70 @@
+"""
+규칙 스캐너
+==========
+여러 정규식 규칙을 텍스트에 평가해 규칙별로 `re.findall`과 동일한 매칭 결과를 돌려준다.
+
+스캔 전에 규칙별 필수 리터럴(rules/literals.py)로 매칭될 수 없는 규칙을 걸러내고,
+촉발된 규칙만 미리 컴파일한 정규식으로 하나씩 스캔한다. 따라서 정규식 실행량은
+규칙 전체가 아니라 텍스트에서 촉발된 규칙 수에 비례한다.
+
+모든 규칙을 하나의 결합 정규식으로 묶어 한 번에 훑는 방식은 CPython re에서 실제
+프롬프트 길이(수백 자 이상)에 대해 규칙별 스캔보다 느려서 쓰지 않는다. 규칙별 정규식은
+리터럴 접두사 검색으로 빠르게 건너뛰지만, 결합 정규식은 위치마다 여러 대안을 시도한다.
+"""
+
+import re
+from dataclasses import dataclass
+
+from optimizer.rules.literals import LiteralTrigger
+
+
+@dataclass(frozen=True)
+class ScanRule:
+    """스캐너에 등록된 규칙"""
+    index: int
+    pattern: str
+    replacement: str
+    category: str
+    compiled: re.Pattern
+
+
+class RuleScanner:
+    """
+    규칙 목록을 평가하는 스캐너.
+    필수 리터럴 프리필터로 촉발된 규칙만 규칙별로 미리 컴파일한 정규식으로 스캔한다.
+    """
+
+    def __init__(self, rules: list[tuple[str, str, str]]):
+        """
+        Args:
+            rules: (패턴, 대체문자열, 카테고리) 목록
+        """
+        self.rules = [
+            ScanRule(i, pattern, replacement, category, re.compile(pattern))
+            for i, (pattern, replacement, category) in enumerate(rules)
+        ]
+        self._trigger = LiteralTrigger([rule.pattern for rule in self.rules])
+
+    def scan(self, text: str) -> list[list[tuple[int, int]]]:
+        """
+        텍스트를 훑어 규칙별 매칭 구간 목록을 반환한다.
+        필수 리터럴이 텍스트에 없는 규칙은 평가하지 않는다.
+
+        Returns:
+            list[list[tuple[int, int]]]: rules[i]에 대한 (start, end) 목록.
+            rules[i].compiled.finditer(text)의 매칭 구간과 같고 순서도 같다.
+        """
+        results: list[list[tuple[int, int]]] = [[] for _ in self.rules]
+        for index in self._trigger.triggered(text):
+            results[index] = [match.span() for match in self.rules[index].compiled.finditer(text)]
+        return results
+
+    def findall(self, text: str) -> list[list[str]]:
+        """규칙별 re.findall과 같은 결과 (캡처 그룹이 있는 규칙은 그룹 값)."""
+        values = []
+        for rule, spans in zip(self.rules, self.scan(text)):
+            if rule.compiled.groups:
+                values.append(rule.compiled.findall(text))
+            else:
+                values.append([text[s:e] for s, e in spans])
+        return values
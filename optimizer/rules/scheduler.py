@@ -0,0 +1,197 @@
+"""
+고정점 규칙 스케줄러
+===================
+규칙을 순서대로 한 번 적용한 뒤, 치환이 새 매칭을 만들었을 수 있는 규칙만 다시
+실행해 어떤 규칙도 더 바꿀 것이 없을 때까지(고정점) 반복한다.
+
+한 번만 적용하면 뒤쪽 규칙의 치환이 앞쪽 규칙의 새 매칭을 만들어도 놓친다
+(예: "혹시 " 제거로 두 표현이 맞붙는 경우). 전체 규칙을 안정될 때까지 다시 돌리면
+비용이 두세 배가 되므로, 규칙 사이의 의존 그래프와 치환 구간 주변 문자로 다시
+실행할 규칙을 고른다.
+
+다시 실행 판단 근거: 규칙들은 전후방 탐색을 쓰지 않으므로, 바뀌지 않은 문자로만 된
+매칭은 이전 텍스트에도 있었고 그 규칙이 이미 치환했다. 따라서 새 매칭은
+  - 대체 문자열 안에서 매칭되거나 (의존 그래프),
+  - 치환 구간의 경계를 넘어 경계 양쪽 두 문자를 연달아 포함해야 한다 (match_pairs).
+이 조건을 만족할 수 있는 규칙만 다시 실행한다. 매칭 문자를 정할 수 없는 규칙은
+치환이 있을 때마다, 텍스트 끝(`$`)에 매칭되는 규칙은 텍스트 끝 근처가 바뀔 때마다
+다시 실행 후보가 된다. 후보도 필수 리터럴이 현재 텍스트에 없으면 실행하지 않는다.
+"""
+
+from dataclasses import dataclass, field
+
+from optimizer.rules.engine import RewriteRule, RuleHit, apply_rule
+from optimizer.rules.literals import SPACE, match_alphabet, match_pairs
+
+
+# 규칙 하나를 실행할 수 있는 최대 횟수 (첫 실행 포함)
+FIXPOINT_MAX_RUNS = 3
+
+
+@dataclass
+class FixpointReport:
+    """고정점 적용 기록"""
+    passes: int                 # 규칙을 하나라도 실행한 훑기 횟수 (첫 적용 포함)
+    runs: int                   # 규칙(정규식)을 실행한 총 횟수
+    converged: bool             # 실행 횟수 상한 전에 고정점에 도달했는지
+    reruns: dict[str, int] = field(default_factory=dict)   # 첫 훑기 뒤에 다시 실행된 규칙 패턴 → 횟수
+
+
+class RuleGraph:
+    """
+    규칙 사이의 의존 그래프.
+
+    dependents[i]는 규칙 i의 대체 문자열 안에서 매칭되는 규칙들이다. 대체 문자열이
+    함수이거나 역참조를 쓰면 치환 결과의 문자로 그때그때 정한다.
+    """
+
+    def __init__(self, rules: tuple[RewriteRule, ...]):
+        self.rules = rules
+        self._unknown: set[int] = set()             # 매칭 문자를 정할 수 없는 규칙
+        self._chars: dict[str, set[int]] = {}       # 문자 → 매칭에 그 문자가 나올 수 있는 규칙
+        self._pairs: dict[tuple[str, str], set[int]] = {}   # 연속 두 문자 → 규칙
+        # 텍스트 끝(`$`, `\Z`)에 매칭될 수 있는 규칙: 끝 근처 치환은 떨어진 매칭도 만든다
+        self._anchored = {
+            i for i, rule in enumerate(rules) if "$" in rule.pattern or "\\Z" in rule.pattern
+        }
+        for i, rule in enumerate(rules):
+            alphabet = match_alphabet(rule.pattern)
+            if alphabet is None:
+                self._unknown.add(i)
+                continue
+            chars, spaces = alphabet
+            for c in chars | ({SPACE} if spaces else set()):
+                self._chars.setdefault(SPACE if c.isspace() else c, set()).add(i)
+            for pair in match_pairs(rule.pattern):
+                self._pairs.setdefault(pair, set()).add(i)
+        self.dependents: list[frozenset[int] | None] = []
+        for rule in rules:
+            replacement = rule.replacement
+            if not isinstance(replacement, str) or rule.template:
+                self.dependents.append(None)
+                continue
+            self.dependents.append(frozenset(self._unknown | {
+                j for j, other in enumerate(rules) if other.compiled.search(replacement)
+            }))
+
+    def matching(self, text: str) -> set[int]:
+        """text의 문자 중 하나라도 매칭에 나올 수 있는 규칙 (매칭 문자를 모르는 규칙 포함)"""
+        found = set(self._unknown)
+        for c in set(text):
+            found.update(self._chars.get(SPACE if c.isspace() else c, ()))
+        return found
+
+    def affected(self, index: int, hit: RuleHit, text: str, skip: set[int]) -> set[int]:
+        """
+        규칙 index의 치환(hit)으로 text(치환 후)에 새 매칭이 생겼을 수 있는 규칙 번호.
+        skip에 든 규칙(이미 실행 예정)은 돌려주지 않는다. 필수 리터럴 검사는 실행할 때 한다.
+
+        새 매칭은 대체 문자열 안에 있거나(dependents), 치환 구간의 경계를 넘어
+        경계 양쪽 두 문자를 연달아 포함해야 한다.
+        """
+        dependents = self.dependents[index]
+        candidates = set(self._unknown)
+        pairs = self._pairs
+        end = len(text)
+        edges = set()
+        for start, stop in hit.regions:
+            if start < stop:
+                candidates |= dependents if dependents is not None \
+                    else self.matching(text[start:stop])
+            edges.add(start)
+            edges.add(stop)
+        for edge in edges:
+            if 0 < edge < end:
+                before, after = text[edge - 1], text[edge]
+                found = pairs.get((SPACE if before.isspace() else before,
+                                   SPACE if after.isspace() else after))
+                if found:
+                    candidates |= found
+        if hit.regions[-1][1] >= end - 1:
+            candidates |= self._anchored
+        return candidates - skip
+
+
+def apply_rules_fixpoint(
+    text: str,
+    rules: tuple[RewriteRule, ...],
+    known_spans: dict[str, list[tuple[int, int]]] | None = None,
+    max_runs: int = FIXPOINT_MAX_RUNS,
+    graph: RuleGraph | None = None,
+) -> tuple[str, list[RuleHit], FixpointReport]:
+    """
+    규칙을 순서대로 적용하고, 새 매칭이 생겼을 수 있는 규칙만 고정점까지 다시 적용한다.
+
+    첫 번째 훑기는 apply_rules와 같다. 이후 훑기마다 다시 실행할 규칙을 규칙 순서대로
+    실행하며, 규칙마다 max_runs번을 넘게 실행하지 않는다.
+
+    Args:
+        known_spans: apply_rules와 같음 (첫 훑기에서 텍스트가 처음 바뀌기 전까지 사용)
+        max_runs: 규칙 하나의 최대 실행 횟수
+        graph: 미리 만든 의존 그래프 (None이면 새로 만든다)
+
+    Returns:
+        (치환된 텍스트, 규칙별로 합친 적용 기록 — 규칙 순서, 고정점 적용 기록).
+        여러 번 매칭된 규칙의 기록은 첫 매칭과 구간은 처음 실행한 것, 매칭 수는 합이다.
+    """
+    if graph is None:
+        graph = RuleGraph(rules)
+    runs = [0] * len(rules)
+    reruns: dict[str, int] = {}
+    merged: dict[int, RuleHit] = {}
+    pending = set(range(len(rules)))    # 실행할 규칙 (첫 훑기는 전체)
+    blocked: set[int] = set()           # 실행 횟수 상한에 걸려 다시 실행하지 못한 규칙
+    passes = 0
+    while pending:
+        ran = False
+        # 훑는 도중 뒤쪽 규칙이 추가되면 이번 훑기에, 앞쪽 규칙은 다음 훑기에 실행된다
+        for i in range(min(pending), len(rules)):
+            if i not in pending:
+                continue
+            pending.remove(i)
+            rule = rules[i]
+            spans = None
+            if known_spans is not None and rule.pattern in known_spans:
+                spans = known_spans[rule.pattern]
+                if not spans:
+                    continue
+            elif not rule.may_fire(text):
+                continue
+            if runs[i] >= max_runs:
+                blocked.add(i)
+                continue
+            runs[i] += 1
+            ran = True
+            if passes:
+                reruns[rule.pattern] = reruns.get(rule.pattern, 0) + 1
+            text, hit = apply_rule(text, rule, spans)
+            if hit is None:
+                continue
+            _merge(merged, i, hit)
+            if hit.changed:
+                known_spans = None
+                pending |= graph.affected(i, hit, text, pending)
+        passes += ran
+
+    report = FixpointReport(
+        passes=passes,
+        runs=sum(runs),
+        converged=not blocked,
+        reruns=reruns,
+    )
+    return text, [merged[i] for i in sorted(merged)], report
+
+
+def _merge(merged: dict[int, RuleHit], index: int, hit: RuleHit):
+    previous = merged.get(index)
+    if previous is None:
+        merged[index] = hit
+        return
+    merged[index] = RuleHit(
+        rule=previous.rule,
+        first=previous.first,
+        count=previous.count + hit.count,
+        spans=previous.spans,
+        changed=previous.changed or hit.changed,
+        regions=previous.regions,
+    )
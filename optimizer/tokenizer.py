@@ -3,10 +3,30 @@
 =============
 tiktoken을 사용하여 프롬프트의 토큰 수를 측정하고,
 토큰별 텍스트 매핑을 제공한다.
+
+인코딩 객체는 프로세스 전역 `ENCODING_REGISTRY`에서 인코딩 이름별로
+한 번만 생성되어 모든 TokenCounter가 공유한다. `PROMM_TIKTOKEN_DIR` 환경 변수나
+`ENCODING_REGISTRY.configure(encoding_dir=...)`로 로컬 디렉터리를 지정하면
+네트워크 없이 해당 디렉터리의 랭크 파일로 인코딩을 만든다 (optimizer.encodings).
 """
 
+import hashlib
+import re
+import sys
+from bisect import bisect_right
+import threading
+import time
+import weakref
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass
+from itertools import accumulate
+
 import tiktoken
 
+from optimizer import encodings, estimator
+from optimizer.estimator import CalibrationReport, TokenEstimate
+
 
 # 모델별 인코딩 매핑
 MODEL_ENCODINGS = {
@@ -17,24 +37,742 @@ MODEL_ENCODINGS = {
     "gpt-3.5-turbo": "cl100k_base",
 }
 
+DEFAULT_ENCODING = "o200k_base"
+
+# UTF-8 연속 바이트 (0x80~0xBF): 문자의 시작 바이트가 아님
+_UTF8_CONTINUATION = bytes(range(0x80, 0xC0))
+
+# 배치 인코딩 기본 스레드 수 (tiktoken 배치 인코딩은 GIL을 해제한다)
+DEFAULT_NUM_THREADS = 8
+
+# 조각 일괄 계산에서 조각 사이에 넣는 구분자. tiktoken은 특수 토큰을 기준으로 텍스트를
+# 나눠 각 부분을 따로 인코딩하므로, 이어 붙여 한 번 인코딩해도 조각별 토큰 수가 그대로 나온다.
+_FRAGMENT_SEPARATOR = "<|endoftext|>"
+
+# 스트리밍 카운트 기본값: 파일 읽기 단위와 한 번에 배치 인코딩할 최대 문자 수
+DEFAULT_STREAM_CHUNK_CHARS = 1 << 20
+DEFAULT_STREAM_BATCH_CHARS = 8 << 20
+# 경계를 찾지 못한 꼬리의 상한 (batch_chars의 배수). 넘으면 경계가 아니어도 자른다
+STREAM_TAIL_CAP_BATCHES = 4
+
+# ─── 동질 반복 구간(같은 문자의 긴 연속) 가드 ───
+# 수십만 자 이상의 공백·탭 연속은 tiktoken 사전 토크나이저 정규식에서
+# 백트래킹 스택 한도 오류를 내고, 구버전 tiktoken에서는 BPE 병합 시간이
+# 조각 길이의 제곱으로 늘어난다. 이 길이 이상의 연속 구간은 주기 단위로
+# 줄여서 인코딩하고, 줄인 주기 수만큼의 토큰 수를 더한다.
+RUN_GUARD_CHARS = 4096
+# 길이 RUN_GUARD_CHARS 이상인 연속 구간은 반드시 이 크기로 정렬된 블록 하나를 포함한다
+_RUN_BLOCK = RUN_GUARD_CHARS // 2
+_RUN_SCAN = 1 << 16               # 연속 구간 끝을 찾을 때 한 번에 검사하는 문자 수
+_RUN_PROBE_STARTS = (256, 1024)   # 주기 측정을 시작하는 구간 길이 후보
+_RUN_MAX_PERIOD = 128
+# 주기 검증에 사용하는 (앞 문맥, 뒤 문맥)
+_RUN_CONTEXTS = (("", ""), ("x", "y"), (" ", "x"), ("x", "\n"), ("\n", " "), ("가", "."))
+
+
+def encoding_name_for(model: str) -> str:
+    """모델 이름에 대응하는 인코딩 이름을 반환한다."""
+    return MODEL_ENCODINGS.get(model, DEFAULT_ENCODING)
+
+
+class EncodingRegistry:
+    """
+    프로세스 전역 인코딩 레지스트리 (스레드 안전).
+
+    인코딩 이름별로 tiktoken 인코딩을 한 번만 로드하여 공유하고,
+    현재 살아 있는 TokenCounter 수와 인코딩이 점유한 메모리를 보고한다.
+    """
+
+    def __init__(self, encoding_dir: str | None = None, verify_hash: bool = True):
+        """
+        Args:
+            encoding_dir: 로컬 랭크 파일 디렉터리. None이면 PROMM_TIKTOKEN_DIR를 따르고,
+                둘 다 없으면 tiktoken 기본 로더(네트워크·tiktoken 캐시)를 사용한다.
+            verify_hash: 로컬 랭크 파일의 SHA-256을 공개 배포본과 대조할지 여부
+        """
+        self.encoding_dir = encoding_dir
+        self.verify_hash = verify_hash
+        self._lock = threading.Lock()
+        self._encodings: dict[str, tiktoken.Encoding] = {}
+        self._load_seconds: dict[str, float] = {}
+        self._sources: dict[str, str] = {}
+        self._memory_bytes: dict[str, int] = {}
+        self._counters: weakref.WeakSet = weakref.WeakSet()
+        # (인코딩 이름, 문자) → (주기, 주기당 토큰 수, 최소 유지 길이) 또는 None
+        self._run_periods: dict[tuple[str, str], tuple[int, int, int] | None] = {}
+
+    def get(self, encoding_name: str) -> tiktoken.Encoding:
+        """인코딩을 반환한다. 처음 요청된 인코딩만 실제로 로드한다."""
+        encoding = self._encodings.get(encoding_name)
+        if encoding is not None:
+            return encoding
+
+        with self._lock:
+            encoding = self._encodings.get(encoding_name)
+            if encoding is None:
+                start = time.perf_counter()
+                encoding, source = self._load(encoding_name)
+                self._load_seconds[encoding_name] = time.perf_counter() - start
+                self._sources[encoding_name] = source
+                self._encodings[encoding_name] = encoding
+        return encoding
+
+    def configure(self, encoding_dir: str | None = None, verify_hash: bool = True):
+        """
+        로컬 랭크 파일 디렉터리를 지정한다.
+        이미 로드된 인코딩은 유지되므로 첫 TokenCounter 생성 전에 호출한다.
+        """
+        with self._lock:
+            self.encoding_dir = encoding_dir
+            self.verify_hash = verify_hash
+
+    def _load(self, encoding_name: str) -> tuple[tiktoken.Encoding, str]:
+        """인코딩을 생성하고 출처 설명을 함께 반환한다."""
+        directory = encodings.encoding_dir(self.encoding_dir)
+        if directory is None or encoding_name not in encodings.ENCODING_SPECS:
+            return tiktoken.get_encoding(encoding_name), "tiktoken"
+        loaded = encodings.load_encoding(encoding_name, directory, verify_hash=self.verify_hash)
+        kind = "binary" if loaded.binary_cache else "text"
+        return loaded.encoding, f"{loaded.source} ({kind})"
+
+    def for_model(self, model: str) -> tiktoken.Encoding:
+        """모델 이름으로 인코딩을 조회한다."""
+        return self.get(encoding_name_for(model))
+
+    def register_counter(self, counter: "TokenCounter"):
+        """카운터를 등록한다. 카운터가 소멸되면 자동으로 집계에서 빠진다."""
+        with self._lock:
+            self._counters.add(counter)
+
+    def clear(self):
+        """로드된 인코딩을 모두 해제한다 (테스트·재설정용)."""
+        with self._lock:
+            self._encodings.clear()
+            self._load_seconds.clear()
+            self._sources.clear()
+            self._memory_bytes.clear()
+            self._run_periods.clear()
+
+    def run_period(self, encoding_name: str, char: str) -> tuple[int, int, int] | None:
+        """
+        같은 문자 연속 구간의 토큰 수 주기를 반환한다 (인코딩·문자별 최초 1회 측정).
+
+        Returns:
+            (period, tokens, keep): 길이 keep 이상인 연속 구간은 period자를 줄일 때마다
+            토큰 수가 정확히 tokens개 줄어든다. 주기를 확인하지 못하면 None.
+        """
+        key = (encoding_name, char)
+        if key in self._run_periods:
+            return self._run_periods[key]
+        period = _measure_run_period(self.get(encoding_name), char)
+        with self._lock:
+            self._run_periods[key] = period
+        return period
+
+    def stats(self) -> dict:
+        """
+        레지스트리 현황을 반환한다.
+
+        Returns:
+            dict: {
+                "encodings": int,                 # 로드된 인코딩 수
+                "counters": int,                  # 살아 있는 TokenCounter 수
+                "counters_by_encoding": dict,     # 인코딩별 카운터 수
+                "load_seconds": dict,             # 인코딩별 로드 시간
+                "sources": dict,                  # 인코딩별 출처 (tiktoken 또는 로컬 파일)
+                "memory_bytes": dict,             # 인코딩별 BPE 테이블 추정 메모리
+                "total_memory_bytes": int,
+            }
+        """
+        with self._lock:
+            encodings = dict(self._encodings)
+            counters = list(self._counters)
+            load_seconds = dict(self._load_seconds)
+            sources = dict(self._sources)
+
+        by_encoding: dict[str, int] = {}
+        for counter in counters:
+            by_encoding[counter.encoding_name] = by_encoding.get(counter.encoding_name, 0) + 1
+
+        memory = {name: self._estimate_memory(name, enc) for name, enc in encodings.items()}
+
+        return {
+            "encodings": len(encodings),
+            "counters": len(counters),
+            "counters_by_encoding": by_encoding,
+            "load_seconds": {k: round(v, 4) for k, v in load_seconds.items()},
+            "sources": sources,
+            "memory_bytes": memory,
+            "total_memory_bytes": sum(memory.values()),
+        }
+
+    def _estimate_memory(self, name: str, encoding: tiktoken.Encoding) -> int:
+        """
+        인코딩의 Python 측 BPE 테이블 메모리를 추정한다 (최초 1회 계산 후 재사용).
+        Rust 내부 테이블은 측정할 수 없으므로 포함하지 않는다.
+        """
+        cached = self._memory_bytes.get(name)
+        if cached is not None:
+            return cached
+
+        ranks = getattr(encoding, "_mergeable_ranks", {})
+        special = getattr(encoding, "_special_tokens", {})
+        total = sys.getsizeof(ranks) + sys.getsizeof(special)
+        for table in (ranks, special):
+            for key, value in table.items():
+                total += sys.getsizeof(key) + sys.getsizeof(value)
+
+        self._memory_bytes[name] = total
+        return total
+
+
+def _measure_run_period(encoding: tiktoken.Encoding, char: str) -> tuple[int, int, int] | None:
+    """
+    char * n의 토큰 수가 n에 대해 주기적으로 늘어나는지 실측한다.
+
+    [start, start + 3 * _RUN_MAX_PERIOD] 길이에서 f(n + p) - f(n)이 일정한
+    가장 작은 주기 p를 찾고, 여러 앞뒤 문맥에서도 같은 관계가 성립하는지
+    확인한 뒤에만 채택한다. 경계 효과가 남아 있으면 더 긴 시작 길이로 다시 측정한다.
+    """
+    for start in _RUN_PROBE_STARTS:
+        lengths = range(start, start + 3 * _RUN_MAX_PERIOD + 1)
+        counts = [len(ids) for ids in encoding.encode_batch([char * n for n in lengths])]
+        for period in range(1, _RUN_MAX_PERIOD + 1):
+            tokens = counts[period] - counts[0]
+            if all(counts[i + period] - counts[i] == tokens
+                   for i in range(len(counts) - period)):
+                break
+        else:
+            continue
+
+        residues = range(0, period, max(1, period // 8))
+        probes = [
+            (prefix + char * n + suffix, prefix + char * (n + 2 * period) + suffix)
+            for prefix, suffix in _RUN_CONTEXTS
+            for n in (start + r for r in residues)
+        ]
+        flat = [text for pair in probes for text in pair]
+        probe_counts = [len(ids) for ids in encoding.encode_batch(flat)]
+        if all(probe_counts[i + 1] - probe_counts[i] == 2 * tokens
+               for i in range(0, len(probe_counts), 2)):
+            return period, tokens, start
+    return None
+
+
+# 모든 TokenCounter가 공유하는 전역 레지스트리
+ENCODING_REGISTRY = EncodingRegistry()
+
+
+class TokenCountCache:
+    """
+    토큰 수 메모이제이션 캐시 (LRU, 스레드 안전).
+
+    (인코딩 이름, 텍스트 다이제스트)를 키로 토큰 수를 저장한다.
+    항목 수와 추정 메모리(바이트) 두 기준으로 상한을 두고,
+    어느 쪽이든 초과하면 가장 오래 사용되지 않은 항목부터 제거한다.
+    """
+
+    # OrderedDict 노드·해시 슬롯 등 항목당 고정 오버헤드 추정치
+    _NODE_OVERHEAD = 100
+
+    def __init__(self, max_entries: int = 10_000, max_bytes: int = 4 * 1024 * 1024):
+        """
+        Args:
+            max_entries: 최대 항목 수
+            max_bytes: 최대 추정 메모리 (바이트)
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[tuple[str, bytes], tuple[int, int]] = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(encoding_name: str, text: str) -> tuple[str, bytes]:
+        """캐시 키를 만든다. 텍스트 원문 대신 16바이트 다이제스트를 보관한다."""
+        digest = hashlib.blake2b(
+            text.encode("utf-8", "surrogatepass"), digest_size=16
+        ).digest()
+        return (encoding_name, digest)
+
+    def get(self, key: tuple[str, bytes]) -> int | None:
+        """캐시된 토큰 수를 반환한다. 없으면 None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: tuple[str, bytes], count: int):
+        """토큰 수를 저장하고 상한을 넘으면 LRU 항목을 제거한다."""
+        size = (
+            sys.getsizeof(key) + sys.getsizeof(key[1])
+            + sys.getsizeof(count) + self._NODE_OVERHEAD
+        )
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (count, size)
+            self._bytes += size
+
+            while self._entries and (
+                len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+            ):
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self):
+        """모든 항목과 통계를 초기화한다."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> dict:
+        """캐시 현황을 반환한다."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+# TokenCounter(cache=True)가 사용하는 공유 캐시
+SHARED_TOKEN_CACHE = TokenCountCache()
+
+
+@dataclass
+class TokenSpans:
+    """
+    열(column) 형식 토큰화 결과.
+
+    i번째 토큰은 원문 text[starts[i]:ends[i]] 구간에 해당한다.
+    한 글자가 여러 바이트 토큰으로 쪼개진 경우(한글 음절 등) 해당 토큰들은
+    같은 문자 구간을 공유한다.
+    """
+    text: str
+    data: bytes              # 전체 토큰 바이트를 이어 붙인 값
+    token_ids: array         # 토큰 ID
+    starts: array            # 시작 문자 오프셋
+    ends: array              # 끝 문자 오프셋 (해당 문자 미포함)
+    byte_lengths: array      # 토큰별 바이트 길이
+
+    def __len__(self) -> int:
+        return len(self.token_ids)
+
+    def byte_offsets(self) -> list[int]:
+        """토큰별 시작 바이트 오프셋 목록 (마지막 원소는 전체 바이트 길이)"""
+        return [0, *accumulate(self.byte_lengths)]
+
+    def pieces(self) -> list[str]:
+        """
+        토큰별 디코딩 문자열 목록.
+        완전한 문자를 이루지 못하는 바이트는 U+FFFD로 표시된다 (tiktoken decode와 동일).
+        """
+        offsets = self.byte_offsets()
+        data = self.data
+        return [
+            data[offsets[i]:offsets[i + 1]].decode("utf-8", errors="replace")
+            for i in range(len(self))
+        ]
+
+
+@dataclass
+class EditCount:
+    """증분 재계산 결과 (TokenCounter.recount)"""
+    text: str                 # 편집 후 텍스트
+    count: int                # 편집 후 토큰 수
+    ends: list[int]           # 편집 후 토큰 끝 문자 오프셋 (다음 recount에 그대로 사용)
+    window: tuple[int, int]   # 다시 인코딩한 구간 (편집 후 텍스트 기준)
+
+    @property
+    def reencoded_chars(self) -> int:
+        return self.window[1] - self.window[0]
+
+
+@dataclass
+class StreamSegment:
+    """스트리밍 카운트에서 한 번에 인코딩된 구간"""
+    start: int    # 시작 문자 오프셋 (스트림 전체 기준)
+    end: int      # 끝 문자 오프셋 (해당 문자 미포함)
+    count: int    # 구간 토큰 수
+
+
+@dataclass
+class StreamCount:
+    """스트리밍 카운트 결과 (TokenCounter.count_stream / count_file)"""
+    total: int                    # 전체 토큰 수 (forced_cuts가 0이면 count(전체 텍스트)와 동일)
+    chars: int                    # 전체 문자 수
+    segments: list[StreamSegment] # 구간별 토큰 수 (per_chunk=True일 때만 채워짐)
+    forced_cuts: int = 0          # 꼬리 상한 때문에 경계가 아닌 곳에서 자른 횟수
+
+
+def _is_piece_boundary(text: str, pos: int) -> bool:
+    """
+    pos가 사전 토크나이저(pre-tokenizer) 조각의 경계로 확정되는 위치인지 검사한다.
+
+    "글자 + 공백" 사이는 o200k_base·cl100k_base 정규식 모두에서 항상 조각이
+    끝나는 지점이다. 글자 조각은 공백을 포함할 수 없고, 두 정규식 모두
+    후방 탐색(lookbehind)이 없어 이 위치부터의 분할은 앞 문맥과 무관하다.
+    또한 글자 조각의 범위는 뒤따르는 공백이든 문자열 끝이든 동일하므로
+    이 위치에서 잘라낸 구간만 인코딩해도 전체 인코딩과 결과가 같다.
+    """
+    return 0 < pos < len(text) and text[pos] == " " and text[pos - 1].isalpha()
+
+
+def _long_runs(text: str):
+    """
+    길이 RUN_GUARD_CHARS 이상인 같은 문자 연속 구간 (start, end)를 차례로 반환한다.
+
+    _RUN_BLOCK 간격의 정렬 블록만 str.count로 검사하고, 같은 문자로 채워진
+    블록에서만 양쪽으로 구간을 넓히므로 일반 텍스트에서는 거의 비용이 없다.
+    """
+    length = len(text)
+    block = _RUN_BLOCK
+    pos = 0
+    while pos + block <= length:
+        char = text[pos]
+        if text.count(char, pos, pos + block) != block:
+            pos += block
+            continue
+        # 앞쪽 블록은 같은 문자로 가득 차 있지 않으므로 시작점은 블록 하나 안에 있다
+        head = text[max(0, pos - block):pos]
+        start = pos - (len(head) - len(head.rstrip(char)))
+        end = pos + block
+        while end < length:
+            window = text[end:end + _RUN_SCAN]
+            rest = len(window.lstrip(char))
+            end += len(window) - rest
+            if rest:
+                break
+        if end - start >= RUN_GUARD_CHARS:
+            yield start, end
+        pos = -(-end // block) * block
+
+
+# 스트림 경계 후보 (뒤집은 텍스트 기준: 경계 뒤 문자, 경계 앞 문자 순서)
+#   - 글자 + 공백 / 아포스트로피를 뺀 ASCII 기호 / 숫자
+#   - 숫자 + 글자
+#   - 줄바꿈 + 공백·"/"가 아닌 문자
+# 글자·숫자 여부는 _is_stream_boundary에서 다시 확인한다.
+_REVERSED_BOUNDARY = re.compile(
+    r"[ !-&(-/:-@\[-`{-~\d](?=[^\W\d_])|[^\W\d_](?=\d)|[^\s/](?=[\r\n])"
+)
+# 경계 뒤에 올 수 있는 ASCII 기호 (아포스트로피는 o200k_base에서 축약형 "'s" 등으로 앞 글자에 붙는다)
+_STREAM_SYMBOLS = frozenset("!\"#$%&()*+,-./:;<=>?@[\\]^_`{|}~")
+
+
+def _is_stream_boundary(text: str, pos: int) -> bool:
+    """
+    text[pos - 1]과 text[pos] 사이가 스트림에서 자를 수 있는 조각 경계인지 검사한다.
+
+    o200k_base·cl100k_base 정규식 모두에서 다음 위치는 조각이 끝나고, 앞 조각의
+    범위가 뒤 문자와 무관하다 (_is_piece_boundary와 같은 논리).
+      - 글자 + 공백·ASCII 기호·숫자: 글자 조각은 글자(o200k_base는 결합 문자와
+        축약형 포함)만 이어 가므로 여기서 끝난다.
+      - 숫자 + 글자: 숫자 조각은 숫자 연속의 시작부터 세 자리씩 나뉘고, 글자 조각의
+        앞 기호 자리에는 숫자가 올 수 없다.
+      - 줄바꿈 + 공백·"/"가 아닌 문자: 줄바꿈으로 끝나는 조각(공백 + 줄바꿈 연속,
+        기호 + 줄바꿈 연속)은 공백이 아닌 문자 앞에서 끝난다 (o200k_base 기호 조각은
+        "/"도 잇는다).
+    """
+    before, after = text[pos - 1], text[pos]
+    if before.isalpha():
+        return after == " " or after in _STREAM_SYMBOLS or after.isdecimal()
+    if before.isdecimal():
+        return after.isalpha()
+    if before in "\r\n":
+        return not after.isspace() and after != "/"
+    return False
+
+
+def _last_piece_boundary(text: str, lo: int = 1) -> int:
+    """
+    text[lo:] 안의 마지막 스트림 경계 위치를 반환한다. 없으면 0.
+
+    스트림에서는 공백 뒤에 올 문자와 무관하게 글자 조각이 공백 앞에서 끝나므로
+    "글자 + 공백"은 공백이 버퍼의 마지막 문자여도 경계로 인정한다.
+    텍스트를 뒤집어 정규식으로 찾으므로 긴 공백 연속에서도 C 수준 속도로 동작한다.
+    """
+    lo = max(lo, 1)
+    reversed_text = text[:lo - 2 if lo >= 2 else None:-1]
+    last = len(text) - 1
+    pos = 0
+    while True:
+        match = _REVERSED_BOUNDARY.search(reversed_text, pos)
+        if match is None:
+            return 0
+        boundary = last - match.start()
+        # [^\W\d_]는 글자 외의 숫자 문자(²·Ⅻ 등)도 포함하므로 다시 확인한다
+        if _is_stream_boundary(text, boundary):
+            return boundary
+        pos = match.start() + 1
+
 
 class TokenCounter:
     """tiktoken 기반 토큰 카운터"""
 
-    def __init__(self, model: str = "gpt-4o-mini"):
+    def __init__(
+        self,
+        model: str = "gpt-4o-mini",
+        cache: TokenCountCache | bool | None = None,
+    ):
         """
         Args:
             model: 사용할 모델 이름. 기본값은 gpt-4o-mini (저비용 모델).
+            cache: 토큰 수 캐시. True면 공유 캐시(SHARED_TOKEN_CACHE)를,
+                TokenCountCache 객체면 해당 캐시를 사용한다. 기본값은 캐시 없음.
         """
         self.model = model
-        encoding_name = MODEL_ENCODINGS.get(model, "o200k_base")
-        self.encoding = tiktoken.get_encoding(encoding_name)
+        self.encoding_name = encoding_name_for(model)
+        self.encoding = ENCODING_REGISTRY.get(self.encoding_name)
+        if cache is True:
+            cache = SHARED_TOKEN_CACHE
+        self.cache: TokenCountCache | None = cache or None
+        # 다른 인코딩용 카운터 (count_models에서 지연 생성, 캐시 공유).
+        # 자기 자신은 넣지 않는다 (순환 참조가 생기면 참조가 사라져도 바로 해제되지 않는다)
+        self._siblings: dict[str, TokenCounter] = {}
+        ENCODING_REGISTRY.register_counter(self)
 
     def count(self, text: str) -> int:
         """텍스트의 토큰 수를 반환한다."""
         if not text:
             return 0
-        return len(self.encoding.encode(text))
+        if self.cache is None:
+            return self._encode_count(text)
+
+        key = self.cache.key(self.encoding_name, text)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        count = self._encode_count(text)
+        self.cache.put(key, count)
+        return count
+
+    def count_models(self, text: str, models: list[str] | None = None) -> dict[str, int]:
+        """
+        여러 모델 기준의 토큰 수를 한 번에 계산한다.
+
+        모델을 인코딩별로 묶어 인코딩마다 한 번만 인코딩하므로, 같은 인코딩을
+        쓰는 모델이 여러 개여도 추가 비용이 없다.
+
+        다른 인코딩의 토큰 수도 이 카운터의 캐시(self.cache)를 쓴다. 캐시 키에
+        인코딩 이름이 들어 있어 값이 섞이지는 않지만, 캐시의 적중·실패 통계에는
+        모든 인코딩의 조회가 함께 집계된다.
+
+        Args:
+            text: 토큰 수를 셀 텍스트
+            models: 모델 이름 목록. None이면 MODEL_ENCODINGS의 전체 모델.
+
+        Returns:
+            dict: {모델 이름: 토큰 수} (models 순서)
+        """
+        if models is None:
+            models = list(MODEL_ENCODINGS)
+        per_encoding: dict[str, int] = {}
+        for model in models:
+            name = encoding_name_for(model)
+            if name not in per_encoding:
+                per_encoding[name] = self._counter_for(model).count(text)
+        return {model: per_encoding[encoding_name_for(model)] for model in models}
+
+    def _counter_for(self, model: str) -> "TokenCounter":
+        """model의 인코딩을 쓰는 카운터를 반환한다 (같은 캐시를 공유)."""
+        name = encoding_name_for(model)
+        if name == self.encoding_name:
+            return self
+        counter = self._siblings.get(name)
+        if counter is None:
+            counter = self._siblings[name] = TokenCounter(model=model, cache=self.cache)
+        return counter
+
+    def estimate(self, text: str, threshold: int | None = None) -> TokenEstimate:
+        """
+        문자 종류별 통계로 토큰 수를 빠르게 추정한다 (BPE 인코딩 없음).
+
+        인코딩별 보정 결과가 없으면 BENCHMARK_DATASET으로 한 번 보정한다.
+
+        Args:
+            text: 추정할 텍스트
+            threshold: 호출자의 판단 기준 토큰 수. 신뢰 구간이 이 값을
+                포함하면(추정만으로 기준 초과 여부를 판단할 수 없으면)
+                정확한 토큰 수로 대체한다.
+        """
+        report = estimator.get_calibration(self.encoding_name)
+        if report is None:
+            report = self.calibrate()
+
+        result = estimator.estimate(text, report)
+        if threshold is not None and result.low <= threshold <= result.high:
+            exact = self.count(text)
+            return TokenEstimate(estimate=exact, low=exact, high=exact, exact=True)
+        return result
+
+    def calibrate(
+        self,
+        corpus: list[str] | dict[str, list[str]] | None = None,
+        coverage: float = 0.95,
+    ) -> CalibrationReport:
+        """
+        이 카운터의 인코딩에 대해 추정 모델을 보정하고 오차 리포트를 반환한다.
+        보정 결과는 같은 인코딩을 쓰는 모든 카운터가 공유한다.
+
+        Args:
+            corpus: 보정용 텍스트 목록 또는 카테고리별 딕셔너리.
+                None이면 BENCHMARK_DATASET을 사용한다.
+            coverage: 신뢰 구간의 목표 포함 비율
+        """
+        if corpus is None:
+            # 순환 import 방지를 위해 지연 import
+            from optimizer.benchmark import BENCHMARK_DATASET
+            corpus = BENCHMARK_DATASET
+        if isinstance(corpus, dict):
+            corpus = [text for texts in corpus.values() for text in texts]
+        return estimator.calibrate(self, corpus, coverage=coverage)
+
+    def count_many(self, texts: list[str], num_threads: int = DEFAULT_NUM_THREADS) -> list[int]:
+        """
+        여러 텍스트의 토큰 수를 한 번에 계산한다.
+
+        tiktoken의 배치 인코딩을 사용하여 num_threads개 스레드에서 병렬로
+        인코딩한다. 결과는 각 텍스트에 대한 count()와 동일하다.
+
+        Args:
+            texts: 토큰 수를 셀 텍스트 목록
+            num_threads: 인코딩에 사용할 스레드 수
+        """
+        if not texts:
+            return []
+        if self.cache is None:
+            return self._encode_counts(list(texts), num_threads)
+
+        # 캐시에 없는 텍스트만 (중복 제거 후) 배치 인코딩한다
+        counts: list[int | None] = []
+        missing: dict[str, tuple[str, bytes]] = {}
+        for text in texts:
+            if not text:
+                counts.append(0)
+                continue
+            key = self.cache.key(self.encoding_name, text)
+            cached = self.cache.get(key)
+            counts.append(cached)
+            if cached is None:
+                missing[text] = key
+
+        if missing:
+            pending = list(missing)
+            fresh = dict(zip(pending, self._encode_counts(pending, num_threads)))
+            for text, key in missing.items():
+                self.cache.put(key, fresh[text])
+            counts = [
+                fresh[text] if count is None else count
+                for text, count in zip(texts, counts)
+            ]
+        return counts
+
+    def count_fragments(self, texts: list[str]) -> list[int]:
+        """
+        짧은 텍스트 조각 여러 개의 토큰 수를 한 번의 인코딩으로 계산한다.
+
+        count_many는 스레드 풀을 쓰므로 긴 텍스트에 유리하고, 규칙 매칭 조각처럼
+        짧은 텍스트가 많을 때는 서로 다른 조각을 구분 특수 토큰으로 이어 붙여
+        한 번에 인코딩하는 편이 빠르다. 결과는 각 조각에 대한 count()와 같다.
+        """
+        counts = [0] * len(texts)
+        if _FRAGMENT_SEPARATOR not in self.encoding.special_tokens_set:
+            return [self.count(text) for text in texts]
+
+        pending: dict[str, list[int]] = {}   # 조각 → texts에서의 위치
+        for i, text in enumerate(texts):
+            if not text:
+                continue
+            if len(text) >= RUN_GUARD_CHARS or _FRAGMENT_SEPARATOR in text:
+                counts[i] = self.count(text)
+            else:
+                pending.setdefault(text, []).append(i)
+
+        keys = {}
+        if self.cache is not None:
+            for text in list(pending):
+                key = keys[text] = self.cache.key(self.encoding_name, text)
+                cached = self.cache.get(key)
+                if cached is not None:
+                    for i in pending.pop(text):
+                        counts[i] = cached
+
+        if pending:
+            distinct = list(pending)
+            ids = self.encoding.encode(
+                _FRAGMENT_SEPARATOR.join(distinct), allowed_special={_FRAGMENT_SEPARATOR}
+            )
+            separator = self.encoding.encode_single_token(_FRAGMENT_SEPARATOR)
+            start = 0
+            for text in distinct:
+                try:
+                    end = ids.index(separator, start)
+                except ValueError:
+                    end = len(ids)
+                for i in pending[text]:
+                    counts[i] = end - start
+                if self.cache is not None:
+                    self.cache.put(keys[text], end - start)
+                start = end + 1
+        return counts
+
+    def _encode_counts(self, texts: list[str], num_threads: int) -> list[int]:
+        """캐시를 거치지 않고 배치 인코딩하여 토큰 수 목록을 반환한다."""
+        reduced = [self._reduce_runs(text) for text in texts]
+        encoded = self.encoding.encode_batch(
+            [text for text, _ in reduced], num_threads=max(1, num_threads)
+        )
+        return [len(ids) + extra for ids, (_, extra) in zip(encoded, reduced)]
+
+    def _encode_count(self, text: str) -> int:
+        """캐시를 거치지 않고 인코딩하여 토큰 수를 반환한다."""
+        text, extra = self._reduce_runs(text)
+        return len(self.encoding.encode(text)) + extra
+
+    def _reduce_runs(self, text: str) -> tuple[str, int]:
+        """
+        RUN_GUARD_CHARS 이상인 같은 문자 연속 구간을 주기 단위로 줄인다.
+
+        Returns:
+            (줄인 텍스트, 줄인 만큼의 토큰 수). 줄인 텍스트의 토큰 수에
+            두 번째 값을 더하면 원문 토큰 수와 같다.
+        """
+        if len(text) < RUN_GUARD_CHARS:
+            return text, 0
+
+        parts = []
+        extra = 0
+        last = 0
+        for start, end in _long_runs(text):
+            period = ENCODING_REGISTRY.run_period(self.encoding_name, text[start])
+            if period is None:
+                continue
+            size, tokens, keep = period
+            cycles = (end - start - keep) // size
+            parts.append(text[last:end - cycles * size])
+            extra += cycles * tokens
+            last = end
+
+        if not parts:
+            return text, 0
+        parts.append(text[last:])
+        return "".join(parts), extra
 
     def tokenize(self, text: str) -> list[dict]:
         """
@@ -43,19 +781,107 @@ class TokenCounter:
         Returns:
             list[dict]: [{"token_id": int, "text": str, "bytes": int}, ...]
         """
-        if not text:
-            return []
+        spans = self.tokenize_spans(text)
+        return [
+            {"token_id": tid, "text": piece, "bytes": size}
+            for tid, piece, size in zip(spans.token_ids, spans.pieces(), spans.byte_lengths)
+        ]
 
-        token_ids = self.encoding.encode(text)
-        result = []
-        for tid in token_ids:
-            decoded = self.encoding.decode([tid])
-            result.append({
-                "token_id": tid,
-                "text": decoded,
-                "bytes": len(decoded.encode("utf-8")),
-            })
-        return result
+    def tokenize_spans(self, text: str) -> TokenSpans:
+        """
+        텍스트를 토큰화하여 열 형식(TokenSpans)으로 반환한다.
+
+        토큰 바이트를 한 번의 호출로 얻은 뒤 UTF-8 시작 바이트 수를 누적하여
+        문자 오프셋을 계산하므로, 토큰마다 decode를 호출하지 않는다.
+        """
+        token_ids = self.encoding.encode(text) if text else []
+        token_bytes = self.encoding.decode_tokens_bytes(token_ids)
+
+        starts = array("l")
+        ends = array("l")
+        byte_lengths = array("l")
+        chars_before = 0
+        for chunk in token_bytes:
+            # 연속 바이트로 시작하면 직전 토큰에서 시작된 문자에 속한다
+            starts.append(chars_before - 1 if 0x80 <= chunk[0] < 0xC0 else chars_before)
+            chars_before += len(chunk.translate(None, _UTF8_CONTINUATION))
+            ends.append(chars_before)
+            byte_lengths.append(len(chunk))
+
+        return TokenSpans(
+            text=text,
+            data=b"".join(token_bytes),
+            token_ids=array("l", token_ids),
+            starts=starts,
+            ends=ends,
+            byte_lengths=byte_lengths,
+        )
+
+    def recount(
+        self,
+        text: str,
+        ends: list[int],
+        start: int,
+        end: int,
+        replacement: str,
+    ) -> EditCount:
+        """
+        편집 전 토큰 경계를 이용해 편집 주변 구간만 다시 인코딩하여
+        편집 후 토큰 수를 계산한다. 결과는 전체 재인코딩과 정확히 같다.
+
+        Args:
+            text: 편집 전 텍스트
+            ends: 편집 전 토큰 끝 문자 오프셋 (tokenize_spans().ends 또는
+                직전 recount 결과의 ends)
+            start, end: 교체할 구간 text[start:end]
+            replacement: 교체 문자열
+        """
+        if not 0 <= start <= end <= len(text):
+            raise ValueError(f"잘못된 편집 구간: ({start}, {end})")
+
+        new_text = text[:start] + replacement + text[end:]
+        delta = len(replacement) - (end - start)
+
+        # 왼쪽 기준점: 편집 구간보다 앞에 있는 조각 경계 (편집 전·후 동일)
+        left = 0
+        pos = text.rfind(" ", 0, start)
+        while pos > 0:
+            if _is_piece_boundary(text, pos):
+                left = pos
+                break
+            pos = text.rfind(" ", 0, pos)
+
+        # 오른쪽 기준점: 교체 문자열 뒤의 변경되지 않은 구간에 있는 조각 경계
+        right = len(new_text)
+        pos = new_text.find(" ", start + len(replacement) + 1)
+        while pos != -1:
+            if _is_piece_boundary(new_text, pos):
+                right = pos
+                break
+            pos = new_text.find(" ", pos + 1)
+
+        left_idx = bisect_right(ends, left)
+        right_idx = bisect_right(ends, right - delta)
+        aligned = (left == 0 or (left_idx > 0 and ends[left_idx - 1] == left)) and (
+            right == len(new_text) or (right_idx > 0 and ends[right_idx - 1] == right - delta)
+        )
+        if not aligned or (text and (not ends or ends[-1] != len(text))):
+            # 전달된 경계가 텍스트와 맞지 않으면 전체를 다시 인코딩한다
+            spans = self.tokenize_spans(new_text)
+            return EditCount(new_text, len(spans), list(spans.ends), (0, len(new_text)))
+
+        window = self.tokenize_spans(new_text[left:right])
+        new_ends = (
+            list(ends[:left_idx])
+            + [left + e for e in window.ends]
+            + [e + delta for e in ends[right_idx:]]
+        )
+        return EditCount(
+            text=new_text,
+            count=len(new_ends),
+            ends=new_ends,
+            window=(left, right),
+        )
 
     def compare(self, original: str, optimized: str) -> dict:
         """
@@ -69,8 +895,73 @@ class TokenCounter:
                 "reduction_rate": float (0~1)
             }
         """
-        orig_count = self.count(original)
-        opt_count = self.count(optimized)
+        return self._compare_counts(self.count(original), self.count(optimized))
+
+    def compare_many(
+        self,
+        pairs: list[tuple[str, str]],
+        num_threads: int = DEFAULT_NUM_THREADS,
+    ) -> list[dict]:
+        """
+        (원본, 최적화) 쌍 목록을 한 번의 배치 인코딩으로 비교한다.
+
+        Returns:
+            list[dict]: 각 쌍에 대한 compare() 결과
+        """
+        if not pairs:
+            return []
+        texts = [text for pair in pairs for text in pair]
+        counts = self.count_many(texts, num_threads=num_threads)
+        return [
+            self._compare_counts(counts[i], counts[i + 1])
+            for i in range(0, len(counts), 2)
+        ]
+
+    def count_stream(
+        self,
+        chunks,
+        per_chunk: bool = False,
+        batch_chars: int = DEFAULT_STREAM_BATCH_CHARS,
+        num_threads: int = DEFAULT_NUM_THREADS,
+    ) -> StreamCount:
+        """
+        문자열 조각의 반복자(iterator)를 스트리밍으로 읽어 정확한 토큰 수를 센다.
+
+        조각을 이어 붙인 전체 텍스트에 대한 count()와 결과가 같으며,
+        메모리에는 아직 경계를 찾지 못한 꼬리와 배치 대기 구간만 유지한다.
+
+        Args:
+            chunks: 문자열 조각의 반복자 (조각 경계는 임의여도 된다)
+            per_chunk: True면 인코딩한 구간별 토큰 수를 segments에 기록한다
+            batch_chars: 한 번에 배치 인코딩할 최대 문자 수
+            num_threads: 배치 인코딩 스레드 수
+        """
+        stream = TokenStream(self, per_chunk=per_chunk,
+                             batch_chars=batch_chars, num_threads=num_threads)
+        for chunk in chunks:
+            stream.feed(chunk)
+        return stream.finish()
+
+    def count_file(
+        self,
+        path,
+        chunk_chars: int = DEFAULT_STREAM_CHUNK_CHARS,
+        per_chunk: bool = False,
+        encoding: str = "utf-8",
+        num_threads: int = DEFAULT_NUM_THREADS,
+    ) -> StreamCount:
+        """
+        파일 전체를 메모리에 올리지 않고 chunk_chars 문자씩 읽어 토큰 수를 센다.
+
+        줄바꿈(\r\n 등)은 변환하지 않고 원문 그대로 센다.
+        """
+        with open(path, encoding=encoding, newline="") as f:
+            chunks = iter(lambda: f.read(chunk_chars), "")
+            return self.count_stream(chunks, per_chunk=per_chunk, num_threads=num_threads)
+
+    @staticmethod
+    def _compare_counts(orig_count: int, opt_count: int) -> dict:
+        """토큰 수 쌍으로 비교 결과를 만든다."""
         saved = orig_count - opt_count
         rate = saved / orig_count if orig_count > 0 else 0.0
 
@@ -80,3 +971,93 @@ class TokenCounter:
             "saved_tokens": saved,
             "reduction_rate": round(rate, 4),
         }
+
+
+class TokenStream:
+    """
+    스트리밍 토큰 카운터 (누적기).
+
+    feed()로 받은 텍스트를 사전 토크나이저 조각 경계(_is_stream_boundary: "글자 + 공백·
+    기호·숫자", "숫자 + 글자", "줄바꿈 + 문자")에서 잘라 앞부분만 인코딩 대기열에 넣고,
+    나머지 꼬리는 다음 조각과 이어 붙인다. 경계에서 자른 구간들의 토큰 수 합은 전체
+    텍스트의 토큰 수와 같다. 대기열이 batch_chars를 넘으면 배치 인코딩으로 비운다.
+
+    따라서 공백 없는 한국어 문장, JSON, URL, base64도 기호·숫자 위치에서 잘린다.
+    경계가 전혀 없는 구간은 경계가 나올 때까지 꼬리에 남되, 꼬리가
+    batch_chars × STREAM_TAIL_CAP_BATCHES를 넘으면 그 자리에서 자른다. 이렇게 자르면
+    잘린 위치 주변의 토큰 수가 조금 달라질 수 있으므로 forced_cuts로 알린다.
+    꼬리는 조각 목록으로 보관하고 새 조각 안에서만 경계를 찾으므로,
+    긴 공백 연속이 들어와도 처리 시간은 입력 길이에 선형이다.
+    """
+
+    def __init__(
+        self,
+        counter: TokenCounter,
+        per_chunk: bool = False,
+        batch_chars: int = DEFAULT_STREAM_BATCH_CHARS,
+        num_threads: int = DEFAULT_NUM_THREADS,
+    ):
+        self.counter = counter
+        self.per_chunk = per_chunk
+        self.batch_chars = batch_chars
+        self.num_threads = num_threads
+        self.total = 0
+        self.chars = 0                            # 인코딩을 마친 문자 수
+        self.segments: list[StreamSegment] = []
+        self.forced_cuts = 0
+        self._tail: list[str] = []
+        self._tail_chars = 0
+        self._tail_cap = max(1, batch_chars) * STREAM_TAIL_CAP_BATCHES
+        self._pending: list[str] = []
+        self._pending_chars = 0
+
+    def feed(self, chunk: str):
+        """텍스트 조각을 추가한다."""
+        if not chunk:
+            return
+        # 꼬리의 마지막 문자를 붙여 "꼬리 끝 글자 + 조각 첫 공백" 경계도 찾는다
+        previous = self._tail[-1][-1] if self._tail else ""
+        cut = _last_piece_boundary(previous + chunk) - len(previous)
+        if cut < 0 or (cut == 0 and not previous):
+            self._tail.append(chunk)
+            self._tail_chars += len(chunk)
+            if self._tail_chars > self._tail_cap:
+                # 경계 없이 상한을 넘은 꼬리: 정확도보다 메모리 상한을 지킨다
+                self.forced_cuts += 1
+                self._enqueue("".join(self._tail))
+                self._tail = []
+                self._tail_chars = 0
+            return
+        segment = "".join(self._tail) + chunk[:cut]
+        self._tail = [chunk[cut:]]
+        self._tail_chars = len(chunk) - cut
+        self._enqueue(segment)
+
+    def finish(self) -> StreamCount:
+        """남은 꼬리까지 인코딩하고 결과를 반환한다."""
+        if self._tail:
+            self._pending.append("".join(self._tail))
+            self._tail = []
+            self._tail_chars = 0
+        self._flush()
+        return StreamCount(total=self.total, chars=self.chars, segments=self.segments,
+                           forced_cuts=self.forced_cuts)
+
+    def _enqueue(self, segment: str):
+        self._pending.append(segment)
+        self._pending_chars += len(segment)
+        if self._pending_chars >= self.batch_chars:
+            self._flush()
+
+    def _flush(self):
+        if not self._pending:
+            return
+        # 구간은 크고 대부분 한 번만 등장하므로 캐시를 거치지 않는다
+        counts = self.counter._encode_counts(self._pending, self.num_threads)
+        for segment, count in zip(self._pending, counts):
+            if self.per_chunk:
+                self.segments.append(StreamSegment(self.chars, self.chars + len(segment), count))
+            self.total += count
+            self.chars += len(segment)
+        self._pending = []
+        self._pending_chars = 0
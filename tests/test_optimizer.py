@@ -58,6 +58,352 @@ class TestTokenCounter:
         assert result["saved_tokens"] == 0
         assert result["reduction_rate"] == 0.0
 
+    def test_tokenize_spans_offsets(self):
+        text = "Hello 안녕하세요 😀 漢字\n끝"
+        spans = self.counter.tokenize_spans(text)
+        assert list(spans.token_ids) == self.counter.encoding.encode(text)
+        assert spans.data.decode("utf-8") == text
+        assert sum(spans.byte_lengths) == len(text.encode("utf-8"))
+        for i in range(len(spans)):
+            assert 0 <= spans.starts[i] < spans.ends[i] <= len(text)
+            if i:
+                assert spans.starts[i] >= spans.starts[i - 1]
+            piece = spans.pieces()[i]
+            if "�" not in piece:
+                assert text[spans.starts[i]:spans.ends[i]] == piece
+
+    def test_tokenize_spans_partial_utf8(self):
+        # 사전에 없는 문자는 바이트 단위 토큰으로 쪼개진다
+        text = "😀"
+        spans = self.counter.tokenize_spans(text)
+        ids = self.counter.encoding.encode(text)
+        assert list(spans.token_ids) == ids
+        if len(ids) > 1:
+            assert all(spans.starts[i] == 0 and spans.ends[i] == 1 for i in range(len(ids)))
+        assert spans.pieces() == [self.counter.encoding.decode([t]) for t in ids]
+
+    def test_tokenize_spans_empty(self):
+        spans = self.counter.tokenize_spans("")
+        assert len(spans) == 0
+        assert spans.pieces() == []
+
+    def test_recount_matches_full_encode(self):
+        import random
+        rnd = random.Random(7)
+        text = (
+            "안녕하세요, 혹시 괜찮으시다면 파이썬에서 리스트와 튜플의 차이점을 알려주세요.\n"
+            "Please explain it's usage in 3 sentences.   그리고 또한 추가적으로 예시도 부탁드립니다.\n\n"
+        ) * 5
+        ends = list(self.counter.tokenize_spans(text).ends)
+        replacements = ["", " ", "꼭 반드시 ", "x", "\n\n", "'s", "42", "😀"]
+        for _ in range(200):
+            start = rnd.randrange(len(text) + 1)
+            end = min(len(text), start + rnd.randrange(6))
+            result = self.counter.recount(text, ends, start, end, rnd.choice(replacements))
+            full = self.counter.tokenize_spans(result.text)
+            assert result.count == len(full)
+            assert result.ends == list(full.ends)
+            text, ends = result.text, result.ends
+
+    def test_recount_reencodes_small_window(self):
+        text = "파이썬 설명해 주세요 " * 200
+        ends = list(self.counter.tokenize_spans(text).ends)
+        result = self.counter.recount(text, ends, 500, 503, "자바")
+        assert result.count == self.counter.count(result.text)
+        assert result.reencoded_chars < 50
+
+    def test_recount_with_stale_boundaries_falls_back(self):
+        result = self.counter.recount("Hello world", [1, 2], 0, 5, "Hi")
+        assert result.text == "Hi world"
+        assert result.count == self.counter.count("Hi world")
+
+    def test_count_many_matches_count(self):
+        texts = ["", "Hello world", "안녕하세요 세상", "   \n\n\t", "꼭 반드시 해주세요"] * 3
+        assert self.counter.count_many(texts, num_threads=4) == [
+            self.counter.count(t) for t in texts
+        ]
+
+    def test_compare_many_matches_compare(self):
+        pairs = [("This is a long sentence", "Short"), ("same text", "same text"), ("", "")]
+        assert self.counter.compare_many(pairs, num_threads=2) == [
+            self.counter.compare(a, b) for a, b in pairs
+        ]
+
+    def test_count_fragments_matches_count(self):
+        from optimizer.tokenizer import TokenCountCache
+        fragments = ["", "  ", "\n\n\n", "\t", "안녕하세요, ", "혹시 ", "혹시 ", "'s", " \n",
+                     " " * 5000, "꼭 반드시 "]
+        for counter in (TokenCounter(model="gpt-4o"), TokenCounter(model="gpt-4"),
+                        TokenCounter(cache=TokenCountCache())):
+            expected = [counter.count(f) for f in fragments]
+            assert counter.count_fragments(fragments) == expected
+            assert counter.count_fragments(fragments) == expected
+
+    def test_count_models_encodes_once_per_encoding(self):
+        from optimizer.tokenizer import MODEL_ENCODINGS, TokenCountCache
+        cache = TokenCountCache()
+        counter = TokenCounter(cache=cache)
+        text = "모델별 토큰 수를 비교합니다. Compare token counts."
+        counts = counter.count_models(text)
+        assert list(counts) == list(MODEL_ENCODINGS)
+        for model, count in counts.items():
+            assert count == TokenCounter(model=model).count(text)
+        # 다른 인코딩의 조회도 같은 캐시의 통계에 집계된다
+        assert cache.stats()["misses"] == len(set(MODEL_ENCODINGS.values()))
+
+    def test_counter_freed_without_cycle_gc(self):
+        import gc
+        import weakref
+        counter = TokenCounter()
+        counter.count_models("참조 해제 확인")
+        ref = weakref.ref(counter)
+        gc.disable()
+        try:
+            del counter
+            assert ref() is None
+        finally:
+            gc.enable()
+
+    def test_count_stream_matches_count(self):
+        import random
+        from optimizer.benchmark import BENCHMARK_DATASET
+        rng = random.Random(7)
+        texts = [t for prompts in BENCHMARK_DATASET.values() for t in prompts]
+        doc = "\r\n".join(rng.choice(texts) for _ in range(40))
+        chunks, i = [], 0
+        while i < len(doc):
+            size = rng.randint(1, 300)
+            chunks.append(doc[i:i + size])
+            i += size
+        result = self.counter.count_stream(chunks, per_chunk=True, batch_chars=500)
+        assert result.total == self.counter.count(doc)
+        assert result.chars == len(doc)
+        assert sum(s.count for s in result.segments) == result.total
+        assert result.segments[-1].end == len(doc)
+
+    def test_long_runs_match_plain_encode(self):
+        import random
+        rng = random.Random(11)
+        for model in ("gpt-4o", "gpt-4"):
+            counter = TokenCounter(model=model)
+            for char in (" ", "\n", "\t", "a", "가", "-", "1", "😀"):
+                n = rng.randint(4096, 12000)
+                text = f"요약해 주세요{rng.choice(['', ' ', 'x'])}{char * n}\n끝 end"
+                assert counter.count(text) == len(counter.encoding.encode(text))
+                assert counter.count_many([text]) == [counter.count(text)]
+
+    def test_huge_whitespace_run_is_linear(self):
+        from optimizer.tokenizer import ENCODING_REGISTRY
+        size, tokens, _ = ENCODING_REGISTRY.run_period(self.counter.encoding_name, " ")
+        base = 1_000_000
+        assert self.counter.count(" " * (base + 5 * size)) == self.counter.count(" " * base) + 5 * tokens
+        chunks = ["앞 문장 "] + [" " * 65536] * 30 + ["뒤 문장"]
+        streamed = self.counter.count_stream(chunks)
+        assert streamed.total == self.counter.count("".join(chunks))
+
+    def test_stream_without_spaces_keeps_tail_bounded(self):
+        import base64
+        import random
+        from optimizer.tokenizer import STREAM_TAIL_CAP_BATCHES, TokenStream
+
+        rng = random.Random(0)
+        pieces = ["한국어문장은띄어쓰기없이도이어집니다.", '{"key":"value","n":12345,"ok":true}',
+                  "https://example.com/path/to/page?q=검색&page=3",
+                  base64.b64encode(bytes(range(256))).decode(), "第一章測試文本。", "\n"]
+        doc = "".join(rng.choice(pieces) for _ in range(10_000_000 // 75))
+        batch_chars = 1 << 18
+        stream = TokenStream(self.counter, batch_chars=batch_chars)
+        peak = 0
+        for i in range(0, len(doc), 1 << 16):
+            stream.feed(doc[i:i + (1 << 16)])
+            peak = max(peak, sum(map(len, stream._tail)))
+        result = stream.finish()
+        assert peak <= batch_chars * STREAM_TAIL_CAP_BATCHES
+        assert result.forced_cuts == 0
+        assert result.total == len(self.counter.encoding.encode(doc, disallowed_special=()))
+
+        # 경계가 전혀 없는 입력은 상한에서 강제로 자른다
+        stream = TokenStream(self.counter, batch_chars=1000)
+        for _ in range(20):
+            stream.feed("가" * 1000)
+            assert sum(map(len, stream._tail)) <= 1000 * STREAM_TAIL_CAP_BATCHES
+        assert stream.finish().forced_cuts > 0
+
+    def test_count_file_keeps_line_endings(self, tmp_path):
+        doc = "첫 줄입니다 please\r\n둘째 줄\n\n   마지막 줄 " * 50
+        path = tmp_path / "doc.txt"
+        path.write_bytes(doc.encode("utf-8"))
+        result = self.counter.count_file(path, chunk_chars=37)
+        assert result.total == self.counter.count(doc)
+        assert result.segments == []
+
+
+class TestTokenCountCache:
+    def test_cached_count_matches_and_hits(self):
+        from optimizer.tokenizer import TokenCountCache
+        cache = TokenCountCache()
+        counter = TokenCounter(cache=cache)
+        plain = TokenCounter()
+        text = "안녕하세요, 부탁드립니다."
+        assert counter.count(text) == plain.count(text)
+        assert counter.count(text) == plain.count(text)
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+
+    def test_keyed_by_encoding(self):
+        from optimizer.tokenizer import TokenCountCache
+        cache = TokenCountCache()
+        TokenCounter(model="gpt-4o", cache=cache).count("Hello world")
+        TokenCounter(model="gpt-4", cache=cache).count("Hello world")
+        assert cache.stats()["entries"] == 2
+
+    def test_lru_eviction_by_entries(self):
+        from optimizer.tokenizer import TokenCountCache
+        cache = TokenCountCache(max_entries=2)
+        counter = TokenCounter(cache=cache)
+        counter.count("첫 번째")
+        counter.count("두 번째")
+        counter.count("첫 번째")   # 최근 사용으로 갱신
+        counter.count("세 번째")   # "두 번째"가 제거되어야 함
+        assert cache.stats()["evictions"] == 1
+        assert cache.get(cache.key(counter.encoding_name, "첫 번째")) is not None
+        assert cache.get(cache.key(counter.encoding_name, "두 번째")) is None
+
+    def test_byte_bound(self):
+        from optimizer.tokenizer import TokenCountCache
+        cache = TokenCountCache(max_entries=1000, max_bytes=600)
+        counter = TokenCounter(cache=cache)
+        for i in range(20):
+            counter.count(f"텍스트 {i}")
+        stats = cache.stats()
+        assert 0 < stats["bytes"] <= 600
+        assert stats["entries"] < 20
+
+    def test_count_many_uses_cache(self):
+        from optimizer.tokenizer import TokenCountCache
+        cache = TokenCountCache()
+        counter = TokenCounter(cache=cache)
+        texts = ["안녕하세요", "부탁드립니다", "안녕하세요", ""]
+        assert counter.count_many(texts) == [TokenCounter().count(t) for t in texts]
+        assert cache.stats()["entries"] == 2
+        counter.count_many(texts)
+        assert cache.stats()["hits"] >= 3
+
+
+class TestEncodingRegistry:
+    def test_counters_share_encoding(self):
+        a = TokenCounter(model="gpt-4o")
+        b = TokenCounter(model="gpt-4o-mini")
+        assert a.encoding is b.encoding
+        assert a.encoding_name == "o200k_base"
+
+    def test_refiner_shares_counter_with_analyzer(self):
+        refiner = PromptRefiner()
+        assert refiner.analyzer.counter is refiner.counter
+
+    def test_stats_reports_counters_and_memory(self):
+        from optimizer.tokenizer import ENCODING_REGISTRY
+        counter = TokenCounter(model="gpt-4")
+        stats = ENCODING_REGISTRY.stats()
+        assert stats["encodings"] >= 1
+        assert stats["counters"] >= 1
+        assert stats["counters_by_encoding"][counter.encoding_name] >= 1
+        assert stats["memory_bytes"][counter.encoding_name] > 0
+
+    def test_concurrent_lookup_returns_single_object(self):
+        from concurrent.futures import ThreadPoolExecutor
+        from optimizer.tokenizer import EncodingRegistry
+        registry = EncodingRegistry()
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            encodings = list(pool.map(lambda _: registry.get("o200k_base"), range(32)))
+        assert all(e is encodings[0] for e in encodings)
+        assert registry.stats()["encodings"] == 1
+
+    def test_offline_directory_load(self, tmp_path, monkeypatch):
+        import base64
+        from optimizer.tokenizer import ENCODING_REGISTRY, EncodingRegistry
+        reference = ENCODING_REGISTRY.get("cl100k_base")
+        lines = [
+            base64.b64encode(token) + b" " + str(rank).encode()
+            for token, rank in reference._mergeable_ranks.items()
+        ]
+        (tmp_path / "cl100k_base.tiktoken").write_bytes(b"\n".join(lines) + b"\n")
+        monkeypatch.setenv("PROMM_TIKTOKEN_DIR", str(tmp_path))
+
+        text = "안녕하세요, Hello world 1234\n\n  끝"
+        first = EncodingRegistry(verify_hash=False)
+        assert first.get("cl100k_base").encode(text) == reference.encode(text)
+        assert first.stats()["sources"]["cl100k_base"].endswith("(text)")
+
+        second = EncodingRegistry(verify_hash=False)
+        assert second.get("cl100k_base").encode(text) == reference.encode(text)
+        assert second.stats()["sources"]["cl100k_base"].endswith("(binary)")
+        assert "cl100k_base" in second.stats()["load_seconds"]
+
+        with pytest.raises(ValueError):
+            EncodingRegistry(verify_hash=True).get("cl100k_base")
+        with pytest.raises(FileNotFoundError):
+            EncodingRegistry(verify_hash=False).get("o200k_base")
+
+
+class TestTokenEstimator:
+    def setup_method(self):
+        self.counter = TokenCounter()
+        self.report = self.counter.calibrate()
+
+    def test_calibration_report(self):
+        assert self.report.encoding_name == self.counter.encoding_name
+        assert self.report.samples > 0
+        assert self.report.observed_coverage >= 0.8
+        assert set(self.report.weights) == {
+            "hangul", "ascii_letters", "ascii_words", "digits",
+            "whitespace", "symbols", "other",
+        }
+
+    def test_empty_string(self):
+        result = self.counter.estimate("")
+        assert (result.estimate, result.low, result.high) == (0, 0, 0)
+
+    def test_interval_contains_exact_count(self):
+        from optimizer.benchmark import BENCHMARK_DATASET
+        texts = [t for prompts in BENCHMARK_DATASET.values() for t in prompts]
+        covered = 0
+        for text in texts:
+            result = self.counter.estimate(text)
+            assert result.low <= result.estimate <= result.high
+            covered += result.low <= self.counter.count(text) <= result.high
+        assert covered / len(texts) >= 0.8
+
+    def test_coverage_holds_on_held_out_texts(self):
+        import random
+        from optimizer import estimator
+        from optimizer.benchmark import BENCHMARK_DATASET
+
+        rng = random.Random(0)
+        words = [w for prompts in BENCHMARK_DATASET.values() for t in prompts for w in t.split()]
+        texts = [" ".join(rng.choice(words) for _ in range(rng.randint(1, 30))) for _ in range(400)]
+        try:
+            report = estimator.calibrate(self.counter, texts[:200], coverage=0.95)
+            held_out = texts[200:]
+            covered = 0
+            for text in held_out:
+                result = estimator.estimate(text, report)
+                covered += result.low <= self.counter.count(text) <= result.high
+        finally:
+            self.counter.calibrate()
+        # 표본 200개의 이항 오차(약 2표준편차)만큼 허용
+        assert covered / len(held_out) >= report.coverage - 0.03
+
+    def test_threshold_inside_interval_falls_back_to_exact(self):
+        text = "안녕하세요, 다음 문서를 세 문장으로 요약해 주세요."
+        rough = self.counter.estimate(text)
+        result = self.counter.estimate(text, threshold=rough.estimate)
+        assert result.exact
+        assert result.estimate == self.counter.count(text)
+        far = self.counter.estimate(text, threshold=rough.high + 100)
+        assert not far.exact
+
 
 # ═══════════════════════════════════════
 # PatternAnalyzer 테스트
@@ -96,6 +442,115 @@ class TestPatternAnalyzer:
         report = self.analyzer.analyze("테스트 문장")
         assert report.total_tokens > 0
 
+    def test_scan_matches_per_pattern_findall(self):
+        import re
+        from optimizer.analyzer import ANALYSIS_CATEGORIES
+        from optimizer.benchmark import BENCHMARK_DATASET
+
+        texts = [t for prompts in BENCHMARK_DATASET.values() for t in prompts]
+        texts.append("  ".join(texts) + "\n\n\n\t")
+        for text in texts:
+            expected = []
+            for category, _, patterns in ANALYSIS_CATEGORIES:
+                matches = [m for p in patterns for m in re.findall(p, text)]
+                if matches:
+                    expected.append((category, matches[:5], len(matches),
+                                     sum(self.analyzer.counter.count(m) for m in matches)))
+            report = self.analyzer.analyze(text)
+            actual = [(p.category, p.matches, p.count, p.estimated_waste)
+                      for p in report.patterns_found]
+            assert actual == expected
+
+    def test_log_like_prompt_waste(self):
+        lines = [f"[{i:04d}]\t  INFO{' ' * (2 + i % 7)}요청 처리   완료\n\n\n" for i in range(500)]
+        text = "".join(lines)
+        report = self.analyzer.analyze(text)
+        whitespace = report.patterns_found[0]
+        assert whitespace.category == "중복 공백/줄바꿈"
+        import re
+        fragments = [m for p in (r" {2,}", r"\n{3,}", r"\t+") for m in re.findall(p, text)]
+        assert whitespace.count == len(fragments)
+        assert whitespace.estimated_waste == sum(self.analyzer.counter.count(f) for f in fragments)
+
+    def test_sampled_analysis_brackets_exact(self):
+        import random
+        from optimizer.analyzer import SampledAnalysisReport
+        from optimizer.benchmark import BENCHMARK_DATASET
+
+        rng = random.Random(5)
+        texts = [t for prompts in BENCHMARK_DATASET.values() for t in prompts]
+        clean = ["파이썬 리스트 정렬 방법을 설명합니다.", "Quarterly revenue grew 12% year over year."]
+        doc = "\n".join(rng.choice(texts) if rng.random() < 0.3 else rng.choice(clean)
+                        for _ in range(8000))
+        exact = self.analyzer.analyze(doc)
+        sampled = self.analyzer.analyze(doc, sample=True, precision=0.01, confidence=0.99,
+                                        chunk_chars=1024, seed=0)
+        assert isinstance(sampled, SampledAnalysisReport)
+        assert sampled.sample_fraction < 1
+        assert sampled.waste_rate_high - sampled.waste_rate_low <= 0.02 + 1e-9
+        assert sampled.waste_rate_low <= exact.waste_rate <= sampled.waste_rate_high
+        assert abs(sampled.total_tokens - exact.total_tokens) / exact.total_tokens < 0.05
+        again = self.analyzer.analyze(doc, sample=True, precision=0.01, confidence=0.99,
+                                      chunk_chars=1024, seed=0)
+        assert again.waste_rate == sampled.waste_rate
+
+        # 짧은 텍스트는 전체를 분석한다
+        short = self.analyzer.analyze(texts[0], sample=True)
+        assert short.sample_fraction == 1.0
+        assert short.total_waste_estimate == self.analyzer.analyze(texts[0]).total_waste_estimate
+
+    def test_sampled_counts_runs_longer_than_context(self):
+        lines = []
+        for i in range(120):
+            lines.append(f"{i:03d} 요청 처리 완료 로그 줄입니다{'x' * 40}\n")
+            if i % 17 == 5:
+                lines.append(" " * 1300 + "끝\n")     # 여러 청크 경계를 넘는 공백 연속
+        doc = "".join(lines)
+        exact = self.analyzer.analyze(doc)
+        # 모든 청크를 분석하면 전체 분석과 같아야 한다
+        sampled = self.analyzer.analyze(doc, sample=True, precision=0.0, chunk_chars=100)
+        assert sampled.chunks_sampled == sampled.chunks_total
+        assert sampled.total_waste_estimate == exact.total_waste_estimate > 0
+
+    def test_scanner_overlapping_rules(self):
+        import re
+        from optimizer.rules.scanner import RuleScanner
+
+        rules = [(r"혹시\s*괜찮으시다면\s*", "", "a"), (r"혹시\s+", "", "a"),
+                 (r"시\s+", "", "b"), (r" {2,}", "", "c"), (r"(?:제가|내가)\s+", "", "d"),
+                 (r"(a)b", "", "e"), ("가|나", "", "f"), (r"혹시|제발\s*", "", "g")]
+        scanner = RuleScanner(rules)
+        text = "혹시  괜찮으시다면  혹시 시  제가 내가  abab 나 제발  가"
+        assert scanner.findall(text) == [re.findall(p, text) for p, _, _ in rules]
+        assert scanner.scan("나 다  가")[6] == [(0, 1), (5, 6)]
+
+    def test_required_literals(self):
+        from optimizer.rules.literals import required_literals
+
+        assert required_literals(r"안녕하세요[,.]?\s*") == {"안녕하세요"}
+        assert required_literals(r"(?:제가|내가)\s+(?:지금부터|이제)\s+") == {"제가", "내가"}
+        assert required_literals(r" {2,}") == {"  "}
+        assert required_literals(r"\s+") is None
+
+    def test_literal_trigger_never_skips_a_match(self):
+        import re
+        from optimizer.benchmark import BENCHMARK_DATASET
+        from optimizer.learned_optimizer import LEARNED_DOMAIN_PATTERNS
+        from optimizer.rules.korean import get_all_korean_rules
+        from optimizer.rules.literals import LiteralTrigger
+
+        patterns = [p for p, _, _ in get_all_korean_rules()]
+        patterns += [p for rules in LEARNED_DOMAIN_PATTERNS.values() for p, _ in rules]
+        trigger = LiteralTrigger(patterns)
+        for prompts in BENCHMARK_DATASET.values():
+            for text in prompts:
+                triggered = set(trigger.triggered(text))
+                for index, pattern in enumerate(patterns):
+                    if re.search(pattern, text):
+                        assert index in triggered and trigger.may_fire(index, text)
+                # 벤치마크 프롬프트는 전체 규칙 중 일부만 촉발한다
+                assert len(triggered) < len(patterns) // 2
+
 
 # ═══════════════════════════════════════
 # PromptRefiner 테스트
@@ -149,6 +604,184 @@ class TestPromptRefiner:
         assert "리스트" in result.refined
         assert "정렬" in result.refined
 
+    def test_span_rewrite_matches_sequential_sub(self):
+        import re
+        from optimizer.benchmark import BENCHMARK_DATASET
+        from optimizer.rules.korean import (
+            POLITE_PATTERNS, FILLER_PATTERNS,
+            REPETITIVE_INSTRUCTION_PATTERNS, UNNECESSARY_INSTRUCTION_PATTERNS,
+        )
+
+        def sequential(text, whitespace, korean):
+            if whitespace:
+                text = re.sub(r" {2,}", " ", text)
+                text = re.sub(r"\n{3,}", "\n\n", text).replace("\t", " ")
+                text = re.sub(r" +\n", "\n", text)
+            for patterns in korean:
+                for pattern, replacement in patterns:
+                    text = re.sub(pattern, replacement, text)
+            return re.sub(r" {2,}", " ", text).strip()
+
+        groups = [POLITE_PATTERNS, FILLER_PATTERNS,
+                  REPETITIVE_INSTRUCTION_PATTERNS, UNNECESSARY_INSTRUCTION_PATTERNS]
+        texts = [t for prompts in BENCHMARK_DATASET.values() for t in prompts]
+        texts += ["그리고 또한 추가적으로 \t\t설명\n\n\n\n다시 혹시 말해서 해줘   ", "\t혹시  "]
+        for text in texts:
+            for whitespace, flags in [(True, (True,) * 4), (False, (True,) * 4),
+                                      (True, (False, True, False, True))]:
+                result = self.refiner.refine(
+                    text, fix_whitespace=whitespace, fix_polite=flags[0], fix_fillers=flags[1],
+                    fix_repetitive=flags[2], fix_unnecessary=flags[3],
+                )
+                korean = [g for g, on in zip(groups, flags) if on]
+                assert result.refined == sequential(text, whitespace, korean)
+
+    def test_analysis_modes(self):
+        import pickle
+
+        text = "안녕하세요,  꼭 반드시 확인해 주세요."
+        eager = self.refiner.refine(text)
+        lazy = self.refiner.refine(text, analysis="lazy")
+        off = self.refiner.refine(text, analysis="off")
+        assert eager.refined == lazy.refined == off.refined
+        assert eager.applied_rules == lazy.applied_rules == off.applied_rules
+        assert off.analysis is None
+        assert not lazy.analysis.computed
+        assert lazy.analysis.total_waste_estimate == eager.analysis.total_waste_estimate
+        assert lazy.analysis.computed
+        restored = pickle.loads(pickle.dumps(lazy))
+        assert restored.analysis.patterns_found == eager.analysis.patterns_found
+        with pytest.raises(ValueError):
+            self.refiner.refine(text, analysis="later")
+
+    def test_result_cache_memory_and_disk_tiers(self, tmp_path):
+        from optimizer.result_cache import RefinementCache
+
+        path = str(tmp_path / "refine.sqlite")
+        text = "안녕하세요,  혹시 괜찮으시다면 요약해 주세요."
+        refiner = PromptRefiner(result_cache=RefinementCache(path=path))
+        first = refiner.refine(text)
+        again = refiner.refine(text)
+        assert again.refined == first.refined and again.applied_rules == first.applied_rules
+        assert again.analysis.patterns_found == first.analysis.patterns_found
+        refiner.refine(text, fix_polite=False)
+        assert refiner.result_cache.stats()["hits"] == 1
+        assert refiner.result_cache.stats()["misses"] == 2
+
+        lazy = refiner.refine(text, analysis="lazy")
+        assert lazy.analysis.total_tokens == first.analysis.total_tokens
+        refiner.result_cache.close()
+
+        reopened = PromptRefiner(result_cache=RefinementCache(path=path))
+        assert reopened.refine(text).refined == first.refined
+        assert reopened.result_cache.stats()["disk_hits"] == 1
+
+    def test_result_cache_returns_isolated_copies(self):
+        from optimizer.hybrid_engine import HybridOptimizer
+        from optimizer.result_cache import RefinementCache
+
+        text = "안녕하세요,  혹시 괜찮으시다면 꼭 반드시 요약해 주세요."
+        refiner = PromptRefiner(result_cache=RefinementCache())
+        first = refiner.refine(text)
+        expected = refiner.refine(text)
+        for result in (first, expected):
+            result.applied_rules[0]["count"] = -1
+            result.analysis.patterns_found[0].matches.append("변경")
+            result.analysis.spans.clear()
+        again = refiner.refine(text)
+        assert again.applied_rules == PromptRefiner().refine(text).applied_rules
+        assert again.analysis.spans and "변경" not in again.analysis.patterns_found[0].matches
+        # 하이브리드 엔진도 None이면 캐시하지 않는다
+        assert HybridOptimizer().refiner.result_cache is None
+
+    def test_result_cache_key_tracks_ruleset(self):
+        from optimizer.result_cache import RefinementCache
+        from optimizer.rules.program import compile_program
+
+        programs = [compile_program(*flags) for flags in
+                    [(True,) * 5, (True, False, True, True, True), (False,) * 5]]
+        assert len({program.digest for program in programs}) == 3
+        keys = {
+            RefinementCache.key("같은 텍스트", model="gpt-4o-mini", encoding_name="o200k_base",
+                                ruleset=program.digest, with_analysis=True)
+            for program in programs
+        }
+        assert len(keys) == 3
+
+    def test_refine_stream_matches_refine(self):
+        import random
+        from optimizer.benchmark import BENCHMARK_DATASET
+
+        rng = random.Random(0)
+        words = ["안녕하세요", "감사합니다", "혹시", "꼭", "반드시", "그리고", "또한",
+                 "추가적으로", "여러분", "코드", "A", ",", "제가", "지금부터", "질문"]
+        seps = [" ", "  ", "\n", "\n\n\n", "\t", " \n", ""]
+        texts = [t for prompts in BENCHMARK_DATASET.values() for t in prompts]
+        texts += ["".join(rng.choice(seps) + rng.choice(words) for _ in range(40)) + " \n"
+                  for _ in range(50)]
+        for text in texts:
+            cuts = sorted(rng.sample(range(len(text) + 1), min(len(text), 6)))
+            chunks = [text[a:b] for a, b in zip([0] + cuts, cuts + [len(text)])]
+            full = self.refiner.refine(text, fix_fillers=False)
+            stream = self.refiner.refine_stream(chunks, fix_fillers=False, segment_chars=8)
+            assert "".join(stream) == full.refined
+            assert stream.result.applied_rules == full.applied_rules
+            assert stream.result.original_tokens == full.original_tokens
+            assert stream.result.refined_tokens == full.refined_tokens
+
+    def test_rewrite_program_is_cached_per_flag_combination(self):
+        from optimizer.rules.program import compile_program
+
+        program = compile_program(fix_fillers=False)
+        assert compile_program(True, True, False, True, True) is program
+        assert all(rule.category != "불필요 접속사/수식어" for rule in program.korean)
+        assert [rule.name for rule in program.whitespace][0] == "연속 공백 제거"
+        off = compile_program(False, False, False, False, False)
+        assert not off.enabled and off.whitespace == () and off.korean == ()
+
+    def test_rule_engine_records_matches_while_substituting(self):
+        import re
+        from optimizer.rules.engine import apply_rule, compile_rule
+
+        text = "파이썬 를 사용하고 자바 를 활용하고 끝"
+        rule = compile_rule(r"(.+?)를?\s+(?:사용하고|활용하고)\s+", r"\1 사용, ", "학습 패턴")
+        new_text, hit = apply_rule(text, rule)
+        assert new_text == re.sub(rule.pattern, rule.replacement, text)
+        assert hit.first == re.findall(rule.pattern, text)[0]
+        assert hit.count == 2
+        assert hit.spans == [m.span() for m in re.finditer(rule.pattern, text)]
+        assert apply_rule("끝", rule) == ("끝", None)
+
+    def test_fixpoint_reruns_rules_enabled_by_later_rewrites(self):
+        from optimizer.rules.engine import apply_rules
+        from optimizer.rules.program import compile_program
+
+        program = compile_program()
+        # "사실상 " 제거로 앞 규칙("그리고 또한")의 매칭이 새로 생긴다
+        text = "그리고 사실상 또한 설명해 주세요"
+        assert self.refiner.refine(text).refined == "그리고 또한 설명해 주세요"
+        result = self.refiner.refine(text, fixpoint=True)
+        assert result.refined == "또한 설명해 주세요"
+        assert result.fixpoint.converged and result.fixpoint.passes == 2
+        assert list(result.fixpoint.reruns) == [r"그리고\s+또한\s+"]
+        assert apply_rules(result.refined, program.rules)[0] == result.refined
+
+        # 텍스트 끝 규칙: 뒤쪽 치환으로 "감사합니다"가 끝에 오게 된 경우
+        closing = self.refiner.refine("설명해 주세요. 감사합니다. 아무튼 ", fixpoint=True)
+        assert closing.refined == "설명해 주세요."
+        assert self.refiner.refine("설명해 주세요", fixpoint=True).fixpoint.passes == 1
+
+    def test_fixpoint_run_limit(self):
+        from optimizer.rules.engine import apply_rules
+        from optimizer.rules.program import compile_program
+        from optimizer.rules.scheduler import apply_rules_fixpoint
+
+        rules = compile_program().rules
+        text = "그리고 사실상 또한 설명해 주세요"
+        limited, _, report = apply_rules_fixpoint(text, rules, max_runs=1)
+        assert limited == apply_rules(text, rules)[0]
+        assert not report.converged and report.passes == 1
+
 
 # ═══════════════════════════════════════
 # CostCalculator 테스트
@@ -192,6 +825,16 @@ class TestCostCalculator:
             assert "output" in prices
             assert prices["input"] > 0
 
+    def test_compare_models_matches_single_model(self):
+        original = "안녕하세요, 혹시 괜찮으시다면 파이썬 설명해 주세요. 감사합니다."
+        optimized = "파이썬 설명해 주세요."
+        reports = self.calculator.compare_models(original, optimized, daily_calls=50)
+        assert [r.model for r in reports] == CostCalculator.get_supported_models()
+        for report in reports:
+            assert report == CostCalculator(model=report.model).compare(
+                original, optimized, daily_calls=50
+            )
+
 
 # ═══════════════════════════════════════
 # 통합 테스트
@@ -338,6 +981,63 @@ class TestLearnedOptimizer:
         assert "딕셔너리" in result.adaptive_result.refined
 
 
+# ═══════════════════════════════════════
+# 규칙 팩 테스트
+# ═══════════════════════════════════════
+
+class TestRulePacks:
+    def _write(self, path, rules, name="tenant"):
+        import json
+        path.write_text(json.dumps({"name": name, "rules": rules}, ensure_ascii=False), encoding="utf-8")
+        return str(path)
+
+    def test_load_cache_and_apply(self, tmp_path):
+        from optimizer.learned_optimizer import apply_learned_patterns
+        from optimizer.rules.packs import load_rule_pack
+
+        path = self._write(tmp_path / "tenant.json", [
+            {"category": "고객사 용어", "pattern": r"저희\s+회사의\s+", "replacement": "당사 ",
+             "domain": "코드생성", "priority": 10},
+            {"category": "고객사 용어", "pattern": r"요약\s+부탁\s+", "domain": "요약"},
+        ])
+        cache_dir = tmp_path / "cache"
+        cold = load_rule_pack(path, cache_dir=str(cache_dir))
+        assert [f.suffix for f in cache_dir.iterdir()] == [".rulepack"]
+
+        warm = load_rule_pack(path, cache_dir=str(cache_dir))
+        assert warm.digest == cold.digest and warm.name == "tenant"
+        assert [e.rule.literals for e in warm.rules] == [e.rule.literals for e in cold.rules]
+        # 웜 스타트는 정규식을 컴파일하지 않는다
+        assert all("compiled" not in e.rule.__dict__ for e in warm.rules)
+
+        text = "저희 회사의 간단한 코드 작성을 부탁드립니다"
+        refined, applied = apply_learned_patterns(text, "코드생성", (warm,))
+        assert refined.startswith("당사 ")
+        assert applied[0]["category"] == "고객사 용어"     # 우선순위 10이 내장 패턴보다 먼저
+        assert apply_learned_patterns(text, "요약", (warm,))[0] == text.strip()
+
+    def test_validation_errors(self, tmp_path):
+        from optimizer.rules.packs import RulePackError, load_rule_pack
+
+        bad_rules = [
+            ({"category": "x", "pattern": "(미완성"}, "정규식 오류"),
+            ({"category": "x", "pattern": r"\s*"}, "빈 문자열"),
+            ({"category": "x", "pattern": "a", "domain": "없는도메인"}, "domain"),
+            ({"category": "x", "pattern": "a", "weight": 1}, "알 수 없는 키"),
+            ({"category": "x", "pattern": "(a)", "replacement": r"\2"}, "대체 문자열"),
+        ]
+        for rule, message in bad_rules:
+            path = self._write(tmp_path / "bad.json", [{"category": "ok", "pattern": "b"}, rule])
+            with pytest.raises(RulePackError, match=r"rules\[1\].*" + message):
+                load_rule_pack(path)
+
+        pytest.importorskip("yaml")
+        yaml_path = tmp_path / "pack.yaml"
+        yaml_path.write_text("rules:\n  - category: 고객사\n    pattern: '아무쪼록\\s+'\n", encoding="utf-8")
+        pack = load_rule_pack(str(yaml_path))
+        assert pack.name == "pack" and pack.rules[0].rule.pattern == r"아무쪼록\s+"
+
+
 # ═══════════════════════════════════════
 # PromptRAG (RAG 개념) 테스트
 # ═══════════════════════════════════════
@@ -492,3 +1192,124 @@ class TestHybridEngine:
         assert result.cost_rule_based >= 0
         assert result.cost_hybrid >= 0
         assert result.cost_savings >= 0
+
+
+# ═══════════════════════════════════════
+# 병렬 일괄 처리 테스트
+# ═══════════════════════════════════════
+
+class TestParallel:
+    def test_refine_many_matches_refine_in_order(self):
+        from optimizer.benchmark import BENCHMARK_DATASET
+        from optimizer.parallel import refine_many
+
+        texts = [t for prompts in BENCHMARK_DATASET.values() for t in prompts]
+        results = refine_many(texts, max_workers=2, chunk_size=7, fix_fillers=False)
+        refiner = PromptRefiner()
+        assert [r.refined for r in results] == [
+            refiner.refine(t, fix_fillers=False).refined for t in texts
+        ]
+
+    def test_analyze_many_isolates_errors(self):
+        from optimizer.parallel import BatchError, analyze_many
+
+        texts = ["안녕하세요,  테스트", None, "꼭 반드시 해주세요"]
+        for workers in (1, 2):
+            results = analyze_many(texts, max_workers=workers, chunk_size=1)
+            assert isinstance(results[1], BatchError) and results[1].index == 1
+            assert results[0].total_tokens == PatternAnalyzer().analyze(texts[0]).total_tokens
+            assert results[2].patterns_found[0].category == "반복 강조 표현"
+
+    def test_worker_crash_fails_only_that_item(self):
+        import os
+        from optimizer.parallel import BatchError, refine_many
+
+        class Crash(str):
+            def __reduce__(self):
+                return os._exit, (1,)       # 워커에서 역직렬화할 때 프로세스 종료
+
+        texts = [f"안녕하세요,  항목 {i}번 꼭 반드시 해주세요" for i in range(40)]
+        texts[17] = Crash("종료")
+        results = refine_many(texts, max_workers=2, chunk_size=4)
+        assert len(results) == 40
+        assert isinstance(results[17], BatchError) and results[17].index == 17
+        assert results[17].error_type == "BrokenProcessPool"
+        refiner = PromptRefiner()
+        assert all(results[i].refined == refiner.refine(texts[i]).refined
+                   for i in range(40) if i != 17)
+
+    def test_refine_parallel_matches_refine(self):
+        from optimizer.benchmark import BENCHMARK_DATASET
+        from optimizer.parallel import shutdown_pools
+        from optimizer.refiner import split_at_barriers
+        from optimizer.rules.program import compile_program
+
+        text = "  \n\n\n".join(t for prompts in BENCHMARK_DATASET.values() for t in prompts)
+        segments = split_at_barriers(text, compile_program().barrier, 300)
+        assert len(segments) > 2 and "".join(segments) == text
+
+        refiner = PromptRefiner()
+        try:
+            parallel = refiner.refine_parallel(text, max_workers=2, segment_chars=300)
+        finally:
+            shutdown_pools()
+        sequential = refiner.refine(text)
+        assert parallel.refined == sequential.refined
+        assert parallel.applied_rules == sequential.applied_rules
+        assert parallel.refined_tokens == sequential.refined_tokens
+
+
+# ═══════════════════════════════════════
+# 비동기 API 테스트
+# ═══════════════════════════════════════
+
+class TestAsyncAPI:
+    def test_refine_many_in_order_with_errors(self):
+        import asyncio
+        from optimizer.aio import AsyncPromptRefiner
+
+        texts = ["안녕하세요,  꼭 반드시 해주세요", None, "혹시 요약해 줘"]
+
+        async def run():
+            async with AsyncPromptRefiner(max_workers=2, max_concurrency=2) as refiner:
+                return await refiner.refine_many(texts, return_exceptions=True)
+
+        results = asyncio.run(run())
+        assert isinstance(results[1], TypeError)
+        assert results[0].refined == PromptRefiner().refine(texts[0]).refined
+        assert results[2].refined == PromptRefiner().refine(texts[2]).refined
+
+    def test_threads_share_one_refiner(self):
+        import asyncio
+        from optimizer.aio import AsyncPromptRefiner
+        from optimizer.benchmark import BENCHMARK_DATASET
+        from optimizer.result_cache import RefinementCache
+
+        texts = [t for prompts in BENCHMARK_DATASET.values() for t in prompts] * 3
+        shared = PromptRefiner(result_cache=RefinementCache())
+
+        async def run():
+            async with AsyncPromptRefiner(refiner=shared, max_workers=4, max_concurrency=8) as refiner:
+                assert refiner.refiner is shared
+                return await refiner.refine_many(texts)
+
+        results = asyncio.run(run())
+        sequential = PromptRefiner()
+        assert [r.refined for r in results] == [sequential.refine(t).refined for t in texts]
+        assert shared.result_cache.stats()["hits"] >= len(texts) // 3
+
+    def test_timeout_does_not_block_loop(self):
+        import asyncio
+        from optimizer.aio import AsyncPromptRefiner
+        from optimizer.benchmark import BENCHMARK_DATASET
+
+        big = "\n".join(t for prompts in BENCHMARK_DATASET.values() for t in prompts) * 100
+
+        async def run():
+            async with AsyncPromptRefiner(max_workers=1, max_concurrency=1) as refiner:
+                with pytest.raises(TimeoutError):
+                    await refiner.refine(big, timeout=0.001)
+                # 슬롯은 실행 중이던 작업이 끝난 뒤 반납된다
+                return await refiner.refine("혹시 요약해 줘", timeout=30)
+
+        assert asyncio.run(run()).refined == "요약해 줘"